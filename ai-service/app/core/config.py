@@ -19,9 +19,44 @@ class Settings(BaseSettings):
     # Redis Configuration
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     
+    # Analysis result cache (in-process LRU, optional shared Redis tier)
+    ANALYSIS_CACHE_SIZE: int = int(os.getenv("ANALYSIS_CACHE_SIZE", "1024"))
+    ANALYSIS_CACHE_REDIS: bool = os.getenv("ANALYSIS_CACHE_REDIS", "false").lower() == "true"
+    ANALYSIS_CACHE_TTL: int = int(os.getenv("ANALYSIS_CACHE_TTL", str(24 * 3600)))
+    
     # OpenAI Configuration
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    # Model of the lesson, exercise and curriculum generation endpoints; their token
+    # budgets are fitted to its context window
+    OPENAI_GENERATION_MODEL: str = os.getenv("OPENAI_GENERATION_MODEL", "gpt-4")
+    # Let the NLP processor's lesson metadata and word descriptions call the LLM; when off
+    # (the default) it keeps its local mock response and never makes billed requests
+    NLP_LLM_ENABLED: bool = os.getenv("NLP_LLM_ENABLED", "false").lower() == "true"
+    
+    # Shared AsyncOpenAI client: HTTP connection pool, keep-alive and timeouts (seconds)
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    OPENAI_KEEPALIVE_EXPIRY: float = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+    OPENAI_TIMEOUT: float = float(os.getenv("OPENAI_TIMEOUT", "60"))
+    OPENAI_CONNECT_TIMEOUT: float = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+    OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")  # e.g. a local stand-in server
+    
+    # LLM backend behind the shared client: "openai", "stub" (deterministic local stand-in),
+    # "record" (OpenAI, saving every exchange to the cassette) or "replay" (cassette only)
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "openai")
+    LLM_CASSETTE_PATH: str = os.getenv(
+        "LLM_CASSETTE_PATH",
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "llm_cassette.json"))
+    )
+    LLM_CASSETTE_REPLAY_LATENCY: bool = os.getenv("LLM_CASSETTE_REPLAY_LATENCY", "true").lower() == "true"
+    # Stand-in latency: fixed:MS, uniform:MIN_MS:MAX_MS or lognormal:MEDIAN_MS:SIGMA, plus a
+    # per-token delay; arrays of objects in the answer get LLM_STUB_ARRAY_ITEMS items
+    LLM_STUB_LATENCY: str = os.getenv("LLM_STUB_LATENCY", "lognormal:800:0.5")
+    LLM_STUB_TOKEN_MS: float = float(os.getenv("LLM_STUB_TOKEN_MS", "0"))
+    LLM_STUB_SEED: int = int(os.getenv("LLM_STUB_SEED", "0"))
+    LLM_STUB_ARRAY_ITEMS: int = int(os.getenv("LLM_STUB_ARRAY_ITEMS", "5"))
     
     # File Upload Configuration
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
@@ -31,6 +66,65 @@ class Settings(BaseSettings):
     # CEFR Level Configuration
     CEFR_LEVELS: List[str] = ["A1", "A2", "B1", "B2", "C1", "C2"]
     
+    # Curriculum data (vocabulary inventory and lesson JSON) used to build the lexicon index
+    CURRICULUM_DATA_DIR: str = os.getenv(
+        "CURRICULUM_DATA_DIR",
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+    )
+    
+    # Models loaded at startup instead of on first use: comma-separated registry names,
+    # "all", or empty for fully lazy loading
+    MODEL_WARMUP: str = os.getenv("MODEL_WARMUP", "")
+    
+    # spaCy nlp.pipe settings for bulk processing
+    SPACY_BATCH_SIZE: int = int(os.getenv("SPACY_BATCH_SIZE", "64"))
+    SPACY_N_PROCESS: int = int(os.getenv("SPACY_N_PROCESS", "1"))
+    
+    # Compiled Turkish-English dictionary, rebuilt from the curriculum data and extra word
+    # lists (comma-separated TSV/CSV paths) whenever a source is newer than the file
+    DICTIONARY_PATH: str = os.getenv(
+        "DICTIONARY_PATH",
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "tr_en_dictionary.bin"))
+    )
+    DICTIONARY_WORDLISTS: str = os.getenv("DICTIONARY_WORDLISTS", "")
+    
+    # Executor for CPU-bound analysis: "thread", "process" or "inline" (on the event loop).
+    # Workers default to the CPU count; at most MAX_PENDING jobs are queued or running
+    CPU_EXECUTOR_MODE: str = os.getenv("CPU_EXECUTOR_MODE", "thread")
+    CPU_EXECUTOR_WORKERS: int = int(os.getenv("CPU_EXECUTOR_WORKERS", "0"))
+    CPU_EXECUTOR_MAX_PENDING: int = int(os.getenv("CPU_EXECUTOR_MAX_PENDING", "64"))
+    
+    # Sampling interval of the event loop lag monitor (0 disables it)
+    LOOP_LAG_INTERVAL_MS: int = int(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+    
+    # LLM response cache: endpoints that opt in (comma-separated "router.endpoint" names or
+    # "*"), in-process LRU size, TTL, shared tier ("memory", "disk" or "redis"), the most
+    # files the disk tier keeps and the temperature rounding step that decides which
+    # requests share an entry
+    LLM_CACHE_ENDPOINTS: str = os.getenv(
+        "LLM_CACHE_ENDPOINTS",
+        "lessons.generate-with-gpt4,teacher.create-lesson,practice.generate-practice-exercises"
+    )
+    LLM_CACHE_SIZE: int = int(os.getenv("LLM_CACHE_SIZE", "512"))
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+    LLM_CACHE_TIER: str = os.getenv("LLM_CACHE_TIER", "disk")
+    LLM_CACHE_DIR: str = os.getenv(
+        "LLM_CACHE_DIR",
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "llm_cache"))
+    )
+    LLM_CACHE_DISK_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "10000"))
+    LLM_CACHE_TEMPERATURE_STEP: float = float(os.getenv("LLM_CACHE_TEMPERATURE_STEP", "0.25"))
+    
+    # Endpoints whose identical concurrent LLM requests share one in-flight completion
+    # (comma-separated "router.endpoint" names or "*"); cached endpoints always coalesce
+    LLM_COALESCE_ENDPOINTS: str = os.getenv("LLM_COALESCE_ENDPOINTS", "adaptive.recommend-next-lesson")
+    
+    # Per-word LLM calls in flight when a batched vocabulary request falls back
+    VOCABULARY_LLM_CONCURRENCY: int = int(os.getenv("VOCABULARY_LLM_CONCURRENCY", "4"))
+    
+    # Memo cache entries (distinct word forms) kept by the Turkish stemmer
+    STEMMER_CACHE_SIZE: int = int(os.getenv("STEMMER_CACHE_SIZE", "100000"))
+    
     # Speech Processing Configuration
     SPEECH_MODEL: str = os.getenv("SPEECH_MODEL", "whisper-1")
     
@@ -62,6 +62,15 @@ class LessonGenerationRequest(BaseModel):
     max_vocabulary: int = 20
     max_exercises: int = 10
 
+class BatchAnalysisRequest(BaseModel):
+    texts: List[str]
+    chunk_size: int = Field(default=8, ge=1, le=256)  # documents sent to a worker at a time
+
+class BatchLessonRequest(BaseModel):
+    lessons: List[LessonGenerationRequest]
+    batch_size: Optional[int] = Field(default=None, ge=1)  # texts per spaCy nlp.pipe batch
+    n_process: Optional[int] = Field(default=None, ge=1)   # spaCy worker processes
+
 class GeneratedLesson(BaseModel):
     title: str
     description: str
@@ -71,6 +80,7 @@ class GeneratedLesson(BaseModel):
     exercises: List[Exercise]
     estimated_duration: int  # in minutes
     difficulty_level: CEFRLevel
+    metadata: Dict[str, Any] = Field(default_factory=dict)  # detected level, per-stage timings
 
 # New models for enhanced functionality
 
@@ -1,8 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Dict, Any
-import os
-import json
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from app.models.content import (
     AdaptiveLessonRequest,
@@ -14,21 +12,21 @@ from app.models.content import (
     GrammarRule,
     Exercise
 )
+from app.services.llm_cache import cached_chat_completion
+from app.services.llm_client import get_openai_client
+from app.services.llm_json import parse_llm_json
+from app.services.prompt_budget import chat_params, compact_json
 
 router = APIRouter()
 
 @router.post("/generate-adaptive-lesson")
-async def generate_adaptive_lesson(request: AdaptiveLessonRequest):
+async def generate_adaptive_lesson(
+    request: AdaptiveLessonRequest,
+    client: AsyncOpenAI = Depends(get_openai_client)
+):
     """Generate a personalized lesson based on student progress and weak areas"""
     
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-            
-        client = OpenAI(api_key=api_key)
-        
         # Create adaptive prompt based on student data
         prompt = f"""
         Create a personalized Turkish lesson for a student with the following profile:
@@ -83,23 +81,21 @@ async def generate_adaptive_lesson(request: AdaptiveLessonRequest):
         """
         
         print("Generating adaptive lesson with GPT-4...")
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert Turkish language teacher specializing in adaptive learning. Create personalized lessons that address individual student needs and learning patterns."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2500
-        )
+        response = await client.chat.completions.create(**chat_params(
+            "adaptive.generate-adaptive-lesson",
+            "You are an expert Turkish language teacher specializing in adaptive learning. Create personalized lessons that address individual student needs and learning patterns.",
+            prompt,
+            temperature=0.7
+        ))
         print("Adaptive lesson generation completed successfully")
         
         # Parse the response
         content = response.choices[0].message.content
         
-        try:
-            lesson_data = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content)
+        if parsed.ok:
+            lesson_data = parsed.data
+        else:
             # If JSON parsing fails, create a structured response
             lesson_data = {
                 "title": f"Adaptive {request.lesson_type.title()} Lesson",
@@ -128,17 +124,13 @@ async def generate_adaptive_lesson(request: AdaptiveLessonRequest):
         raise HTTPException(status_code=500, detail=f"Adaptive lesson generation failed: {str(e)}")
 
 @router.post("/analyze-student-progress")
-async def analyze_student_progress(progress_data: List[StudentProgress]):
+async def analyze_student_progress(
+    progress_data: List[StudentProgress],
+    client: AsyncOpenAI = Depends(get_openai_client)
+):
     """Analyze student progress and recommend next learning steps"""
     
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-            
-        client = OpenAI(api_key=api_key)
-        
         # Aggregate progress data
         total_lessons = len(progress_data)
         avg_completion = sum(p.completion_rate for p in progress_data) / total_lessons if total_lessons > 0 else 0
@@ -171,10 +163,10 @@ async def analyze_student_progress(progress_data: List[StudentProgress]):
         - Average accuracy score: {avg_accuracy:.1%}
         
         Weak Areas (frequency):
-        {json.dumps(weak_area_counts, indent=2)}
+        {compact_json(weak_area_counts)}
         
         Strong Areas (frequency):
-        {json.dumps(strong_area_counts, indent=2)}
+        {compact_json(strong_area_counts)}
         
         Provide a comprehensive analysis and recommendations in JSON format:
         {{
@@ -189,22 +181,20 @@ async def analyze_student_progress(progress_data: List[StudentProgress]):
         }}
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert language learning analyst. Provide detailed, actionable insights about student progress."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=1500
-        )
+        response = await client.chat.completions.create(**chat_params(
+            "adaptive.analyze-student-progress",
+            "You are an expert language learning analyst. Provide detailed, actionable insights about student progress.",
+            prompt,
+            temperature=0.3
+        ))
         
         # Parse the response
         content = response.choices[0].message.content
         
-        try:
-            analysis = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content)
+        if parsed.ok:
+            analysis = parsed.data
+        else:
             analysis = {
                 "overall_assessment": "Analysis completed",
                 "strengths": list(strong_area_counts.keys())[:3],
@@ -236,18 +226,12 @@ async def recommend_next_lesson(
     student_id: str,
     current_level: CEFRLevel,
     completed_lessons: List[str],
-    weak_areas: List[str]
+    weak_areas: List[str],
+    client: AsyncOpenAI = Depends(get_openai_client)
 ):
     """Recommend the next best lesson for a student based on their progress"""
     
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-            
-        client = OpenAI(api_key=api_key)
-        
         prompt = f"""
         Recommend the next lesson for a Turkish language student:
         
@@ -275,22 +259,24 @@ async def recommend_next_lesson(
         }}
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert Turkish language curriculum designer. Recommend optimal learning sequences."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5,
-            max_tokens=1000
+        response = await cached_chat_completion(
+            client,
+            "adaptive.recommend-next-lesson",
+            **chat_params(
+                "adaptive.recommend-next-lesson",
+                "You are an expert Turkish language curriculum designer. Recommend optimal learning sequences.",
+                prompt,
+                temperature=0.5
+            )
         )
         
         # Parse the response
         content = response.choices[0].message.content
         
-        try:
-            recommendation = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content)
+        if parsed.ok:
+            recommendation = parsed.data
+        else:
             recommendation = {
                 "recommended_lesson_type": "vocabulary",
                 "topic": "Basic Turkish vocabulary",
@@ -12,23 +12,73 @@ from app.models.content import (
     CEFRLevel
 )
 from app.services.content_extractor import ContentExtractor
-from app.services.nlp_processor import NLPProcessor
+from app.services.nlp_processor import NLPProcessor, get_nlp_processor
 from app.core.config import settings
 
 router = APIRouter()
 
 # Initialize services
 content_extractor = ContentExtractor()
-nlp_processor = NLPProcessor()
 
 @router.post("/extract", response_model=ContentExtractionResponse)
 async def extract_content_from_file(
     file: UploadFile = File(...),
     target_level: CEFRLevel = CEFRLevel.B1,
-    extract_images: bool = True
+    extract_images: bool = True,
+    nlp_processor: NLPProcessor = Depends(get_nlp_processor)
 ):
     """Extract content from uploaded file and generate learning materials"""
     
+    _validate_upload(file)
+    
+    try:
+        extracted_data = await _extract_upload(file)
+        
+        # Extract vocabulary
+        vocabulary = await nlp_processor.extract_vocabulary(
+            extracted_data["text"], target_level, max_items=20
+        )
+        
+        return await _build_extraction_response(file, extracted_data, vocabulary, target_level, nlp_processor)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Content extraction failed: {str(e)}")
+
+@router.post("/extract-batch", response_model=List[ContentExtractionResponse])
+async def extract_content_from_files(
+    files: List[UploadFile] = File(...),
+    target_level: CEFRLevel = CEFRLevel.B1,
+    nlp_processor: NLPProcessor = Depends(get_nlp_processor)
+):
+    """Import several files at once; vocabulary for all of them is extracted in one batched NLP pass"""
+    
+    for file in files:
+        _validate_upload(file)
+    
+    try:
+        extracted = [await _extract_upload(file) for file in files]
+        
+        vocabularies = await nlp_processor.extract_vocabulary_many(
+            [data["text"] for data in extracted],
+            [target_level] * len(extracted),
+            [20] * len(extracted)
+        )
+        
+        return [
+            await _build_extraction_response(file, data, vocabulary, target_level, nlp_processor)
+            for file, data, vocabulary in zip(files, extracted, vocabularies)
+        ]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Content extraction failed: {str(e)}")
+
+def _validate_upload(file: UploadFile):
+    """Reject unsupported or oversized uploads"""
+    
     # Validate file type
     file_extension = os.path.splitext(file.filename)[1].lower()
     if file_extension not in settings.ALLOWED_EXTENSIONS:
@@ -43,16 +93,21 @@ async def extract_content_from_file(
             status_code=400,
             detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes"
         )
+
+async def _extract_upload(file: UploadFile) -> dict:
+    """Save an upload temporarily and extract its text and metadata"""
+    
+    file_extension = os.path.splitext(file.filename)[1].lower()
+    
+    # Save uploaded file temporarily
+    file_id = str(uuid.uuid4())
+    temp_filename = f"{file_id}{file_extension}"
+    temp_path = os.path.join(settings.UPLOAD_DIR, temp_filename)
+    
+    # Ensure upload directory exists
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     
     try:
-        # Save uploaded file temporarily
-        file_id = str(uuid.uuid4())
-        temp_filename = f"{file_id}{file_extension}"
-        temp_path = os.path.join(settings.UPLOAD_DIR, temp_filename)
-        
-        # Ensure upload directory exists
-        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-        
         # Save file
         async with aiofiles.open(temp_path, 'wb') as temp_file:
             content = await file.read()
@@ -69,60 +124,53 @@ async def extract_content_from_file(
         
         # Extract content
         extracted_data = await content_extractor.extract_content(temp_path, content_type)
-        extracted_text = extracted_data["text"]
-        
-        if not extracted_text.strip():
-            raise HTTPException(status_code=400, detail="No text content found in file")
-        
-        # Analyze text difficulty
-        detected_level, confidence = await nlp_processor.analyze_text_difficulty(extracted_text)
-        
-        # Extract vocabulary
-        vocabulary = await nlp_processor.extract_vocabulary(
-            extracted_text, target_level, max_items=20
-        )
-        
-        # Extract grammar rules
-        grammar_rules = await nlp_processor.extract_grammar_rules(
-            extracted_text, target_level
-        )
-        
-        # Generate exercises
-        exercises = await nlp_processor.generate_exercises(
-            extracted_text, vocabulary, target_level, max_exercises=10
-        )
-        
+    finally:
         # Clean up temporary file
         try:
             os.remove(temp_path)
         except:
             pass
-        
-        return ContentExtractionResponse(
-            extracted_text=extracted_text[:2000] + "..." if len(extracted_text) > 2000 else extracted_text,
-            vocabulary=vocabulary,
-            grammar_rules=grammar_rules,
-            suggested_exercises=exercises,
-            detected_level=detected_level,
-            confidence_score=confidence,
-            metadata={
-                "original_filename": file.filename,
-                "file_size": file.size,
-                "word_count": extracted_data.get("word_count", 0),
-                "character_count": extracted_data.get("character_count", 0),
-                **extracted_data.get("metadata", {})
-            }
-        )
-        
-    except Exception as e:
-        # Clean up temporary file on error
-        try:
-            if 'temp_path' in locals():
-                os.remove(temp_path)
-        except:
-            pass
-        
-        raise HTTPException(status_code=500, detail=f"Content extraction failed: {str(e)}")
+    
+    if not extracted_data["text"].strip():
+        raise HTTPException(status_code=400, detail=f"No text content found in file {file.filename}")
+    
+    return extracted_data
+
+async def _build_extraction_response(file: UploadFile, extracted_data: dict, vocabulary: list,
+                                     target_level: CEFRLevel,
+                                     nlp_processor: NLPProcessor) -> ContentExtractionResponse:
+    """Analyze extracted text and assemble the learning materials around its vocabulary"""
+    
+    extracted_text = extracted_data["text"]
+    
+    # Analyze text difficulty
+    detected_level, confidence = await nlp_processor.analyze_text_difficulty(extracted_text)
+    
+    # Extract grammar rules
+    grammar_rules = await nlp_processor.extract_grammar_rules(
+        extracted_text, target_level
+    )
+    
+    # Generate exercises
+    exercises = await nlp_processor.generate_exercises(
+        extracted_text, vocabulary, target_level, max_exercises=10
+    )
+    
+    return ContentExtractionResponse(
+        extracted_text=extracted_text[:2000] + "..." if len(extracted_text) > 2000 else extracted_text,
+        vocabulary=vocabulary,
+        grammar_rules=grammar_rules,
+        suggested_exercises=exercises,
+        detected_level=detected_level,
+        confidence_score=confidence,
+        metadata={
+            "original_filename": file.filename,
+            "file_size": file.size,
+            "word_count": extracted_data.get("word_count", 0),
+            "character_count": extracted_data.get("character_count", 0),
+            **extracted_data.get("metadata", {})
+        }
+    )
 
 @router.post("/extract-url")
 async def extract_content_from_url(request: ContentExtractionRequest):
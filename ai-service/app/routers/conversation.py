@@ -1,9 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Dict, Any
-import os
 import json
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+from app.services.llm_client import get_openai_client
 
 router = APIRouter()
 
@@ -23,16 +24,13 @@ class ConversationResponse(BaseModel):
     feedback: Dict[str, Any] = {}
 
 @router.post("/start")
-async def start_conversation(request: ConversationStartRequest):
+async def start_conversation(
+    request: ConversationStartRequest,
+    client: AsyncOpenAI = Depends(get_openai_client)
+):
     """Start a new conversation scenario"""
     
     try:
-        # Initialize OpenAI client
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        if not client.api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-        
         # Create scenario-specific prompt
         scenario_prompts = {
             "restaurant_ordering": "You are a friendly Turkish waiter in a restaurant. Help the customer order food in Turkish. Be patient and encouraging.",
@@ -46,7 +44,7 @@ async def start_conversation(request: ConversationStartRequest):
             "You are a helpful Turkish conversation partner. Practice Turkish with the user.")
         
         # Generate opening message
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": f"{system_prompt} The user is at {request.user_level} level. Keep language appropriate for their level. Always respond in Turkish with English translations in parentheses when helpful."},
@@ -59,7 +57,7 @@ async def start_conversation(request: ConversationStartRequest):
         opening_message = response.choices[0].message.content
         
         # Generate conversation suggestions
-        suggestions_response = client.chat.completions.create(
+        suggestions_response = await client.chat.completions.create(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": f"Generate 3 simple Turkish phrases a {request.user_level} level learner could use in a {request.scenario} scenario. Include English translations."},
@@ -90,19 +88,14 @@ async def respond_to_message(
     conversation_id: str,
     user_message: str,
     scenario: str = "general",
-    user_level: str = "A2"
+    user_level: str = "A2",
+    client: AsyncOpenAI = Depends(get_openai_client)
 ):
     """Respond to user message in conversation"""
     
     try:
-        # Initialize OpenAI client
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        if not client.api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-        
         # Generate response
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": f"You are having a Turkish conversation about {scenario}. The user is at {user_level} level. Respond naturally, correct any mistakes gently, and keep the conversation flowing. Include English translations for difficult words."},
@@ -115,7 +108,7 @@ async def respond_to_message(
         ai_response = response.choices[0].message.content
         
         # Generate feedback on user's Turkish
-        feedback_response = client.chat.completions.create(
+        feedback_response = await client.chat.completions.create(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": f"Analyze this Turkish message from a {user_level} learner: '{user_message}'. Provide brief, encouraging feedback on grammar, vocabulary, and suggestions for improvement. Be positive and constructive."},
@@ -193,19 +186,14 @@ async def get_conversation_scenarios():
 @router.post("/pronunciation-feedback")
 async def get_pronunciation_feedback(
     text: str,
-    user_level: str = "A2"
+    user_level: str = "A2",
+    client: AsyncOpenAI = Depends(get_openai_client)
 ):
     """Get pronunciation tips and feedback for Turkish text"""
     
     try:
-        # Initialize OpenAI client
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        if not client.api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-        
         # Generate pronunciation guidance
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": f"You are a Turkish pronunciation expert. Provide pronunciation guidance for {user_level} level learners. Include phonetic transcription, stress patterns, and common pronunciation mistakes to avoid."},
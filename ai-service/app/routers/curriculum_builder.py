@@ -1,8 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Dict, Any
-import os
-import json
-from openai import OpenAI
+import math
+from openai import AsyncOpenAI
 from pathlib import Path
 # from docx import Document  # Temporarily disabled
 
@@ -13,21 +12,23 @@ from app.models.content import (
     CEFRLevel,
     LessonType
 )
+from app.services.llm_client import get_openai_client
+from app.services.llm_json import parse_llm_json
+from app.services.prompt_budget import budget_for, chat_params, fit_items, fit_text
 
 router = APIRouter()
 
+# Unit length the curriculum prompt suggests, used to estimate how many units it produces
+UNIT_HOURS = 8
+
+# Unit fields kept when a long unit list has to be summarized for the path optimizer
+UNIT_SUMMARY_FIELDS = ("id", "title", "prerequisites", "estimated_hours")
+
 @router.get("/curriculum-data")
-async def get_curriculum_data():
+async def get_curriculum_data(client: AsyncOpenAI = Depends(get_openai_client)):
     """Load curriculum data from curriculum files and generate structured lessons"""
 
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-
-        client = OpenAI(api_key=api_key)
-
         # Path to curriculum files
         curriculum_dir = Path("/app/Curriculum")
         if not curriculum_dir.exists():
@@ -73,7 +74,7 @@ async def get_curriculum_data():
         prompt = f"""
         Based on the following Turkish curriculum content, create a structured JSON curriculum with units and lessons:
 
-        {curriculum_content}
+        {fit_text(curriculum_content, budget_for("curriculum.curriculum-data").context_tokens)}
 
         Please create a comprehensive curriculum structure in JSON format:
         {{
@@ -103,22 +104,20 @@ async def get_curriculum_data():
         Make sure to include practical vocabulary, essential grammar, and clear learning objectives for each lesson.
         """
 
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert Turkish language curriculum designer. Create structured, practical curricula based on provided content."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=3000
-        )
+        response = await client.chat.completions.create(**chat_params(
+            "curriculum.curriculum-data",
+            "You are an expert Turkish language curriculum designer. Create structured, practical curricula based on provided content.",
+            prompt,
+            temperature=0.3
+        ))
 
         # Parse the response
         content = response.choices[0].message.content
 
-        try:
-            curriculum_data = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content)
+        if parsed.ok:
+            curriculum_data = parsed.data
+        else:
             # Fallback curriculum structure
             curriculum_data = {
                 "title": "Turkish A1 Curriculum",
@@ -179,17 +178,13 @@ async def get_curriculum_data():
         raise HTTPException(status_code=500, detail=f"Curriculum data loading failed: {str(e)}")
 
 @router.post("/generate-curriculum")
-async def generate_curriculum(request: CurriculumRequest):
+async def generate_curriculum(
+    request: CurriculumRequest,
+    client: AsyncOpenAI = Depends(get_openai_client)
+):
     """Generate a complete curriculum with structured learning path"""
     
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-            
-        client = OpenAI(api_key=api_key)
-        
         # Create curriculum generation prompt
         prompt = f"""
         Create a comprehensive Turkish language curriculum with the following specifications:
@@ -242,23 +237,22 @@ async def generate_curriculum(request: CurriculumRequest):
         """
         
         print("Generating curriculum with GPT-4...")
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert Turkish language curriculum designer with extensive experience in creating structured learning programs."},
-                {"role": "user", "content": prompt}
-            ],
+        response = await client.chat.completions.create(**chat_params(
+            "curriculum.generate-curriculum",
+            "You are an expert Turkish language curriculum designer with extensive experience in creating structured learning programs.",
+            prompt,
             temperature=0.6,
-            max_tokens=3000
-        )
+            items={'units': math.ceil(request.total_hours / UNIT_HOURS)}
+        ))
         print("Curriculum generation completed successfully")
         
         # Parse the response
         content = response.choices[0].message.content
         
-        try:
-            curriculum_data = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content)
+        if parsed.ok:
+            curriculum_data = parsed.data
+        else:
             # If JSON parsing fails, create a basic curriculum structure
             curriculum_data = {
                 "title": request.title,
@@ -305,18 +299,12 @@ async def generate_unit_lessons(
     unit_description: str,
     target_level: CEFRLevel,
     lesson_count: int = 5,
-    focus_areas: List[LessonType] = None
+    focus_areas: List[LessonType] = None,
+    client: AsyncOpenAI = Depends(get_openai_client)
 ):
     """Generate detailed lessons for a specific curriculum unit"""
     
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-            
-        client = OpenAI(api_key=api_key)
-        
         focus_areas_str = ', '.join([area.value for area in focus_areas]) if focus_areas else "mixed skills"
         
         prompt = f"""
@@ -363,22 +351,21 @@ async def generate_unit_lessons(
         }}
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert Turkish language lesson designer. Create detailed, engaging lessons that build progressively."},
-                {"role": "user", "content": prompt}
-            ],
+        response = await client.chat.completions.create(**chat_params(
+            "curriculum.generate-unit-lessons",
+            "You are an expert Turkish language lesson designer. Create detailed, engaging lessons that build progressively.",
+            prompt,
             temperature=0.7,
-            max_tokens=2500
-        )
+            items={'lessons': lesson_count}
+        ))
         
         # Parse the response
         content = response.choices[0].message.content
         
-        try:
-            lessons_data = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content)
+        if parsed.ok:
+            lessons_data = parsed.data
+        else:
             # Create basic lesson structure if parsing fails
             lessons_data = {
                 "lessons": [
@@ -423,18 +410,12 @@ async def optimize_learning_path(
     curriculum_units: List[Dict[str, Any]],
     student_level: CEFRLevel,
     student_goals: List[str],
-    time_constraints: int = None  # hours per week
+    time_constraints: int = None,  # hours per week
+    client: AsyncOpenAI = Depends(get_openai_client)
 ):
     """Optimize the learning path based on student needs and constraints"""
     
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-            
-        client = OpenAI(api_key=api_key)
-        
         prompt = f"""
         Optimize the learning path for a Turkish language curriculum based on student needs:
         
@@ -444,7 +425,8 @@ async def optimize_learning_path(
         - Time Constraints: {time_constraints} hours per week (if specified)
         
         Available Units:
-        {json.dumps(curriculum_units, indent=2)}
+        {fit_items(curriculum_units, budget_for("curriculum.optimize-learning-path").context_tokens,
+                   summary_fields=UNIT_SUMMARY_FIELDS, noun="units")}
         
         Create an optimized learning path that:
         1. Respects prerequisites and logical progression
@@ -476,22 +458,21 @@ async def optimize_learning_path(
         }}
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert in personalized learning path optimization for language education."},
-                {"role": "user", "content": prompt}
-            ],
+        response = await client.chat.completions.create(**chat_params(
+            "curriculum.optimize-learning-path",
+            "You are an expert in personalized learning path optimization for language education.",
+            prompt,
             temperature=0.4,
-            max_tokens=2000
-        )
+            items={'units': len(curriculum_units)}
+        ))
         
         # Parse the response
         content = response.choices[0].message.content
         
-        try:
-            optimization_data = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content)
+        if parsed.ok:
+            optimization_data = parsed.data
+        else:
             # Create basic optimization if parsing fails
             unit_ids = [unit.get('id', f"unit_{i}") for i, unit in enumerate(curriculum_units)]
             optimization_data = {
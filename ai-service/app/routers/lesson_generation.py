@@ -1,10 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-import os
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List, Optional, Tuple
 import json
-from openai import OpenAI
+import time
+from openai import AsyncOpenAI
 
 from app.models.content import (
+    BatchAnalysisRequest,
+    BatchLessonRequest,
     LessonGenerationRequest,
     GeneratedLesson,
     CEFRLevel,
@@ -12,10 +15,23 @@ from app.models.content import (
     GrammarRule,
     Exercise
 )
-from app.services.nlp_processor import NLPProcessor
+from app.services.llm_cache import cached_chat_completion
+from app.services.llm_client import get_openai_client
+from app.services.llm_json import ItemSchema, parse_llm_json
+from app.services.llm_stream import SSE_HEADERS, sse_json_generation, stream_chat_completion
+from app.services.nlp_processor import NLPProcessor, get_nlp_processor
+from app.services.prompt_budget import chat_params
+from app.services.stage_pipeline import Stage, StagePipeline
 
 router = APIRouter()
-nlp_processor = NLPProcessor()
+
+# Arrays of the GPT-4 lesson document whose items are sent as soon as they are streamed
+LESSON_STREAM_SECTIONS = {
+    ('vocabulary',): 'vocabulary',
+    ('grammar_rules',): 'grammar_rules',
+    ('example_sentences',): 'example_sentences',
+    ('exercises',): 'exercises'
+}
 
 @router.get("/test")
 async def test_lesson_generation():
@@ -25,7 +41,10 @@ async def test_lesson_generation():
         "service": "AI-powered lesson generation",
         "endpoints": [
             "/generate-with-gpt4 - Generate lessons using GPT-4",
+            "/generate-with-gpt4/stream - Generate lessons using GPT-4, streamed as server-sent events",
             "/generate - Generate lessons using NLP processor",
+            "/generate-batch - Generate many lessons with batched NLP processing",
+            "/analyze-batch - Grade many passages, streamed as NDJSON",
             "/test - This test endpoint"
         ],
         "status": "healthy"
@@ -36,113 +55,41 @@ async def generate_lesson_with_gpt4(
     topic: str,
     cefr_level: str = "A1",
     lesson_type: str = "vocabulary",
-    duration_minutes: int = 15
+    duration_minutes: int = 15,
+    force_fresh: bool = False,  # skip the response cache and regenerate
+    client: AsyncOpenAI = Depends(get_openai_client)
 ):
     """Generate a complete lesson using GPT-4"""
 
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        print(f"OpenAI API Key present: {bool(api_key)}")
-
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-
-        client = OpenAI(api_key=api_key)
-        print("OpenAI client initialized successfully")
-
-        # Create GPT-4 prompt for lesson generation
-        prompt = f"""
-        Create a comprehensive Turkish language lesson with the following specifications:
-
-        Topic: {topic}
-        CEFR Level: {cefr_level}
-        Lesson Type: {lesson_type}
-        Duration: {duration_minutes} minutes
-
-        Please generate a lesson that includes:
-        1. Lesson title and description
-        2. Learning objectives (3-5 objectives)
-        3. Vocabulary list (10-15 words with Turkish and English)
-        4. Grammar rules (if applicable)
-        5. Example sentences (5-10 sentences)
-        6. Practice exercises (5 different types)
-        7. Cultural notes (2-3 interesting facts)
-
-        Format the response as JSON with the following structure:
-        {{
-            "title": "lesson title",
-            "description": "lesson description",
-            "objectives": ["objective1", "objective2", ...],
-            "vocabulary": [
-                {{"turkish": "word", "english": "translation", "pronunciation": "phonetic"}},
-                ...
-            ],
-            "grammar_rules": [
-                {{"rule": "grammar rule", "explanation": "explanation", "examples": ["example1", "example2"]}},
-                ...
-            ],
-            "example_sentences": [
-                {{"turkish": "sentence", "english": "translation"}},
-                ...
-            ],
-            "exercises": [
-                {{
-                    "type": "multiple_choice",
-                    "question": "question",
-                    "options": ["option1", "option2", "option3", "option4"],
-                    "correct_answer": "correct option",
-                    "explanation": "why this is correct"
-                }},
-                ...
-            ],
-            "cultural_notes": ["note1", "note2", ...]
-        }}
-
-        Make sure all content is appropriate for {cefr_level} level learners and focuses on practical, everyday Turkish.
-        """
-
         # Generate lesson content using GPT-4
         print("Making GPT-4 API call...")
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert Turkish language teacher and curriculum designer. Create engaging, educational content that follows CEFR standards."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000
+        response = await cached_chat_completion(
+            client, "lessons.generate-with-gpt4", force_fresh,
+            **_gpt4_lesson_params(topic, cefr_level, lesson_type, duration_minutes)
         )
         print("GPT-4 API call completed successfully")
 
         # Parse the response
         lesson_content = response.choices[0].message.content
 
-        # Try to parse as JSON, fallback to text if needed
-        try:
-            # Clean the response - sometimes GPT-4 adds markdown formatting
-            cleaned_content = lesson_content.strip()
-            if cleaned_content.startswith('```json'):
-                cleaned_content = cleaned_content[7:]
-            if cleaned_content.endswith('```'):
-                cleaned_content = cleaned_content[:-3]
-            cleaned_content = cleaned_content.strip()
-
-            lesson_data = json.loads(cleaned_content)
-
-            # Validate that we have the expected structure
-            if not isinstance(lesson_data, dict) or 'title' not in lesson_data:
-                raise json.JSONDecodeError("Invalid lesson structure", "", 0)
-
-        except json.JSONDecodeError as e:
-            # If JSON parsing fails, return structured text response
+        # Parse as JSON (repairing fences, trailing commas and truncation), fallback to text if needed
+        parsed = parse_llm_json(
+            lesson_content,
+            required=('title',),
+            sections=_gpt4_lesson_schemas(cefr_level, lesson_type)
+        )
+        if parsed.ok:
+            lesson_data = parsed.data
+        else:
+            # If no lesson can be recovered, return structured text response
             lesson_data = {
                 "title": f"{topic} - {cefr_level} Level",
                 "description": f"AI-generated lesson about {topic}",
                 "content": lesson_content,
                 "generated_with": "GPT-4",
                 "status": "success_text_format",
-                "parse_error": str(e),
+                "parse_error": parsed.error,
                 "note": "Content generated successfully but not in JSON format. This is normal for complex lessons."
             }
 
@@ -155,7 +102,9 @@ async def generate_lesson_with_gpt4(
                 "lesson_type": lesson_type,
                 "duration_minutes": duration_minutes,
                 "generated_with": "GPT-4",
-                "tokens_used": response.usage.total_tokens if hasattr(response, 'usage') else None
+                "tokens_used": getattr(response.usage, 'total_tokens', None),
+                "json_repaired": parsed.repaired,
+                "invalid_items_dropped": parsed.dropped
             },
             "status": "success"
         }
@@ -167,110 +116,192 @@ async def generate_lesson_with_gpt4(
         print(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Lesson generation failed: {str(e)}")
 
+@router.post("/generate-with-gpt4/stream")
+async def stream_lesson_with_gpt4(
+    topic: str,
+    cefr_level: str = "A1",
+    lesson_type: str = "vocabulary",
+    duration_minutes: int = 15,
+    force_fresh: bool = False,  # skip the response cache and regenerate
+    client: AsyncOpenAI = Depends(get_openai_client)
+):
+    """Generate a complete lesson using GPT-4, streaming tokens and finished items as server-sent events"""
+
+    deltas = stream_chat_completion(
+        client, "lessons.generate-with-gpt4", force_fresh,
+        **_gpt4_lesson_params(topic, cefr_level, lesson_type, duration_minutes)
+    )
+    metadata = {
+        "topic": topic,
+        "cefr_level": cefr_level,
+        "lesson_type": lesson_type,
+        "duration_minutes": duration_minutes,
+        "generated_with": "GPT-4"
+    }
+    return StreamingResponse(
+        sse_json_generation(
+            deltas, LESSON_STREAM_SECTIONS, metadata,
+            schemas=_gpt4_lesson_schemas(cefr_level, lesson_type), required=('title',)
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.post("/generate", response_model=GeneratedLesson)
-async def generate_lesson(request: LessonGenerationRequest):
+async def generate_lesson(request: LessonGenerationRequest,
+                          nlp_processor: NLPProcessor = Depends(get_nlp_processor)):
     """Generate a complete lesson from provided content"""
     
     try:
-        # Analyze content difficulty
-        detected_level, confidence = await nlp_processor.analyze_text_difficulty(request.content)
+        return await _assemble_lesson(request, nlp_processor)
         
-        # Extract vocabulary
-        vocabulary = await nlp_processor.extract_vocabulary(
-            request.content, 
-            request.target_level, 
-            max_items=request.max_vocabulary
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lesson generation failed: {str(e)}")
+
+@router.post("/generate-batch", response_model=List[GeneratedLesson])
+async def generate_lessons_batch(request: BatchLessonRequest,
+                                 nlp_processor: NLPProcessor = Depends(get_nlp_processor)):
+    """Generate many lessons, extracting vocabulary for all of them in one batched NLP pass"""
+    
+    try:
+        vocabularies = await nlp_processor.extract_vocabulary_many(
+            [lesson.content for lesson in request.lessons],
+            [lesson.target_level for lesson in request.lessons],
+            [lesson.max_vocabulary for lesson in request.lessons],
+            batch_size=request.batch_size,
+            n_process=request.n_process
         )
         
-        # Extract grammar rules
-        grammar_rules = await nlp_processor.extract_grammar_rules(
-            request.content, 
-            request.target_level
-        )
+        return [
+            await _assemble_lesson(lesson, nlp_processor, vocabulary)
+            for lesson, vocabulary in zip(request.lessons, vocabularies)
+        ]
         
-        # Generate exercises
-        exercises = await nlp_processor.generate_exercises(
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch lesson generation failed: {str(e)}")
+
+def _lesson_pipeline(request: LessonGenerationRequest, nlp_processor: NLPProcessor) -> StagePipeline:
+    """Lesson build steps and their inputs; only exercises and metadata wait on other stages"""
+    
+    async def difficulty():
+        return await nlp_processor.analyze_text_difficulty(request.content)
+    
+    async def vocabulary():
+        return await nlp_processor.extract_vocabulary(
+            request.content,
+            request.target_level,
+            max_items=request.max_vocabulary
+        )
+    
+    async def grammar_rules():
+        return await nlp_processor.extract_grammar_rules(request.content, request.target_level)
+    
+    async def exercises(vocabulary):
+        return await nlp_processor.generate_exercises(
             request.content,
             vocabulary,
             request.target_level,
             max_exercises=request.max_exercises
         )
-        
-        # Generate lesson title and description using AI
-        lesson_title, lesson_description = await _generate_lesson_metadata(
-            request.content, request.target_level, vocabulary, grammar_rules
-        )
-        
-        # Estimate duration based on content
-        estimated_duration = _estimate_lesson_duration(
-            len(vocabulary), len(grammar_rules), len(exercises)
+    
+    # Lesson title and description written by the LLM
+    async def metadata(vocabulary, grammar_rules):
+        return await _generate_lesson_metadata(
+            request.content, request.target_level, vocabulary, grammar_rules, nlp_processor
         )
+    
+    return StagePipeline([
+        Stage('difficulty', difficulty),
+        Stage('vocabulary', vocabulary),
+        Stage('grammar_rules', grammar_rules),
+        Stage('exercises', exercises, depends_on=('vocabulary',)),
+        Stage('metadata', metadata, depends_on=('vocabulary', 'grammar_rules')),
+    ])
+
+async def _assemble_lesson(request: LessonGenerationRequest, nlp_processor: NLPProcessor,
+                           vocabulary: Optional[List[VocabularyItem]] = None) -> GeneratedLesson:
+    """Build a lesson, running independent stages concurrently
+    
+    Vocabulary that was already extracted (e.g. in a batch) is used instead of the
+    vocabulary stage.
+    """
+    
+    provided = {'vocabulary': vocabulary} if vocabulary is not None else {}
+    run = await _lesson_pipeline(request, nlp_processor).run(provided)
+    
+    vocabulary = run.results['vocabulary']
+    grammar_rules = run.results['grammar_rules']
+    exercises = run.results['exercises']
+    detected_level, confidence = run.results['difficulty']
+    lesson_title, lesson_description = run.results['metadata']
+    
+    # Estimate duration based on content
+    estimated_duration = _estimate_lesson_duration(
+        len(vocabulary), len(grammar_rules), len(exercises)
+    )
+    
+    return GeneratedLesson(
+        title=lesson_title,
+        description=lesson_description,
+        content=request.content[:1000] + "..." if len(request.content) > 1000 else request.content,
+        vocabulary=vocabulary,
+        grammar_rules=grammar_rules,
+        exercises=exercises,
+        estimated_duration=estimated_duration,
+        difficulty_level=request.target_level,
+        metadata={
+            "detected_level": detected_level.value,
+            "detected_level_confidence": confidence,
+            "timings": run.timing_metadata()
+        }
+    )
+
+@router.post("/analyze-batch")
+async def analyze_batch(request: BatchAnalysisRequest,
+                        nlp_processor: NLPProcessor = Depends(get_nlp_processor)):
+    """Grade many reading passages in parallel, streaming NDJSON results as they finish"""
+    
+    async def stream_results():
+        started = time.perf_counter()
+        completed = 0
+        failed = 0
         
-        return GeneratedLesson(
-            title=lesson_title,
-            description=lesson_description,
-            content=request.content[:1000] + "..." if len(request.content) > 1000 else request.content,
-            vocabulary=vocabulary,
-            grammar_rules=grammar_rules,
-            exercises=exercises,
-            estimated_duration=estimated_duration,
-            difficulty_level=request.target_level
-        )
+        async for result in nlp_processor.cefr_analyzer.analyze_cefr_level_many(
+            request.texts, chunk_size=request.chunk_size
+        ):
+            completed += 1
+            if 'error' in result:
+                failed += 1
+            yield json.dumps(result, ensure_ascii=False) + "\n"
         
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Lesson generation failed: {str(e)}")
+        elapsed = time.perf_counter() - started
+        yield json.dumps({
+            "summary": {
+                "documents": completed,
+                "failed": failed,
+                "elapsed_seconds": round(elapsed, 3),
+                "documents_per_second": round(completed / elapsed, 1) if elapsed > 0 else None
+            }
+        }) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@router.get("/analysis-cache")
+async def get_analysis_cache_stats(nlp_processor: NLPProcessor = Depends(get_nlp_processor)):
+    """Hit-rate and eviction counters of the text analysis cache"""
+    return nlp_processor.analysis_cache.stats()
 
 @router.post("/vocabulary-lesson")
 async def generate_vocabulary_lesson(
     words: List[str],
-    target_level: CEFRLevel = CEFRLevel.B1
+    target_level: CEFRLevel = CEFRLevel.B1,
+    nlp_processor: NLPProcessor = Depends(get_nlp_processor)
 ):
     """Generate a vocabulary-focused lesson from a list of words"""
     
     try:
-        vocabulary_items = []
-        
-        for word in words[:20]:  # Limit to 20 words
-            # Use NLP processor to get translations and examples
-            prompt = f"""
-            For the Turkish word "{word}":
-            1. Provide English translation
-            2. Create a simple Turkish example sentence
-            3. Provide pronunciation guide (if possible)
-            
-            Format:
-            Translation: [translation]
-            Example: [turkish sentence]
-            Pronunciation: [pronunciation]
-            """
-            
-            try:
-                response = await nlp_processor._call_openai(prompt, max_tokens=100)
-                lines = response.strip().split('\n')
-                
-                translation = ""
-                example = ""
-                pronunciation = ""
-                
-                for line in lines:
-                    if line.startswith("Translation:"):
-                        translation = line.replace("Translation:", "").strip()
-                    elif line.startswith("Example:"):
-                        example = line.replace("Example:", "").strip()
-                    elif line.startswith("Pronunciation:"):
-                        pronunciation = line.replace("Pronunciation:", "").strip()
-                
-                if translation:
-                    vocabulary_items.append(VocabularyItem(
-                        turkish=word,
-                        english=translation,
-                        pronunciation=pronunciation if pronunciation else None,
-                        example_sentence=example if example else None,
-                        difficulty_level=target_level
-                    ))
-                    
-            except Exception:
-                continue
+        # Dictionary hits are answered locally, the rest in one batched LLM request
+        vocabulary_items = await nlp_processor.describe_words(words[:20], target_level)  # Limit to 20 words
         
         # Generate simple exercises for vocabulary
         exercises = []
@@ -297,7 +328,8 @@ async def generate_vocabulary_lesson(
 
 async def _generate_lesson_metadata(content: str, level: CEFRLevel, 
                                   vocabulary: List[VocabularyItem], 
-                                  grammar_rules: List[GrammarRule]) -> tuple:
+                                  grammar_rules: List[GrammarRule],
+                                  nlp_processor: NLPProcessor) -> tuple:
     """Generate lesson title and description using AI"""
     
     vocab_topics = [item.turkish for item in vocabulary[:5]]
@@ -347,3 +379,83 @@ def _estimate_lesson_duration(vocab_count: int, grammar_count: int, exercise_cou
     total_time *= 1.2
     
     return max(5, int(total_time))  # Minimum 5 minutes
+
+def _gpt4_lesson_params(topic: str, cefr_level: str, lesson_type: str, duration_minutes: int) -> Dict[str, Any]:
+    """Chat completion parameters for a complete GPT-4 lesson"""
+
+    prompt = f"""
+    Create a comprehensive Turkish language lesson with the following specifications:
+
+    Topic: {topic}
+    CEFR Level: {cefr_level}
+    Lesson Type: {lesson_type}
+    Duration: {duration_minutes} minutes
+
+    Please generate a lesson that includes:
+    1. Lesson title and description
+    2. Learning objectives (3-5 objectives)
+    3. Vocabulary list (10-15 words with Turkish and English)
+    4. Grammar rules (if applicable)
+    5. Example sentences (5-10 sentences)
+    6. Practice exercises (5 different types)
+    7. Cultural notes (2-3 interesting facts)
+
+    Format the response as JSON with the following structure:
+    {{
+        "title": "lesson title",
+        "description": "lesson description",
+        "objectives": ["objective1", "objective2", ...],
+        "vocabulary": [
+            {{"turkish": "word", "english": "translation", "pronunciation": "phonetic"}},
+            ...
+        ],
+        "grammar_rules": [
+            {{"rule": "grammar rule", "explanation": "explanation", "examples": ["example1", "example2"]}},
+            ...
+        ],
+        "example_sentences": [
+            {{"turkish": "sentence", "english": "translation"}},
+            ...
+        ],
+        "exercises": [
+            {{
+                "type": "multiple_choice",
+                "question": "question",
+                "options": ["option1", "option2", "option3", "option4"],
+                "correct_answer": "correct option",
+                "explanation": "why this is correct"
+            }},
+            ...
+        ],
+        "cultural_notes": ["note1", "note2", ...]
+    }}
+
+    Make sure all content is appropriate for {cefr_level} level learners and focuses on practical, everyday Turkish.
+    """
+
+    return chat_params(
+        "lessons.generate-with-gpt4",
+        "You are an expert Turkish language teacher and curriculum designer. Create engaging, educational content that follows CEFR standards.",
+        prompt,
+        temperature=0.7,
+        # Upper ends of the ranges the prompt asks for
+        items={'vocabulary': 15, 'grammar_rules': 3, 'example_sentences': 10, 'exercises': 5, 'cultural_notes': 3}
+    )
+
+def _gpt4_lesson_schemas(cefr_level: str, lesson_type: str) -> Dict[Tuple[str, ...], ItemSchema]:
+    """Checks for the vocabulary, grammar and exercise items of a GPT-4 lesson completion"""
+    
+    try:
+        level = CEFRLevel(cefr_level.upper())
+    except ValueError:
+        level = CEFRLevel.A1
+    return {
+        ('vocabulary',): ItemSchema(VocabularyItem, defaults={'difficulty_level': level}),
+        ('grammar_rules',): ItemSchema(
+            GrammarRule,
+            defaults={'difficulty_level': level, 'category': lesson_type},
+            aliases={'title': 'rule'}
+        ),
+        ('exercises',): ItemSchema(Exercise, defaults={'difficulty_level': level})
+    }
+
@@ -1,8 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
-import os
-import json
-from openai import OpenAI
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Tuple
+from openai import AsyncOpenAI
 
 from app.models.content import (
     ExerciseGenerationRequest,
@@ -11,112 +10,40 @@ from app.models.content import (
     VocabularyItem,
     GrammarRule
 )
+from app.services.llm_cache import cached_chat_completion
+from app.services.llm_client import get_openai_client
+from app.services.llm_json import ItemSchema, parse_llm_json
+from app.services.llm_stream import SSE_HEADERS, sse_json_generation, stream_chat_completion
+from app.services.prompt_budget import budget_for, chat_params, compact_json, fit_items, fit_text
 
 router = APIRouter()
 
+# Exercises are sent one by one as soon as each has been streamed
+PRACTICE_STREAM_SECTIONS = {('exercises',): 'exercises'}
+
 @router.post("/generate-practice-exercises")
-async def generate_practice_exercises(request: ExerciseGenerationRequest):
+async def generate_practice_exercises(
+    request: ExerciseGenerationRequest,
+    force_fresh: bool = False,  # skip the response cache and regenerate
+    client: AsyncOpenAI = Depends(get_openai_client)
+):
     """Generate additional practice exercises based on lesson content and student needs"""
     
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-            
-        client = OpenAI(api_key=api_key)
-        
-        # Create exercise generation prompt
-        prompt = f"""
-        Generate {request.count} practice exercises for Turkish language learning based on:
-        
-        Lesson Content:
-        {request.lesson_content[:1000]}...
-        
-        Exercise Requirements:
-        - Types: {', '.join(request.exercise_types)}
-        - Difficulty Level: {request.difficulty_level}
-        - Student Weak Areas: {', '.join(request.student_weak_areas)}
-        - Count: {request.count}
-        
-        Create diverse, engaging exercises that:
-        1. Reinforce the lesson content
-        2. Address student weak areas
-        3. Are appropriate for the difficulty level
-        4. Include clear instructions and feedback
-        5. Provide meaningful practice opportunities
-        
-        Available exercise types:
-        - multiple_choice: Multiple choice questions
-        - fill_in_blank: Fill in the missing words
-        - matching: Match Turkish words with English translations
-        - sentence_building: Build sentences from given words
-        - translation: Translate sentences between Turkish and English
-        - pronunciation: Pronunciation practice exercises
-        - listening_comprehension: Audio-based exercises
-        - reading_comprehension: Reading passages with questions
-        - grammar_practice: Grammar rule application
-        - vocabulary_drill: Vocabulary memorization and recall
-        
-        Format the response as JSON:
-        {{
-            "exercises": [
-                {{
-                    "type": "exercise_type",
-                    "title": "exercise title",
-                    "instructions": "clear instructions for the student",
-                    "content": {{
-                        "question": "main question or prompt",
-                        "options": ["option1", "option2", "option3", "option4"],
-                        "context": "additional context if needed",
-                        "audio_url": "optional audio file URL",
-                        "image_url": "optional image URL"
-                    }},
-                    "correct_answers": {{
-                        "answer": "correct answer",
-                        "alternatives": ["alternative1", "alternative2"],
-                        "explanation": "why this is correct"
-                    }},
-                    "hints": ["hint1", "hint2", ...],
-                    "difficulty_level": "{request.difficulty_level}",
-                    "estimated_time": 3,
-                    "skill_focus": ["vocabulary", "grammar", "reading"],
-                    "feedback": {{
-                        "correct": "positive feedback for correct answer",
-                        "incorrect": "helpful feedback for incorrect answer"
-                    }}
-                }},
-                ...
-            ],
-            "exercise_summary": {{
-                "total_exercises": {request.count},
-                "skill_distribution": {{"vocabulary": 40, "grammar": 30, "reading": 30}},
-                "difficulty_progression": "description of how exercises progress",
-                "estimated_total_time": 15
-            }}
-        }}
-        
-        Focus especially on: {', '.join(request.student_weak_areas)}
-        """
-        
         print("Generating practice exercises with GPT-4...")
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert Turkish language exercise designer. Create engaging, educational practice exercises that help students improve their skills."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=3000
+        response = await cached_chat_completion(
+            client, "practice.generate-practice-exercises", force_fresh,
+            **_practice_exercise_params(request)
         )
         print("Practice exercise generation completed successfully")
         
         # Parse the response
         content = response.choices[0].message.content
         
-        try:
-            exercises_data = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content, required=('exercises',), sections=_practice_exercise_schemas(request))
+        if parsed.ok:
+            exercises_data = parsed.data
+        else:
             # Create basic exercises if parsing fails
             exercises_data = {
                 "exercises": [
@@ -157,7 +84,9 @@ async def generate_practice_exercises(request: ExerciseGenerationRequest):
                 "lesson_content_length": len(request.lesson_content),
                 "target_weak_areas": request.student_weak_areas,
                 "difficulty_level": request.difficulty_level,
-                "exercise_types": request.exercise_types
+                "exercise_types": request.exercise_types,
+                "json_repaired": parsed.repaired,
+                "invalid_items_dropped": parsed.dropped
             }
         }
         
@@ -165,23 +94,44 @@ async def generate_practice_exercises(request: ExerciseGenerationRequest):
         print(f"Error in practice exercise generation: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Practice exercise generation failed: {str(e)}")
 
+@router.post("/generate-practice-exercises/stream")
+async def stream_practice_exercises(
+    request: ExerciseGenerationRequest,
+    force_fresh: bool = False,  # skip the response cache and regenerate
+    client: AsyncOpenAI = Depends(get_openai_client)
+):
+    """Generate practice exercises, streaming tokens and each finished exercise as server-sent events"""
+    
+    deltas = stream_chat_completion(
+        client, "practice.generate-practice-exercises", force_fresh,
+        **_practice_exercise_params(request)
+    )
+    metadata = {
+        "lesson_content_length": len(request.lesson_content),
+        "target_weak_areas": request.student_weak_areas,
+        "difficulty_level": request.difficulty_level,
+        "exercise_types": request.exercise_types
+    }
+    return StreamingResponse(
+        sse_json_generation(
+            deltas, PRACTICE_STREAM_SECTIONS, metadata,
+            schemas=_practice_exercise_schemas(request), required=('exercises',)
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.post("/generate-vocabulary-drills")
 async def generate_vocabulary_drills(
     vocabulary_list: List[VocabularyItem],
     drill_types: List[str],
     difficulty_level: CEFRLevel,
-    count: int = 10
+    count: int = 10,
+    client: AsyncOpenAI = Depends(get_openai_client)
 ):
     """Generate vocabulary-specific practice drills"""
     
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-            
-        client = OpenAI(api_key=api_key)
-        
         # Prepare vocabulary data
         vocab_data = []
         for item in vocabulary_list:
@@ -195,7 +145,8 @@ async def generate_vocabulary_drills(
         Create {count} vocabulary drill exercises using these Turkish words:
         
         Vocabulary List:
-        {json.dumps(vocab_data, indent=2)}
+        {fit_items(vocab_data, budget_for("practice.generate-vocabulary-drills").context_tokens,
+                   summary_fields=("turkish", "english"), noun="words")}
         
         Drill Types: {', '.join(drill_types)}
         Difficulty Level: {difficulty_level}
@@ -234,28 +185,27 @@ async def generate_vocabulary_drills(
             ],
             "drill_summary": {{
                 "vocabulary_covered": {len(vocabulary_list)},
-                "drill_types_used": {drill_types},
+                "drill_types_used": {compact_json(drill_types)},
                 "total_time": {count * 2}
             }}
         }}
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert in vocabulary acquisition and drill design for Turkish language learning."},
-                {"role": "user", "content": prompt}
-            ],
+        response = await client.chat.completions.create(**chat_params(
+            "practice.generate-vocabulary-drills",
+            "You are an expert in vocabulary acquisition and drill design for Turkish language learning.",
+            prompt,
             temperature=0.6,
-            max_tokens=2500
-        )
+            items={'drills': count}
+        ))
         
         # Parse the response
         content = response.choices[0].message.content
         
-        try:
-            drills_data = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content)
+        if parsed.ok:
+            drills_data = parsed.data
+        else:
             # Create basic drills if parsing fails
             drills_data = {
                 "drills": [
@@ -300,18 +250,12 @@ async def generate_grammar_exercises(
     grammar_rules: List[GrammarRule],
     exercise_types: List[str],
     difficulty_level: CEFRLevel,
-    count: int = 8
+    count: int = 8,
+    client: AsyncOpenAI = Depends(get_openai_client)
 ):
     """Generate grammar-specific practice exercises"""
     
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-            
-        client = OpenAI(api_key=api_key)
-        
         # Prepare grammar data
         grammar_data = []
         for rule in grammar_rules:
@@ -326,7 +270,8 @@ async def generate_grammar_exercises(
         Create {count} grammar practice exercises based on these Turkish grammar rules:
         
         Grammar Rules:
-        {json.dumps(grammar_data, indent=2)}
+        {fit_items(grammar_data, budget_for("practice.generate-grammar-exercises").context_tokens,
+                   summary_fields=("title", "category", "examples"), noun="rules")}
         
         Exercise Types: {', '.join(exercise_types)}
         Difficulty Level: {difficulty_level}
@@ -366,28 +311,27 @@ async def generate_grammar_exercises(
             ],
             "exercise_summary": {{
                 "grammar_rules_covered": {len(grammar_rules)},
-                "exercise_types_used": {exercise_types},
+                "exercise_types_used": {compact_json(exercise_types)},
                 "total_time": {count * 4}
             }}
         }}
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert Turkish grammar instructor. Create clear, effective grammar exercises."},
-                {"role": "user", "content": prompt}
-            ],
+        response = await client.chat.completions.create(**chat_params(
+            "practice.generate-grammar-exercises",
+            "You are an expert Turkish grammar instructor. Create clear, effective grammar exercises.",
+            prompt,
             temperature=0.5,
-            max_tokens=2500
-        )
+            items={'exercises': count}
+        ))
         
         # Parse the response
         content = response.choices[0].message.content
         
-        try:
-            exercises_data = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content)
+        if parsed.ok:
+            exercises_data = parsed.data
+        else:
             # Create basic exercises if parsing fails
             exercises_data = {
                 "exercises": [
@@ -427,3 +371,97 @@ async def generate_grammar_exercises(
     except Exception as e:
         print(f"Error in grammar exercise generation: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Grammar exercise generation failed: {str(e)}")
+
+def _practice_exercise_params(request: ExerciseGenerationRequest) -> Dict[str, Any]:
+    """Chat completion parameters for a set of practice exercises"""
+
+    prompt = f"""
+    Generate {request.count} practice exercises for Turkish language learning based on:
+
+    Lesson Content:
+    {fit_text(request.lesson_content, budget_for("practice.generate-practice-exercises").context_tokens)}
+
+    Exercise Requirements:
+    - Types: {', '.join(request.exercise_types)}
+    - Difficulty Level: {request.difficulty_level.value}
+    - Student Weak Areas: {', '.join(request.student_weak_areas)}
+    - Count: {request.count}
+
+    Create diverse, engaging exercises that:
+    1. Reinforce the lesson content
+    2. Address student weak areas
+    3. Are appropriate for the difficulty level
+    4. Include clear instructions and feedback
+    5. Provide meaningful practice opportunities
+
+    Available exercise types:
+    - multiple_choice: Multiple choice questions
+    - fill_in_blank: Fill in the missing words
+    - matching: Match Turkish words with English translations
+    - sentence_building: Build sentences from given words
+    - translation: Translate sentences between Turkish and English
+    - pronunciation: Pronunciation practice exercises
+    - listening_comprehension: Audio-based exercises
+    - reading_comprehension: Reading passages with questions
+    - grammar_practice: Grammar rule application
+    - vocabulary_drill: Vocabulary memorization and recall
+
+    Format the response as JSON:
+    {{
+        "exercises": [
+            {{
+                "type": "exercise_type",
+                "title": "exercise title",
+                "instructions": "clear instructions for the student",
+                "content": {{
+                    "question": "main question or prompt",
+                    "options": ["option1", "option2", "option3", "option4"],
+                    "context": "additional context if needed",
+                    "audio_url": "optional audio file URL",
+                    "image_url": "optional image URL"
+                }},
+                "correct_answers": {{
+                    "answer": "correct answer",
+                    "alternatives": ["alternative1", "alternative2"],
+                    "explanation": "why this is correct"
+                }},
+                "hints": ["hint1", "hint2", ...],
+                "difficulty_level": "{request.difficulty_level.value}",
+                "estimated_time": 3,
+                "skill_focus": ["vocabulary", "grammar", "reading"],
+                "feedback": {{
+                    "correct": "positive feedback for correct answer",
+                    "incorrect": "helpful feedback for incorrect answer"
+                }}
+            }},
+            ...
+        ],
+        "exercise_summary": {{
+            "total_exercises": {request.count},
+            "skill_distribution": {{"vocabulary": 40, "grammar": 30, "reading": 30}},
+            "difficulty_progression": "description of how exercises progress",
+            "estimated_total_time": 15
+        }}
+    }}
+
+    Focus especially on: {', '.join(request.student_weak_areas)}
+    """
+
+    return chat_params(
+        "practice.generate-practice-exercises",
+        "You are an expert Turkish language exercise designer. Create engaging, educational practice exercises that help students improve their skills.",
+        prompt,
+        temperature=0.7,
+        items={'exercises': request.count}
+    )
+
+def _practice_exercise_schemas(request: ExerciseGenerationRequest) -> Dict[Tuple[str, ...], ItemSchema]:
+    """Checks for the exercises of a practice exercise completion"""
+    return {
+        ('exercises',): ItemSchema(PracticeExercise, defaults={
+            'difficulty_level': request.difficulty_level,
+            'hints': [],
+            'skill_focus': [],
+            'estimated_time': 3
+        })
+    }
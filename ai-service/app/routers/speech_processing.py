@@ -1,4 +1,4 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
 from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 import aiofiles
@@ -7,11 +7,12 @@ import uuid
 import io
 import base64
 from typing import Optional, List, Dict, Any
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from app.core.config import settings
 from app.services.speech_processor import SpeechProcessor, PronunciationScore
 from app.models.content import CEFRLevel
+from app.services.llm_client import get_openai_client
 
 router = APIRouter()
 
@@ -299,7 +300,8 @@ async def text_to_speech(
     text: str = Query(..., description="Text to convert to speech"),
     language: str = Query("tr", description="Language code (tr for Turkish)"),
     voice: str = Query("alloy", description="Voice to use for TTS"),
-    speed: float = Query(1.0, ge=0.25, le=4.0, description="Speech speed (0.25 to 4.0)")
+    speed: float = Query(1.0, ge=0.25, le=4.0, description="Speech speed (0.25 to 4.0)"),
+    client: AsyncOpenAI = Depends(get_openai_client)
 ):
     """Convert text to speech using OpenAI TTS API"""
 
@@ -311,14 +313,8 @@ async def text_to_speech(
         if len(text) > 4096:
             raise HTTPException(status_code=400, detail="Text too long (max 4096 characters)")
 
-        # Initialize OpenAI client
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        if not client.api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-
         # Generate speech using OpenAI TTS
-        response = client.audio.speech.create(
+        response = await client.audio.speech.create(
             model="tts-1",
             voice=voice,
             input=text,
@@ -377,7 +373,8 @@ async def get_audio_file(filename: str):
 async def speech_to_text(
     audio_file: UploadFile = File(..., description="Audio file to transcribe"),
     language: str = Query("tr", description="Language code (tr for Turkish)"),
-    model: str = Query("whisper-1", description="Whisper model to use")
+    model: str = Query("whisper-1", description="Whisper model to use"),
+    client: AsyncOpenAI = Depends(get_openai_client)
 ):
     """Convert speech to text using OpenAI Whisper API"""
 
@@ -386,12 +383,6 @@ async def speech_to_text(
         if not audio_file.content_type.startswith('audio/'):
             raise HTTPException(status_code=400, detail="File must be an audio file")
 
-        # Initialize OpenAI client
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        if not client.api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-
         # Save uploaded file temporarily
         temp_filename = f"temp_{uuid.uuid4()}_{audio_file.filename}"
         temp_path = f"./uploads/{temp_filename}"
@@ -406,7 +397,7 @@ async def speech_to_text(
 
         # Transcribe using Whisper
         with open(temp_path, "rb") as audio:
-            transcript = client.audio.transcriptions.create(
+            transcript = await client.audio.transcriptions.create(
                 model=model,
                 file=audio,
                 language=language
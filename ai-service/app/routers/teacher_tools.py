@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
-import os
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Tuple
 import json
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from app.models.content import (
     TeacherLessonRequest,
@@ -13,117 +13,44 @@ from app.models.content import (
     GrammarRule,
     Exercise
 )
+from app.services.llm_cache import cached_chat_completion
+from app.services.llm_client import get_openai_client
+from app.services.llm_json import ItemSchema, parse_llm_json
+from app.services.llm_stream import SSE_HEADERS, sse_json_generation, stream_chat_completion
+from app.services.prompt_budget import chat_params
 
 router = APIRouter()
 
+# Arrays of the teacher lesson document whose items are sent as soon as they are streamed
+TEACHER_LESSON_STREAM_SECTIONS = {
+    ('lesson', 'vocabulary'): 'vocabulary',
+    ('lesson', 'grammar_rules'): 'grammar_rules',
+    ('lesson', 'exercises'): 'exercises'
+}
+
 @router.post("/create-lesson")
-async def create_teacher_lesson(request: TeacherLessonRequest):
+async def create_teacher_lesson(
+    request: TeacherLessonRequest,
+    force_fresh: bool = False,  # skip the response cache and regenerate
+    client: AsyncOpenAI = Depends(get_openai_client)
+):
     """Create a comprehensive lesson based on teacher specifications"""
     
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-            
-        client = OpenAI(api_key=api_key)
-        
-        # Create detailed lesson generation prompt
-        prompt = f"""
-        Create a comprehensive Turkish language lesson based on these teacher specifications:
-        
-        Lesson Requirements:
-        - Title: {request.title}
-        - Topic: {request.topic}
-        - Target Level: {request.target_level}
-        - Lesson Type: {request.lesson_type}
-        - Duration: {request.duration_minutes} minutes
-        - Learning Objectives: {', '.join(request.learning_objectives)}
-        
-        Content Requirements:
-        - Include Exercises: {request.include_exercises} (Count: {request.exercise_count})
-        - Include Vocabulary: {request.include_vocabulary} (Count: {request.vocabulary_count})
-        - Include Grammar: {request.include_grammar}
-        - Cultural Context: {request.cultural_context}
-        
-        Create a detailed, professional lesson that:
-        1. Meets all specified requirements
-        2. Is pedagogically sound and engaging
-        3. Includes clear learning objectives and outcomes
-        4. Provides structured content progression
-        5. Includes assessment opportunities
-        6. Is appropriate for the target CEFR level
-        
-        Format the response as JSON:
-        {{
-            "lesson": {{
-                "title": "{request.title}",
-                "description": "comprehensive lesson description",
-                "objectives": {request.learning_objectives},
-                "content_structure": {{
-                    "introduction": "lesson introduction content",
-                    "main_content": "detailed main lesson content",
-                    "practice_activities": "practice activities description",
-                    "conclusion": "lesson wrap-up and review"
-                }},
-                "vocabulary": [
-                    {{"turkish": "word", "english": "translation", "pronunciation": "phonetic", "usage_example": "example sentence"}},
-                    ...
-                ],
-                "grammar_rules": [
-                    {{"rule": "grammar rule", "explanation": "detailed explanation", "examples": ["example1", "example2"], "practice_tips": "tips for practice"}},
-                    ...
-                ],
-                "exercises": [
-                    {{
-                        "type": "exercise_type",
-                        "title": "exercise title",
-                        "instructions": "clear instructions",
-                        "content": {{"question": "question", "options": ["opt1", "opt2", "opt3", "opt4"]}},
-                        "correct_answer": "correct answer",
-                        "explanation": "why this is correct",
-                        "difficulty": "{request.target_level}",
-                        "estimated_time": 3
-                    }},
-                    ...
-                ],
-                "cultural_notes": ["cultural note1", "cultural note2", ...],
-                "teaching_tips": ["tip1", "tip2", ...],
-                "assessment_methods": ["method1", "method2", ...],
-                "homework_suggestions": ["suggestion1", "suggestion2", ...],
-                "additional_resources": ["resource1", "resource2", ...]
-            }},
-            "lesson_metadata": {{
-                "estimated_duration": {request.duration_minutes},
-                "difficulty_level": "{request.target_level}",
-                "lesson_type": "{request.lesson_type}",
-                "skill_focus": ["vocabulary", "grammar", "reading", "speaking"],
-                "preparation_time": "15 minutes",
-                "materials_needed": ["whiteboard", "handouts", "audio equipment"]
-            }}
-        }}
-        
-        Ensure the lesson is comprehensive, engaging, and meets professional teaching standards.
-        """
-        
         print("Creating teacher lesson with GPT-4...")
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert Turkish language curriculum designer and teacher trainer. Create professional, comprehensive lessons that meet educational standards."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.6,
-            max_tokens=4000
+        response = await cached_chat_completion(
+            client, "teacher.create-lesson", force_fresh,
+            **_teacher_lesson_params(request)
         )
         print("Teacher lesson creation completed successfully")
         
         # Parse the response
         content = response.choices[0].message.content
         
-        try:
-            lesson_data = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content, required=('lesson',), sections=_teacher_lesson_schemas(request))
+        if parsed.ok:
+            lesson_data = parsed.data
+        else:
             # Create structured lesson if parsing fails
             lesson_data = {
                 "lesson": {
@@ -170,24 +97,46 @@ async def create_teacher_lesson(request: TeacherLessonRequest):
         print(f"Error in teacher lesson creation: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Teacher lesson creation failed: {str(e)}")
 
+@router.post("/create-lesson/stream")
+async def stream_teacher_lesson(
+    request: TeacherLessonRequest,
+    force_fresh: bool = False,  # skip the response cache and regenerate
+    client: AsyncOpenAI = Depends(get_openai_client)
+):
+    """Create a lesson to teacher specifications, streaming tokens and finished items as server-sent events"""
+    
+    deltas = stream_chat_completion(
+        client, "teacher.create-lesson", force_fresh,
+        **_teacher_lesson_params(request)
+    )
+    metadata = {
+        "title": request.title,
+        "topic": request.topic,
+        "target_level": request.target_level,
+        "lesson_type": request.lesson_type,
+        "duration_minutes": request.duration_minutes
+    }
+    return StreamingResponse(
+        sse_json_generation(
+            deltas, TEACHER_LESSON_STREAM_SECTIONS, metadata,
+            schemas=_teacher_lesson_schemas(request), required=('lesson',)
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.post("/generate-lesson-plan")
 async def generate_lesson_plan(
     topic: str,
     target_level: CEFRLevel,
     duration_minutes: int,
     class_size: int = 20,
-    student_needs: List[str] = None
+    student_needs: List[str] = None,
+    client: AsyncOpenAI = Depends(get_openai_client)
 ):
     """Generate a detailed lesson plan for teachers"""
     
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-            
-        client = OpenAI(api_key=api_key)
-        
         student_needs_str = ', '.join(student_needs) if student_needs else "general language learning"
         
         prompt = f"""
@@ -275,22 +224,20 @@ async def generate_lesson_plan(
         }}
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert Turkish language teacher trainer. Create detailed, practical lesson plans that teachers can implement effectively."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5,
-            max_tokens=3000
-        )
+        response = await client.chat.completions.create(**chat_params(
+            "teacher.generate-lesson-plan",
+            "You are an expert Turkish language teacher trainer. Create detailed, practical lesson plans that teachers can implement effectively.",
+            prompt,
+            temperature=0.5
+        ))
         
         # Parse the response
         content = response.choices[0].message.content
         
-        try:
-            plan_data = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content)
+        if parsed.ok:
+            plan_data = parsed.data
+        else:
             # Create basic lesson plan if parsing fails
             plan_data = {
                 "lesson_plan": {
@@ -360,18 +307,12 @@ async def suggest_teaching_strategies(
     lesson_type: LessonType,
     target_level: CEFRLevel,
     student_challenges: List[str],
-    class_context: str = "general"
+    class_context: str = "general",
+    client: AsyncOpenAI = Depends(get_openai_client)
 ):
     """Suggest effective teaching strategies for specific contexts"""
     
     try:
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-            
-        client = OpenAI(api_key=api_key)
-        
         prompt = f"""
         Suggest effective teaching strategies for Turkish language instruction:
         
@@ -403,22 +344,20 @@ async def suggest_teaching_strategies(
         }}
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert Turkish language pedagogy specialist. Provide practical, evidence-based teaching strategies."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.4,
-            max_tokens=2000
-        )
+        response = await client.chat.completions.create(**chat_params(
+            "teacher.suggest-teaching-strategies",
+            "You are an expert Turkish language pedagogy specialist. Provide practical, evidence-based teaching strategies.",
+            prompt,
+            temperature=0.4
+        ))
         
         # Parse the response
         content = response.choices[0].message.content
         
-        try:
-            strategies_data = json.loads(content)
-        except json.JSONDecodeError:
+        parsed = parse_llm_json(content)
+        if parsed.ok:
+            strategies_data = parsed.data
+        else:
             # Create basic strategies if parsing fails
             strategies_data = {
                 "strategies": {
@@ -451,3 +390,106 @@ async def suggest_teaching_strategies(
     except Exception as e:
         print(f"Error in teaching strategy suggestion: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Teaching strategy suggestion failed: {str(e)}")
+
+def _teacher_lesson_params(request: TeacherLessonRequest) -> Dict[str, Any]:
+    """Chat completion parameters for a lesson built to teacher specifications"""
+
+    prompt = f"""
+    Create a comprehensive Turkish language lesson based on these teacher specifications:
+
+    Lesson Requirements:
+    - Title: {request.title}
+    - Topic: {request.topic}
+    - Target Level: {request.target_level.value}
+    - Lesson Type: {request.lesson_type.value}
+    - Duration: {request.duration_minutes} minutes
+    - Learning Objectives: {', '.join(request.learning_objectives)}
+
+    Content Requirements:
+    - Include Exercises: {request.include_exercises} (Count: {request.exercise_count})
+    - Include Vocabulary: {request.include_vocabulary} (Count: {request.vocabulary_count})
+    - Include Grammar: {request.include_grammar}
+    - Cultural Context: {request.cultural_context}
+
+    Create a detailed, professional lesson that:
+    1. Meets all specified requirements
+    2. Is pedagogically sound and engaging
+    3. Includes clear learning objectives and outcomes
+    4. Provides structured content progression
+    5. Includes assessment opportunities
+    6. Is appropriate for the target CEFR level
+
+    Format the response as JSON:
+    {{
+        "lesson": {{
+            "title": "{request.title}",
+            "description": "comprehensive lesson description",
+            "objectives": {json.dumps(request.learning_objectives, ensure_ascii=False)},
+            "content_structure": {{
+                "introduction": "lesson introduction content",
+                "main_content": "detailed main lesson content",
+                "practice_activities": "practice activities description",
+                "conclusion": "lesson wrap-up and review"
+            }},
+            "vocabulary": [
+                {{"turkish": "word", "english": "translation", "pronunciation": "phonetic", "usage_example": "example sentence"}},
+                ...
+            ],
+            "grammar_rules": [
+                {{"rule": "grammar rule", "explanation": "detailed explanation", "examples": ["example1", "example2"], "practice_tips": "tips for practice"}},
+                ...
+            ],
+            "exercises": [
+                {{
+                    "type": "exercise_type",
+                    "title": "exercise title",
+                    "instructions": "clear instructions",
+                    "content": {{"question": "question", "options": ["opt1", "opt2", "opt3", "opt4"]}},
+                    "correct_answer": "correct answer",
+                    "explanation": "why this is correct",
+                    "difficulty": "{request.target_level.value}",
+                    "estimated_time": 3
+                }},
+                ...
+            ],
+            "cultural_notes": ["cultural note1", "cultural note2", ...],
+            "teaching_tips": ["tip1", "tip2", ...],
+            "assessment_methods": ["method1", "method2", ...],
+            "homework_suggestions": ["suggestion1", "suggestion2", ...],
+            "additional_resources": ["resource1", "resource2", ...]
+        }},
+        "lesson_metadata": {{
+            "estimated_duration": {request.duration_minutes},
+            "difficulty_level": "{request.target_level.value}",
+            "lesson_type": "{request.lesson_type.value}",
+            "skill_focus": ["vocabulary", "grammar", "reading", "speaking"],
+            "preparation_time": "15 minutes",
+            "materials_needed": ["whiteboard", "handouts", "audio equipment"]
+        }}
+    }}
+
+    Ensure the lesson is comprehensive, engaging, and meets professional teaching standards.
+    """
+
+    return chat_params(
+        "teacher.create-lesson",
+        "You are an expert Turkish language curriculum designer and teacher trainer. Create professional, comprehensive lessons that meet educational standards.",
+        prompt,
+        temperature=0.6,
+        items={
+            'vocabulary': request.vocabulary_count if request.include_vocabulary else 0,
+            'grammar_rules': 3 if request.include_grammar else 0,
+            'exercises': request.exercise_count if request.include_exercises else 0
+        }
+    )
+
+def _teacher_lesson_schemas(request: TeacherLessonRequest) -> Dict[Tuple[str, ...], ItemSchema]:
+    """Checks for the vocabulary and grammar items of a teacher lesson completion"""
+    return {
+        ('lesson', 'vocabulary'): ItemSchema(VocabularyItem, defaults={'difficulty_level': request.target_level}),
+        ('lesson', 'grammar_rules'): ItemSchema(
+            GrammarRule,
+            defaults={'difficulty_level': request.target_level, 'category': request.lesson_type.value},
+            aliases={'title': 'rule'}
+        )
+    }
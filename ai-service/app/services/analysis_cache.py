@@ -0,0 +1,144 @@
+"""
+Analysis Result Cache
+Memoizes text analysis results by content hash in an in-process LRU with an optional Redis tier
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different copies share a cache entry"""
+    return WHITESPACE_PATTERN.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+def content_key(operation: str, text: str, version: str, params: Tuple = ()) -> str:
+    """Cache key from the operation, analyzer version, parameters and normalized text hash"""
+    digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+    param_part = ':'.join(str(param) for param in params)
+    return f"analysis:{operation}:{version}:{param_part}:{digest}"
+
+
+class AnalysisCache:
+    """Size-bounded LRU of analysis results, optionally backed by a shared Redis tier
+
+    The LRU holds decoded Python objects so a local hit costs a dict lookup. The Redis
+    tier stores JSON produced by the caller's ``encode`` function and is shared between
+    workers; Redis errors are counted and otherwise ignored.
+    """
+
+    def __init__(self, max_entries: int = 1024, redis_url: Optional[str] = None,
+                 ttl_seconds: int = 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._redis = None
+        if redis_url and REDIS_AVAILABLE:
+            self._redis = aioredis.from_url(redis_url)
+
+        self.hits = 0
+        self.misses = 0
+        self.redis_hits = 0
+        self.redis_errors = 0
+        self.evictions = 0
+
+    async def get(self, key: str, decode: Callable[[Any], Any] = None) -> Optional[Any]:
+        """Return the cached value for ``key``, or None (counted as a miss)"""
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        if self._redis is not None:
+            cached = await self._redis_get(key)
+            if cached is not None:
+                value = decode(cached) if decode else cached
+                self.redis_hits += 1
+                self._store(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, value: Any, encode: Callable[[Any], Any] = None):
+        """Store a computed value in every tier"""
+        self._store(key, value)
+        if self._redis is not None:
+            await self._redis_set(key, encode(value) if encode else value)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                             encode: Callable[[Any], Any] = None,
+                             decode: Callable[[Any], Any] = None) -> Any:
+        """Return the cached value for ``key`` or compute, store and return it"""
+
+        value = await self.get(key, decode)
+        if value is None:
+            value = await compute()
+            await self.put(key, value, encode)
+        return value
+
+    def _store(self, key: str, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _redis_get(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self._redis.get(key)
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            self.redis_errors += 1
+            print(f"Analysis cache Redis read failed: {e}")
+            return None
+
+    async def _redis_set(self, key: str, payload: Any):
+        try:
+            await self._redis.set(key, json.dumps(payload, ensure_ascii=False), ex=self.ttl_seconds)
+        except Exception as e:
+            self.redis_errors += 1
+            print(f"Analysis cache Redis write failed: {e}")
+
+    def clear(self):
+        """Drop all in-process entries"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and eviction counters"""
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'redis_hits': self.redis_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'redis_enabled': self._redis is not None,
+            'redis_errors': self.redis_errors,
+            'hit_rate': (self.hits + self.redis_hits) / lookups if lookups else 0.0
+        }
+
+
+def create_analysis_cache() -> AnalysisCache:
+    """Build the analysis cache from settings"""
+    return AnalysisCache(
+        max_entries=settings.ANALYSIS_CACHE_SIZE,
+        redis_url=settings.REDIS_URL if settings.ANALYSIS_CACHE_REDIS else None,
+        ttl_seconds=settings.ANALYSIS_CACHE_TTL
+    )
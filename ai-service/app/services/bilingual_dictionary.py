@@ -0,0 +1,279 @@
+"""
+Memory-Mapped Turkish-English Dictionary
+Compiles curriculum vocabulary and imported word lists into a hashed binary file that is
+searched in place through mmap, so every worker shares the same pages
+
+Build manually: python -m app.services.bilingual_dictionary [--wordlist FILE ...] [--output PATH]
+"""
+
+import argparse
+import csv
+import glob
+import json
+import mmap
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.text_document import turkish_lower
+
+MAGIC = b'TRENDIC2'
+HEADER = struct.Struct('<8sII')         # magic, entry count, hash slot count (power of two)
+RECORD = struct.Struct('<IIII')         # key offset, key length, value offset, value length
+SLOT = struct.Struct('<I')              # record index + 1, 0 for an empty slot
+FIELD_SEPARATOR = '\x1f'
+
+
+@dataclass(frozen=True)
+class DictionaryEntry:
+    turkish: str
+    english: str
+    pronunciation: Optional[str] = None
+    example: Optional[str] = None
+
+
+class BilingualDictionary:
+    """Read-only Turkish -> English dictionary backed by a compiled, memory-mapped file
+
+    The file holds fixed-width records sorted by UTF-8 key, an open-addressing hash table
+    of record indices keyed by CRC32, and a string blob. A lookup hashes the key and
+    probes the table in place (O(1) expected, the table is at most half full), so opening
+    the dictionary costs no parsing and all workers share the OS page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as dictionary_file:
+            self._buffer = mmap.mmap(dictionary_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._count, self._slots = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            self._buffer.close()
+            raise ValueError(f"{path} is not a compiled dictionary")
+        self._table_start = HEADER.size + self._count * RECORD.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, word: str) -> bool:
+        return self._find(word) is not None
+
+    def _find(self, word: str) -> Optional[Tuple[int, int, int, int]]:
+        """Record of a word, found by linear probing from its hash slot"""
+        key = turkish_lower(word.strip()).encode('utf-8')
+        buffer = self._buffer
+        mask = self._slots - 1
+        slot = zlib.crc32(key) & mask
+
+        while True:
+            (entry,) = SLOT.unpack_from(buffer, self._table_start + slot * SLOT.size)
+            if entry == 0:
+                return None
+            record = RECORD.unpack_from(buffer, HEADER.size + (entry - 1) * RECORD.size)
+            key_offset, key_length = record[0], record[1]
+            if key_length == len(key) and buffer[key_offset:key_offset + key_length] == key:
+                return record
+            slot = (slot + 1) & mask
+
+    def lookup(self, word: str) -> Optional[DictionaryEntry]:
+        """Entry for a word or phrase, or None if it is not in the dictionary"""
+        record = self._find(word)
+        if record is None:
+            return None
+
+        key_offset, key_length, value_offset, value_length = record
+        turkish = self._buffer[key_offset:key_offset + key_length].decode('utf-8')
+        english, pronunciation, example = (
+            self._buffer[value_offset:value_offset + value_length].decode('utf-8').split(FIELD_SEPARATOR)
+        )
+        return DictionaryEntry(turkish, english, pronunciation or None, example or None)
+
+    def close(self):
+        self._buffer.close()
+
+
+def compile_dictionary(entries: Iterable[DictionaryEntry], output_path: str) -> int:
+    """Write entries to ``output_path`` in the binary format
+
+    The first entry for a word keeps its translation; later ones only fill in a missing
+    pronunciation or example.
+    """
+
+    unique: Dict[bytes, DictionaryEntry] = {}
+    for entry in entries:
+        key = turkish_lower(entry.turkish.strip()).encode('utf-8')
+        if not key or not entry.english:
+            continue
+        current = unique.get(key)
+        if current is None:
+            unique[key] = entry
+        else:
+            unique[key] = DictionaryEntry(
+                turkish=current.turkish,
+                english=current.english,
+                pronunciation=current.pronunciation or entry.pronunciation,
+                example=current.example or entry.example
+            )
+
+    keys = sorted(unique)
+    slots = 1
+    while slots < 2 * len(keys):
+        slots *= 2
+
+    table = [0] * slots
+    for index, key in enumerate(keys):
+        slot = zlib.crc32(key) & (slots - 1)
+        while table[slot]:
+            slot = (slot + 1) & (slots - 1)
+        table[slot] = index + 1
+
+    blob = bytearray()
+    records = []
+    blob_start = HEADER.size + len(keys) * RECORD.size + slots * SLOT.size
+
+    for key in keys:
+        entry = unique[key]
+        value = FIELD_SEPARATOR.join(
+            (field or '').replace(FIELD_SEPARATOR, ' ').strip()
+            for field in (entry.english, entry.pronunciation, entry.example)
+        ).encode('utf-8')
+
+        key_offset = blob_start + len(blob)
+        blob += key
+        value_offset = blob_start + len(blob)
+        blob += value
+        records.append(RECORD.pack(key_offset, len(key), value_offset, len(value)))
+
+    # Write to a temporary file and rename, so readers never map a half-written file
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as output_file:
+        output_file.write(HEADER.pack(MAGIC, len(keys), slots))
+        output_file.write(b''.join(records))
+        output_file.write(struct.pack(f'<{slots}I', *table))
+        output_file.write(blob)
+    os.replace(temp_path, output_path)
+
+    return len(keys)
+
+
+def curriculum_entries(data_dir: str) -> Iterator[DictionaryEntry]:
+    """Entries with both Turkish and English text from the inventory and lesson files"""
+
+    paths = [os.path.join(data_dir, 'vocabulary_grammar_inventory.json')]
+    paths += sorted(glob.glob(os.path.join(data_dir, 'curriculum_content', '*.json')))
+
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as data_file:
+                data = json.load(data_file)
+        except (OSError, ValueError) as e:
+            print(f"Skipping dictionary source {path}: {e}")
+            continue
+        yield from _find_translations(data)
+
+
+def _find_translations(node) -> Iterator[DictionaryEntry]:
+    if isinstance(node, dict):
+        turkish, english = node.get('turkish'), node.get('english')
+        if isinstance(turkish, str) and isinstance(english, str):
+            pronunciation = node.get('pronunciation')
+            example = node.get('example')
+            yield DictionaryEntry(
+                turkish=turkish,
+                english=english,
+                pronunciation=pronunciation if isinstance(pronunciation, str) else None,
+                example=example if isinstance(example, str) else None
+            )
+        for value in node.values():
+            yield from _find_translations(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _find_translations(item)
+
+
+def wordlist_entries(path: str) -> Iterator[DictionaryEntry]:
+    """Entries from a tab- or comma-separated word list: turkish, english[, pronunciation]
+
+    Lines starting with '#' are comments.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as wordlist_file:
+        sample = wordlist_file.readline()
+        wordlist_file.seek(0)
+        delimiter = '\t' if '\t' in sample else ','
+        for row in csv.reader(wordlist_file, delimiter=delimiter):
+            if len(row) < 2 or row[0].lstrip().startswith('#'):
+                continue
+            yield DictionaryEntry(
+                turkish=row[0],
+                english=row[1].strip(),
+                pronunciation=row[2].strip() if len(row) > 2 else None
+            )
+
+
+def build_dictionary(output_path: str, data_dir: Optional[str], wordlists: Iterable[str] = ()) -> int:
+    """Compile curriculum vocabulary plus word lists; curated curriculum entries take precedence"""
+
+    def entries():
+        if data_dir:
+            yield from curriculum_entries(data_dir)
+        for wordlist in wordlists:
+            yield from wordlist_entries(wordlist)
+
+    return compile_dictionary(entries(), output_path)
+
+
+def _source_paths(data_dir: Optional[str], wordlists: List[str]) -> List[str]:
+    paths = list(wordlists)
+    if data_dir:
+        paths.append(os.path.join(data_dir, 'vocabulary_grammar_inventory.json'))
+        paths += glob.glob(os.path.join(data_dir, 'curriculum_content', '*.json'))
+    return [path for path in paths if os.path.exists(path)]
+
+
+def _configured_wordlists() -> List[str]:
+    return [path.strip() for path in settings.DICTIONARY_WORDLISTS.split(',') if path.strip()]
+
+
+def load_dictionary() -> Tuple[BilingualDictionary, str]:
+    """Open the configured dictionary, (re)compiling it when missing, outdated or older than a source"""
+
+    path = settings.DICTIONARY_PATH
+    wordlists = _configured_wordlists()
+    sources = _source_paths(settings.CURRICULUM_DATA_DIR, wordlists)
+
+    stale = not os.path.exists(path) or any(
+        os.path.getmtime(source) > os.path.getmtime(path) for source in sources
+    )
+    if not stale:
+        try:
+            dictionary = BilingualDictionary(path)
+            return dictionary, f"{len(dictionary)} entries"
+        except ValueError:
+            print(f"{path} was written in an older format, recompiling")
+
+    count = build_dictionary(path, settings.CURRICULUM_DATA_DIR, wordlists)
+    print(f"Compiled bilingual dictionary with {count} entries to {path}")
+
+    dictionary = BilingualDictionary(path)
+    return dictionary, f"{len(dictionary)} entries"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the Turkish-English dictionary")
+    parser.add_argument("--output", default=settings.DICTIONARY_PATH)
+    parser.add_argument("--data-dir", default=settings.CURRICULUM_DATA_DIR)
+    parser.add_argument("--wordlist", action="append", default=None,
+                        help="extra TSV/CSV word list (turkish, english[, pronunciation]); repeatable")
+    args = parser.parse_args()
+
+    wordlists = args.wordlist if args.wordlist is not None else _configured_wordlists()
+    count = build_dictionary(args.output, args.data_dir, wordlists)
+    print(f"Compiled {count} entries to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,45 @@ CEFR Level Analyzer for Turkish Language Content
 Implements comprehensive CEFR level classification and difficulty assessment
 """
 
+import asyncio
+import os
 import re
-from typing import Dict, List, Tuple, Set
-from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Tuple, Set
+from collections import Counter, deque
 from app.models.content import CEFRLevel
+from app.core.config import settings
+from app.services.text_document import SENTENCE_TERMINATORS, TokenizedDocument
+from app.services.cpu_executor import cpu_executor, run_cpu_bound
+from app.services.pattern_matcher import ConnectorMatcher, GrammarPatternMatcher
+from app.services.lexicon_index import get_lexicon_index
+from app.services.turkish_stemmer import get_stemmer
 
-try:
-    import spacy
-    import nltk
-    from nltk.tokenize import sent_tokenize, word_tokenize
-    SPACY_AVAILABLE = True
-    NLTK_AVAILABLE = True
-except ImportError:
-    SPACY_AVAILABLE = False
-    NLTK_AVAILABLE = False
+# Bump whenever analysis output changes so cached results are not reused
+ANALYZER_VERSION = "5"
+
+# Raw metric values that normalize to 1.0 in the combined score
+SENTENCE_LENGTH_SCALE = 25
+LEVEL_SCALE = 6
+
+# Weights of the normalized metrics in the combined complexity score
+SCORE_WEIGHTS = {
+    'sentence': 0.25,
+    'vocabulary': 0.35,
+    'grammar': 0.25,
+    'structure': 0.15
+}
+
+# Highest combined score of each level (C2 takes everything above) and its confidence
+LEVEL_THRESHOLDS = [
+    (CEFRLevel.A1, 0.15, 0.9),
+    (CEFRLevel.A2, 0.3, 0.85),
+    (CEFRLevel.B1, 0.5, 0.8),
+    (CEFRLevel.B2, 0.7, 0.75),
+    (CEFRLevel.C1, 0.85, 0.7),
+    (CEFRLevel.C2, None, 0.65)
+]
 
 
 class CEFRAnalyzer:
@@ -55,51 +80,136 @@ class CEFRAnalyzer:
             }
         }
         
-        # Grammar complexity patterns
+        # Word -> level index over the lists above plus the curriculum vocabulary
+        self.lexicon = get_lexicon_index(self.cefr_vocabulary, settings.CURRICULUM_DATA_DIR)
+        
+        # Suffix stripper so inflected forms (arkadaşlarımızla) resolve to lexicon entries
+        self.stemmer = get_stemmer()
+        
+        # Grammar complexity patterns: (first word, second word) regexes of adjacent word pairs
         self.grammar_patterns = {
             CEFRLevel.A1: [
-                r'\b(ben|sen|o)\s+\w+\b',  # Simple subject-verb
-                r'\b\w+\s+(var|yok)\b',    # Existence
+                (r'ben|sen|o', r'\w+'),   # Simple subject-verb
+                (r'\w+', r'var|yok'),     # Existence
             ],
             CEFRLevel.A2: [
-                r'\b\w+\s+\w+yor\b',       # Present continuous
-                r'\b\w+\s+\w+di\b',        # Past tense
+                (r'\w+', r'\w+yor'),      # Present continuous
+                (r'\w+', r'\w+di'),       # Past tense
             ],
             CEFRLevel.B1: [
-                r'\b\w+\s+\w+ecek\b',      # Future tense
-                r'\b\w+\s+\w+se\b',        # Conditional
+                (r'\w+', r'\w+ecek'),     # Future tense
+                (r'\w+', r'\w+se'),       # Conditional
             ],
             CEFRLevel.B2: [
-                r'\b\w+\s+\w+mış\b',       # Evidential
-                r'\b\w+\s+\w+ken\b',       # While/when
+                (r'\w+', r'\w+mış'),      # Evidential
+                (r'\w+', r'\w+ken'),      # While/when
             ],
             CEFRLevel.C1: [
-                r'\b\w+\s+\w+meli\b',      # Necessity
-                r'\b\w+\s+\w+bilir\b',     # Ability/possibility
+                (r'\w+', r'\w+meli'),     # Necessity
+                (r'\w+', r'\w+bilir'),    # Ability/possibility
             ],
             CEFRLevel.C2: [
-                r'\b\w+\s+\w+casına\b',    # As if
-                r'\b\w+\s+\w+maksızın\b',  # Without
+                (r'\w+', r'\w+casına'),   # As if
+                (r'\w+', r'\w+maksızın'), # Without
             ]
         }
+        
+        # All grammar patterns compiled into one matcher scanned once per text
+        self.grammar_matcher = GrammarPatternMatcher(self.grammar_patterns)
+        
+        # Subordinate clause indicators, matched as whole words
+        self.subordinate_indicators = ['ki', 'çünkü', 'eğer', 'ama', 'fakat', 'ancak', 'lakin']
+        self.connector_matcher = ConnectorMatcher(self.subordinate_indicators)
     
     async def analyze_cefr_level(self, text: str) -> Tuple[CEFRLevel, float, Dict]:
         """
-        Comprehensive CEFR level analysis
+        Comprehensive CEFR level analysis, run on the CPU executor
         Returns: (level, confidence, detailed_metrics)
         """
+        if cpu_executor.is_process_pool:
+            return await run_cpu_bound(_analyze_in_worker, text)
+        return await run_cpu_bound(self.analyze_cefr_level_sync, text)
+    
+    async def analyze_cefr_level_many(self, texts: Iterable[str],
+                                      chunk_size: int = 8) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyze many documents on a process pool sized to the CPU count
+        Yields one result dict per document, in completion order:
+        {'index', 'level', 'confidence', 'metrics'} or {'index', 'error'}
+        """
+        
+        loop = asyncio.get_running_loop()
+        pool = get_analysis_pool()
+        
+        # Send documents in small chunks so short passages are not dominated by IPC overhead
+        indexed = list(enumerate(texts))
+        futures = [
+            loop.run_in_executor(pool, _analyze_chunk, indexed[start:start + chunk_size])
+            for start in range(0, len(indexed), chunk_size)
+        ]
+        
+        for future in asyncio.as_completed(futures):
+            for result in await future:
+                yield result
+    
+    def analyze_cefr_level_sync(self, text: str) -> Tuple[CEFRLevel, float, Dict]:
+        """Synchronous CEFR analysis used by the async API and pool workers"""
+        
+        # Tokenize once and share the document with every stage
+        doc = self.tokenize(text)
+        return self.analyze_stats(self.collect_stats(doc))
+    
+    async def analyze_cefr_level_chunks(self, chunks: Iterable[str]) -> Tuple[CEFRLevel, float, Dict]:
+        """
+        CEFR analysis of a text supplied as chunks (e.g. PDF pages)
+        Gives the same result as analyze_cefr_level on the joined text
+        """
+        if not cpu_executor.is_process_pool:
+            return await run_cpu_bound(self.analyze_cefr_level_chunks_sync, chunks)
+        
+        # Split sentences here and count each segment on the pool, keeping at most a
+        # window of segments in flight so the input is never held in memory at once
+        stream = StreamingCEFRAnalysis(self)
+        window = 2 * cpu_executor.max_workers
+        pending: Deque[asyncio.Task] = deque()
+        try:
+            for chunk in chunks:
+                text = stream.complete_text(chunk)
+                if text:
+                    pending.append(asyncio.ensure_future(run_cpu_bound(_collect_stats_in_worker, text)))
+                if len(pending) >= window:
+                    stream.stats.merge(await pending.popleft())
+            text = stream.remaining_text()
+            if text:
+                pending.append(asyncio.ensure_future(run_cpu_bound(_collect_stats_in_worker, text)))
+            while pending:
+                stream.stats.merge(await pending.popleft())
+        finally:
+            for task in pending:
+                task.cancel()
+        return self.analyze_stats(stream.stats)
+    
+    def analyze_cefr_level_chunks_sync(self, chunks: Iterable[str]) -> Tuple[CEFRLevel, float, Dict]:
+        """Synchronous chunked CEFR analysis"""
+        stream = StreamingCEFRAnalysis(self)
+        for chunk in chunks:
+            stream.feed(chunk)
+        return stream.finish()
+    
+    def analyze_stats(self, stats: 'AnalysisStats') -> Tuple[CEFRLevel, float, Dict]:
+        """Turn accumulated statistics into (level, confidence, detailed_metrics)"""
         
         # Basic text metrics
-        basic_metrics = self._calculate_basic_metrics(text)
+        basic_metrics = self._calculate_basic_metrics(stats)
         
         # Vocabulary analysis
-        vocab_metrics = self._analyze_vocabulary_complexity(text)
+        vocab_metrics = self._analyze_vocabulary_complexity(stats)
         
         # Grammar analysis
-        grammar_metrics = self._analyze_grammar_complexity(text)
+        grammar_metrics = self._analyze_grammar_complexity(stats)
         
         # Sentence structure analysis
-        structure_metrics = self._analyze_sentence_structure(text)
+        structure_metrics = self._analyze_sentence_structure(stats)
         
         # Combine all metrics
         combined_score = self._combine_metrics(
@@ -119,35 +229,67 @@ class CEFRAnalyzer:
         
         return level, confidence, detailed_metrics
     
-    def _calculate_basic_metrics(self, text: str) -> Dict:
-        """Calculate basic text complexity metrics"""
+    def tokenize(self, text: str) -> TokenizedDocument:
+        """Build the shared tokenized document for a text"""
+        return TokenizedDocument.from_text(text, self.turkish_stopwords)
+    
+    def lexicon_lemma(self, word: str) -> Optional[str]:
+        """Dictionary form of a lowercased word as listed in the lexicon, or None"""
+        lexicon = self.lexicon
+        for candidate in self.stemmer.lemma_candidates(word):
+            if candidate in lexicon:
+                return candidate
+        return None
+    
+    def collect_stats(self, doc: TokenizedDocument) -> 'AnalysisStats':
+        """Count everything the metrics need from one tokenized document"""
         
-        # Tokenization
-        if NLTK_AVAILABLE:
-            try:
-                sentences = sent_tokenize(text)
-                words = word_tokenize(text.lower())
-            except:
-                sentences = text.split('.')
-                words = text.lower().split()
-        else:
-            sentences = text.split('.')
-            words = text.lower().split()
+        stats = AnalysisStats()
+        content_words = doc.content_words
         
-        # Filter content words
-        content_words = [w for w in words if w.isalpha() and w not in self.turkish_stopwords]
+        # Basic counts
+        stats.sentence_count = doc.sentence_count
+        stats.word_count = len(content_words)
+        stats.word_length_total = sum(len(word) for word in content_words)
+        stats.types = set(content_words)
+        
+        # Vocabulary levels, looked up by dictionary form
+        lookup = self.lexicon.lookup
+        for word in content_words:
+            lemma = self.lexicon_lemma(word)
+            if lemma is not None:
+                stats.vocab_level_counts[lookup(lemma)] += 1
+        
+        # Grammar patterns
+        stats.grammar_counts = self.grammar_matcher.count(doc.text)
+        
+        # Sentence structure
+        for start, end in doc.sentence_spans:
+            # Count subordinate clause indicators (whole words only)
+            connectors = self.connector_matcher.count(doc.tokens[start:end])
+            connector_total = sum(connectors.values())
+            stats.subordinate_clauses += connector_total
+            stats.connector_counts.update(connectors)
+            
+            # Complex sentence detection (simple heuristic)
+            if end - start > 15 or connector_total:
+                stats.complex_sentences += 1
+        
+        return stats
+    
+    def _calculate_basic_metrics(self, stats: 'AnalysisStats') -> Dict:
+        """Calculate basic text complexity metrics"""
         
         # Calculate metrics
-        word_count = len(content_words)
-        sentence_count = len([s for s in sentences if s.strip()])
+        word_count = stats.word_count
+        sentence_count = stats.sentence_count
         avg_sentence_length = word_count / sentence_count if sentence_count > 0 else 0
         
         # Vocabulary diversity (Type-Token Ratio)
-        unique_words = set(content_words)
-        vocabulary_diversity = len(unique_words) / word_count if word_count > 0 else 0
+        vocabulary_diversity = len(stats.types) / word_count if word_count > 0 else 0
         
         # Average word length
-        avg_word_length = sum(len(word) for word in content_words) / len(content_words) if content_words else 0
+        avg_word_length = stats.word_length_total / word_count if word_count > 0 else 0
         
         return {
             'word_count': word_count,
@@ -157,21 +299,11 @@ class CEFRAnalyzer:
             'avg_word_length': avg_word_length
         }
     
-    def _analyze_vocabulary_complexity(self, text: str) -> Dict:
+    def _analyze_vocabulary_complexity(self, stats: 'AnalysisStats') -> Dict:
         """Analyze vocabulary complexity based on CEFR word lists"""
         
-        words = text.lower().split()
-        content_words = [w for w in words if w.isalpha() and w not in self.turkish_stopwords]
-        
-        level_counts = {level: 0 for level in CEFRLevel}
-        total_recognized = 0
-        
-        for word in content_words:
-            for level, vocab_set in self.cefr_vocabulary.items():
-                if word in vocab_set:
-                    level_counts[level] += 1
-                    total_recognized += 1
-                    break
+        level_counts = stats.vocab_level_counts
+        total_recognized = sum(level_counts.values())
         
         # Calculate vocabulary level distribution
         vocab_distribution = {}
@@ -192,18 +324,13 @@ class CEFRAnalyzer:
         return {
             'level_distribution': vocab_distribution,
             'avg_vocabulary_level': avg_vocab_level,
-            'recognition_rate': total_recognized / len(content_words) if content_words else 0
+            'recognition_rate': total_recognized / stats.word_count if stats.word_count else 0
         }
     
-    def _analyze_grammar_complexity(self, text: str) -> Dict:
+    def _analyze_grammar_complexity(self, stats: 'AnalysisStats') -> Dict:
         """Analyze grammatical complexity using pattern matching"""
         
-        grammar_scores = {level: 0 for level in CEFRLevel}
-        
-        for level, patterns in self.grammar_patterns.items():
-            for pattern in patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                grammar_scores[level] += len(matches)
+        grammar_scores = stats.grammar_counts
         
         total_patterns = sum(grammar_scores.values())
         
@@ -223,58 +350,37 @@ class CEFRAnalyzer:
             'total_patterns': total_patterns
         }
     
-    def _analyze_sentence_structure(self, text: str) -> Dict:
+    def _analyze_sentence_structure(self, stats: 'AnalysisStats') -> Dict:
         """Analyze sentence structure complexity"""
         
-        if NLTK_AVAILABLE:
-            try:
-                sentences = sent_tokenize(text)
-            except:
-                sentences = text.split('.')
-        else:
-            sentences = text.split('.')
-        
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
-        # Analyze sentence complexity
-        complex_sentences = 0
-        subordinate_clauses = 0
-        
-        for sentence in sentences:
-            # Count subordinate clause indicators
-            subordinate_indicators = ['ki', 'çünkü', 'eğer', 'ama', 'fakat', 'ancak', 'lakin']
-            for indicator in subordinate_indicators:
-                if indicator in sentence.lower():
-                    subordinate_clauses += 1
-            
-            # Complex sentence detection (simple heuristic)
-            if len(sentence.split()) > 15 or any(ind in sentence.lower() for ind in subordinate_indicators):
-                complex_sentences += 1
-        
-        complexity_ratio = complex_sentences / len(sentences) if sentences else 0
-        subordination_ratio = subordinate_clauses / len(sentences) if sentences else 0
+        sentence_count = stats.sentence_count
+        complexity_ratio = stats.complex_sentences / sentence_count if sentence_count else 0
+        subordination_ratio = stats.subordinate_clauses / sentence_count if sentence_count else 0
         
         return {
             'complexity_ratio': complexity_ratio,
             'subordination_ratio': subordination_ratio,
-            'avg_sentence_complexity': (complexity_ratio + subordination_ratio) / 2
+            'avg_sentence_complexity': (complexity_ratio + subordination_ratio) / 2,
+            'connector_counts': {
+                connector: stats.connector_counts[connector] for connector in self.subordinate_indicators
+            }
         }
     
     def _combine_metrics(self, basic: Dict, vocab: Dict, grammar: Dict, structure: Dict) -> float:
         """Combine all metrics into a single complexity score"""
         
         # Normalize metrics to 0-1 scale
-        sentence_complexity = min(basic['avg_sentence_length'] / 25, 1.0)
-        vocab_complexity = min(vocab['avg_vocabulary_level'] / 6, 1.0)
-        grammar_complexity = min(grammar['avg_grammar_level'] / 6, 1.0)
+        sentence_complexity = min(basic['avg_sentence_length'] / SENTENCE_LENGTH_SCALE, 1.0)
+        vocab_complexity = min(vocab['avg_vocabulary_level'] / LEVEL_SCALE, 1.0)
+        grammar_complexity = min(grammar['avg_grammar_level'] / LEVEL_SCALE, 1.0)
         structure_complexity = structure['avg_sentence_complexity']
         
         # Weighted combination
         combined_score = (
-            sentence_complexity * 0.25 +
-            vocab_complexity * 0.35 +
-            grammar_complexity * 0.25 +
-            structure_complexity * 0.15
+            sentence_complexity * SCORE_WEIGHTS['sentence'] +
+            vocab_complexity * SCORE_WEIGHTS['vocabulary'] +
+            grammar_complexity * SCORE_WEIGHTS['grammar'] +
+            structure_complexity * SCORE_WEIGHTS['structure']
         )
         
         return combined_score
@@ -282,15 +388,139 @@ class CEFRAnalyzer:
     def _map_to_cefr_level(self, score: float) -> Tuple[CEFRLevel, float]:
         """Map combined score to CEFR level with confidence"""
         
-        if score <= 0.15:
-            return CEFRLevel.A1, 0.9
-        elif score <= 0.3:
-            return CEFRLevel.A2, 0.85
-        elif score <= 0.5:
-            return CEFRLevel.B1, 0.8
-        elif score <= 0.7:
-            return CEFRLevel.B2, 0.75
-        elif score <= 0.85:
-            return CEFRLevel.C1, 0.7
-        else:
-            return CEFRLevel.C2, 0.65
+        for level, ceiling, confidence in LEVEL_THRESHOLDS:
+            if ceiling is None or score <= ceiling:
+                return level, confidence
+
+
+@dataclass
+class AnalysisStats:
+    """Running counts behind every CEFR metric; stats of consecutive texts merge by addition"""
+    sentence_count: int = 0
+    word_count: int = 0                     # content words
+    word_length_total: int = 0
+    types: Set[str] = field(default_factory=set)
+    vocab_level_counts: Dict[CEFRLevel, int] = field(default_factory=lambda: {level: 0 for level in CEFRLevel})
+    grammar_counts: Dict[CEFRLevel, int] = field(default_factory=lambda: {level: 0 for level in CEFRLevel})
+    complex_sentences: int = 0
+    subordinate_clauses: int = 0
+    connector_counts: Counter = field(default_factory=Counter)
+    
+    def merge(self, other: 'AnalysisStats') -> 'AnalysisStats':
+        """Add another text's counts into these"""
+        self.sentence_count += other.sentence_count
+        self.word_count += other.word_count
+        self.word_length_total += other.word_length_total
+        self.types |= other.types
+        for level in CEFRLevel:
+            self.vocab_level_counts[level] += other.vocab_level_counts[level]
+            self.grammar_counts[level] += other.grammar_counts[level]
+        self.complex_sentences += other.complex_sentences
+        self.subordinate_clauses += other.subordinate_clauses
+        self.connector_counts.update(other.connector_counts)
+        return self
+
+
+class StreamingCEFRAnalysis:
+    """Incremental CEFR analysis over text chunks such as PDF pages
+    
+    Only complete sentences are analyzed; the text after the last sentence terminator of a
+    chunk is carried into the next one, so sentences and grammar patterns never straddle a
+    boundary and the result matches the one-shot analysis. Memory is bounded by the chunk
+    size plus the vocabulary (type) set.
+    """
+    
+    # A carry-over without any terminator is flushed at whitespace once it grows this large
+    MAX_CARRY_CHARS = 64 * 1024
+    
+    def __init__(self, analyzer: CEFRAnalyzer):
+        self.analyzer = analyzer
+        self.stats = AnalysisStats()
+        self._carry = ""
+    
+    def feed(self, chunk: str):
+        """Add the next chunk of text"""
+        self._consume(self.complete_text(chunk))
+    
+    def finish(self) -> Tuple[CEFRLevel, float, Dict]:
+        """Analyze any remaining text and return (level, confidence, detailed_metrics)"""
+        self._consume(self.remaining_text())
+        return self.analyzer.analyze_stats(self.stats)
+    
+    def complete_text(self, chunk: str) -> str:
+        """The complete sentences of the carry-over plus ``chunk``; the rest is carried on"""
+        text = self._carry + chunk
+        
+        cut = max(text.rfind(terminator) for terminator in SENTENCE_TERMINATORS) + 1
+        if cut == 0 and len(text) > self.MAX_CARRY_CHARS:
+            cut = max(text.rfind(' '), text.rfind('\n')) + 1 or len(text)
+        
+        self._carry = text[cut:]
+        return text[:cut]
+    
+    def remaining_text(self) -> str:
+        """The carried-over text after the last chunk"""
+        text, self._carry = self._carry, ""
+        return text
+    
+    def _consume(self, text: str):
+        if text:
+            self.stats.merge(self.analyzer.collect_stats(self.analyzer.tokenize(text)))
+
+
+# Process pool for batch analysis; each worker process keeps its own analyzer
+_analysis_pool: Optional[ProcessPoolExecutor] = None
+_worker_analyzer: Optional[CEFRAnalyzer] = None
+
+
+def get_analysis_pool() -> ProcessPoolExecutor:
+    """Shared process pool for batch CEFR analysis, created on first use"""
+    global _analysis_pool
+    if _analysis_pool is None:
+        _analysis_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            initializer=_init_analysis_worker
+        )
+    return _analysis_pool
+
+
+def shutdown_analysis_pool():
+    """Stop the batch analysis workers"""
+    global _analysis_pool
+    if _analysis_pool is not None:
+        _analysis_pool.shutdown(wait=False, cancel_futures=True)
+        _analysis_pool = None
+
+
+def _init_analysis_worker():
+    global _worker_analyzer
+    _worker_analyzer = CEFRAnalyzer()
+
+
+def _get_worker_analyzer() -> CEFRAnalyzer:
+    """Analyzer of the current process, for work sent to a process pool"""
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = CEFRAnalyzer()
+    return _worker_analyzer
+
+
+def _analyze_in_worker(text: str) -> Tuple[CEFRLevel, float, Dict]:
+    return _get_worker_analyzer().analyze_cefr_level_sync(text)
+
+
+def _collect_stats_in_worker(text: str) -> AnalysisStats:
+    analyzer = _get_worker_analyzer()
+    return analyzer.collect_stats(analyzer.tokenize(text))
+
+
+def _analyze_chunk(chunk: List[Tuple[int, str]]) -> List[Dict[str, Any]]:
+    """Analyze (index, text) pairs inside a pool worker"""
+    results = []
+    for index, text in chunk:
+        try:
+            level, confidence, metrics = _worker_analyzer.analyze_cefr_level_sync(text)
+            results.append({'index': index, 'level': level, 'confidence': confidence, 'metrics': metrics})
+        except Exception as e:
+            results.append({'index': index, 'error': str(e)})
+    return results
@@ -0,0 +1,157 @@
+"""
+Vectorized CEFR Feature Extraction and Scoring
+Turns many documents into an N x F feature matrix and scores the whole matrix at once
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.content import CEFRLevel
+from app.services.cefr_analyzer import (
+    LEVEL_SCALE,
+    LEVEL_THRESHOLDS,
+    SCORE_WEIGHTS,
+    SENTENCE_LENGTH_SCALE,
+    AnalysisStats,
+    CEFRAnalyzer
+)
+
+FEATURE_COLUMNS = (
+    'avg_sentence_length',
+    'vocabulary_diversity',
+    'avg_word_length',
+    'avg_vocabulary_level',
+    'avg_grammar_level',
+    'subordination_ratio',
+    'avg_sentence_complexity'
+)
+
+LEVELS = list(CEFRLevel)
+LEVEL_WEIGHTS = np.arange(1, len(LEVELS) + 1, dtype=np.float64)
+
+# Defaults used by the analyzer when no vocabulary word / grammar pattern is recognized
+DEFAULT_VOCABULARY_LEVEL = 3.0
+DEFAULT_GRAMMAR_LEVEL = 2.0
+
+
+@dataclass
+class FeatureMatrix:
+    """N x F float matrix with named columns"""
+    values: np.ndarray
+    columns: Tuple[str, ...] = FEATURE_COLUMNS
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self.columns.index(name)]
+
+    def save(self, path: str):
+        """Persist the matrix so it can be re-scored without re-analyzing the corpus"""
+        np.savez_compressed(path, values=self.values, columns=np.array(self.columns))
+
+    @classmethod
+    def load(cls, path: str) -> 'FeatureMatrix':
+        with np.load(path) as data:
+            return cls(values=data['values'], columns=tuple(str(name) for name in data['columns']))
+
+    @classmethod
+    def from_stats(cls, stats_list: Sequence[AnalysisStats]) -> 'FeatureMatrix':
+        """Build features from per-document counts, with every ratio computed column-wise"""
+
+        sentences = np.array([s.sentence_count for s in stats_list], dtype=np.float64)
+        words = np.array([s.word_count for s in stats_list], dtype=np.float64)
+        word_lengths = np.array([s.word_length_total for s in stats_list], dtype=np.float64)
+        types = np.array([len(s.types) for s in stats_list], dtype=np.float64)
+        complex_sentences = np.array([s.complex_sentences for s in stats_list], dtype=np.float64)
+        subordinate = np.array([s.subordinate_clauses for s in stats_list], dtype=np.float64)
+        vocab_counts = np.array([[s.vocab_level_counts[level] for level in LEVELS] for s in stats_list],
+                                dtype=np.float64).reshape(-1, len(LEVELS))
+        grammar_counts = np.array([[s.grammar_counts[level] for level in LEVELS] for s in stats_list],
+                                  dtype=np.float64).reshape(-1, len(LEVELS))
+
+        complexity_ratio = _ratio(complex_sentences, sentences, 0.0)
+        subordination_ratio = _ratio(subordinate, sentences, 0.0)
+
+        values = np.column_stack([
+            _ratio(words, sentences, 0.0),
+            _ratio(types, words, 0.0),
+            _ratio(word_lengths, words, 0.0),
+            _ratio(vocab_counts @ LEVEL_WEIGHTS, vocab_counts.sum(axis=1), DEFAULT_VOCABULARY_LEVEL),
+            _ratio(grammar_counts @ LEVEL_WEIGHTS, grammar_counts.sum(axis=1), DEFAULT_GRAMMAR_LEVEL),
+            subordination_ratio,
+            (complexity_ratio + subordination_ratio) / 2
+        ])
+        return cls(values=values)
+
+    @classmethod
+    def from_metrics(cls, metrics_list: Iterable[Dict]) -> 'FeatureMatrix':
+        """Build features from ``detailed_metrics`` dicts, e.g. batch analysis results"""
+        rows = [
+            [
+                metrics['basic_metrics']['avg_sentence_length'],
+                metrics['basic_metrics']['vocabulary_diversity'],
+                metrics['basic_metrics']['avg_word_length'],
+                metrics['vocabulary_metrics']['avg_vocabulary_level'],
+                metrics['grammar_metrics']['avg_grammar_level'],
+                metrics['structure_metrics']['subordination_ratio'],
+                metrics['structure_metrics']['avg_sentence_complexity']
+            ]
+            for metrics in metrics_list
+        ]
+        return cls(values=np.array(rows, dtype=np.float64).reshape(-1, len(FEATURE_COLUMNS)))
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, default: float) -> np.ndarray:
+    """Element-wise numerator / denominator with ``default`` where the denominator is zero"""
+    result = np.full(numerator.shape, default, dtype=np.float64)
+    np.divide(numerator, denominator, out=result, where=denominator > 0)
+    return result
+
+
+def extract_feature_matrix(analyzer: CEFRAnalyzer, texts: Iterable[str]) -> FeatureMatrix:
+    """Analyze texts and return their feature matrix"""
+    return FeatureMatrix.from_stats([analyzer.collect_stats(analyzer.tokenize(text)) for text in texts])
+
+
+class LinearCEFRScorer:
+    """Linear complexity score plus level thresholds, applied to a whole feature matrix
+
+    The defaults reproduce ``CEFRAnalyzer``; pass other weights or thresholds to
+    re-score a stored corpus while tuning.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 thresholds: Optional[List[Tuple[CEFRLevel, Optional[float], float]]] = None):
+        weights = weights or SCORE_WEIGHTS
+        thresholds = thresholds or LEVEL_THRESHOLDS
+
+        self.weights = np.array([
+            weights['sentence'], weights['vocabulary'], weights['grammar'], weights['structure']
+        ], dtype=np.float64)
+        self.levels = np.array([level.value for level, _, _ in thresholds])
+        self.ceilings = np.array([ceiling for _, ceiling, _ in thresholds if ceiling is not None])
+        self.confidences = np.array([confidence for _, _, confidence in thresholds])
+
+    def score(self, features: FeatureMatrix) -> np.ndarray:
+        """Combined complexity score of every row"""
+        normalized = (
+            np.minimum(features.column('avg_sentence_length') / SENTENCE_LENGTH_SCALE, 1.0),
+            np.minimum(features.column('avg_vocabulary_level') / LEVEL_SCALE, 1.0),
+            np.minimum(features.column('avg_grammar_level') / LEVEL_SCALE, 1.0),
+            features.column('avg_sentence_complexity')
+        )
+        # Summed term by term in the analyzer's order so scores on a ceiling round identically
+        scores = np.zeros(len(features), dtype=np.float64)
+        for column, weight in zip(normalized, self.weights):
+            scores += column * weight
+        return scores
+
+    def classify(self, features: FeatureMatrix) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(level codes, confidences, scores) of every row"""
+        scores = self.score(features)
+        # side='left' keeps a score equal to a ceiling in the lower level, like the analyzer
+        buckets = np.searchsorted(self.ceilings, scores, side='left')
+        return self.levels[buckets], self.confidences[buckets], scores
@@ -0,0 +1,194 @@
+"""
+CPU-Bound Work Executor and Event Loop Lag Monitor
+Runs tokenization and analysis off the event loop on a bounded thread or process pool, and
+measures how long the loop is kept from running other requests
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Deque, Dict, Optional
+
+from app.core.config import settings
+
+EXECUTOR_MODES = ('thread', 'process', 'inline')
+
+# Lag samples kept for the percentile figures in the diagnostics
+LAG_WINDOW = 1000
+
+
+class CPUExecutor:
+    """Bounded pool for CPU-bound service calls
+
+    ``mode`` is 'thread' (shares the process and its loaded models, but holds the GIL
+    while running pure Python), 'process' (full isolation; functions and arguments must
+    be picklable and each worker loads its own models) or 'inline' (runs on the calling
+    loop, for debugging and benchmarks). At most ``max_pending`` jobs are queued or
+    running at once; further callers wait without blocking the loop.
+    """
+
+    def __init__(self, mode: str = 'thread', max_workers: Optional[int] = None, max_pending: int = 64):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode '{mode}', expected one of {EXECUTOR_MODES}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max(1, max_pending)
+        self._pool: Optional[Executor] = None
+        # asyncio semaphores belong to one event loop, so keep one per loop
+        self._slots: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = (
+            weakref.WeakKeyDictionary()
+        )
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.waiting = 0
+        self.running = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    @property
+    def is_process_pool(self) -> bool:
+        return self.mode == 'process'
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == 'process':
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='cpu-work')
+        return self._pool
+
+    def _get_slots(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_pending)
+        return slots
+
+    async def run(self, function: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``function(*args, **kwargs)`` on the pool and return its result"""
+
+        if self.mode == 'inline':
+            return function(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        slots = self._get_slots(loop)
+
+        self.submitted += 1
+        self.waiting += 1
+        queued = time.perf_counter()
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.wait_seconds += started - queued
+
+        self.running += 1
+        try:
+            result = await loop.run_in_executor(self._get_pool(), partial(function, *args, **kwargs))
+        except BaseException:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+            return result
+        finally:
+            self.running -= 1
+            self.busy_seconds += time.perf_counter() - started
+            slots.release()
+
+    def diagnostics(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'running': self.running,
+            'waiting': self.waiting,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'queue_wait_seconds': round(self.wait_seconds, 3)
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class LoopLagMonitor:
+    """Measures event loop blocking by how late a periodic timer wakes up
+
+    Any delay past the scheduled wake-up is time during which the loop could not run
+    callbacks, i.e. every request on it was stalled.
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._lags: Deque[float] = deque(maxlen=LAG_WINDOW)
+        self.samples = 0
+        self.blocked_seconds = 0.0
+        self.max_lag = 0.0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            scheduled = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - scheduled))
+
+    def record(self, lag: float):
+        self.samples += 1
+        self.blocked_seconds += lag
+        self.max_lag = max(self.max_lag, lag)
+        self._lags.append(lag)
+
+    def diagnostics(self) -> Dict[str, Any]:
+        recent = sorted(self._lags)
+
+        def percentile(fraction: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(fraction * len(recent)))] * 1000
+
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'interval_ms': self.interval * 1000,
+            'samples': self.samples,
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            'max_lag_ms': round(self.max_lag * 1000, 2),
+            'recent_p50_lag_ms': round(percentile(0.50), 2),
+            'recent_p99_lag_ms': round(percentile(0.99), 2)
+        }
+
+
+cpu_executor = CPUExecutor(
+    mode=settings.CPU_EXECUTOR_MODE,
+    max_workers=settings.CPU_EXECUTOR_WORKERS or None,
+    max_pending=settings.CPU_EXECUTOR_MAX_PENDING
+)
+loop_lag_monitor = LoopLagMonitor(interval=settings.LOOP_LAG_INTERVAL_MS / 1000)
+
+
+async def run_cpu_bound(function: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run CPU-heavy work on the shared executor"""
+    return await cpu_executor.run(function, *args, **kwargs)
@@ -0,0 +1,93 @@
+"""
+Distractor Index for Multiple-Choice Exercises
+Buckets English glosses by CEFR level, part of speech and length so plausible wrong answers
+are drawn in constant time per question
+"""
+
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.models.content import CEFRLevel
+
+MAX_LENGTH_BUCKET = 4
+CHARACTERS_PER_LENGTH_BUCKET = 4
+
+# Buckets consulted in order until enough distractors are found: the exact
+# (level, part of speech, length) bucket first, then progressively coarser ones
+BUCKET_TIERS = (
+    ('level', 'pos', 'length'),
+    ('level', 'pos'),
+    ('pos', 'length'),
+    ('pos',),
+    ('level',),
+    (),
+)
+
+
+def part_of_speech(turkish: str, english: str) -> str:
+    """Coarse word class from the shape of an entry: 'verb', 'phrase' or 'word'
+
+    The curriculum data carries no POS tags, but infinitives (-mak/-mek, "to ...") and
+    multi-word expressions are easy to tell apart, and mixing them is what makes a
+    distractor stand out.
+    """
+    turkish = turkish.strip()
+    english = english.strip().lower()
+    if english.startswith('to ') or turkish.endswith(('mak', 'mek')):
+        return 'verb'
+    if ' ' in turkish or ' ' in english:
+        return 'phrase'
+    return 'word'
+
+
+def length_bucket(english: str) -> int:
+    return min(len(english.strip()) // CHARACTERS_PER_LENGTH_BUCKET, MAX_LENGTH_BUCKET)
+
+
+class DistractorIndex:
+    """Frozen index of candidate wrong answers
+
+    Every bucket of every tier is precomputed as a tuple of distinct glosses, so sampling
+    distractors for a question touches a handful of buckets regardless of pool size.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, CEFRLevel, str]]):
+        """``entries`` are (english, level, part of speech) triples"""
+        buckets: Dict[Tuple, Dict[str, None]] = {}
+        for english, level, pos in entries:
+            english = english.strip()
+            if not english:
+                continue
+            fields = {'level': level, 'pos': pos, 'length': length_bucket(english)}
+            for tier in BUCKET_TIERS:
+                key = tuple(fields[name] for name in tier)
+                buckets.setdefault(key, {})[english] = None   # ordered set
+
+        self._buckets: Dict[Tuple, Tuple[str, ...]] = {
+            key: tuple(glosses) for key, glosses in buckets.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._buckets.get((), ()))
+
+    def sample(self, answer: str, level: CEFRLevel, pos: str, count: int = 3,
+               rng: Optional[random.Random] = None) -> List[str]:
+        """Up to ``count`` distinct glosses other than ``answer``, closest buckets first"""
+
+        rng = rng or random.Random()
+        fields = {'level': level, 'pos': pos, 'length': length_bucket(answer)}
+        excluded = {answer.strip().lower()}
+        distractors: List[str] = []
+
+        for tier in BUCKET_TIERS:
+            bucket = self._buckets.get(tuple(fields[name] for name in tier), ())
+            needed = count - len(distractors)
+            # Oversample by the number of glosses that may be rejected, so one draw suffices
+            for gloss in rng.sample(bucket, min(len(bucket), needed + len(excluded))):
+                if gloss.lower() not in excluded:
+                    distractors.append(gloss)
+                    excluded.add(gloss.lower())
+                    if len(distractors) == count:
+                        return distractors
+
+        return distractors
@@ -0,0 +1,138 @@
+"""
+CEFR Lexicon Index for Turkish Vocabulary
+Maps words to CEFR levels with a single hash lookup per token
+"""
+
+import glob
+import json
+import logging
+import os
+import sys
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, Iterator, Mapping, Optional, Tuple
+
+from app.models.content import CEFRLevel
+from app.services.text_document import turkish_lower
+
+LEVEL_ORDER = {level: index for index, level in enumerate(CEFRLevel)}
+
+# The bundled curriculum (İstanbul Yabancılar İçin Türkçe A1) covers A1 only
+CURRICULUM_LEVEL = CEFRLevel.A1
+MAX_PHRASE_WORDS = 3
+
+logger = logging.getLogger(__name__)
+
+
+class LexiconIndex:
+    """Frozen word -> CEFR level index
+
+    Words are interned and stored in one read-only mapping, so lookup cost does not
+    depend on lexicon size and an index built before workers fork is shared
+    copy-on-write between them.
+    """
+
+    __slots__ = ('_levels',)
+
+    def __init__(self, levels: Mapping[str, CEFRLevel]):
+        self._levels = MappingProxyType(dict(levels))
+
+    def lookup(self, word: str) -> Optional[CEFRLevel]:
+        """CEFR level of a lowercased word, or None if unknown"""
+        return self._levels.get(word)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._levels
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def level_counts(self) -> Dict[str, int]:
+        """Number of indexed words per level"""
+        counts = {level.value: 0 for level in CEFRLevel}
+        for level in self._levels.values():
+            counts[level.value] += 1
+        return counts
+
+    @classmethod
+    def build(cls, seed_vocabulary: Mapping[CEFRLevel, Iterable[str]] = None,
+              data_dir: Optional[str] = None) -> 'LexiconIndex':
+        """Build an index from seed word lists plus the curriculum data in ``data_dir``
+
+        A word listed at several levels keeps the lowest one, i.e. where it is first taught.
+        """
+        levels: Dict[str, CEFRLevel] = {}
+
+        def add(word: str, level: CEFRLevel):
+            word = turkish_lower(word.strip())
+            if not word.isalpha():
+                return
+            current = levels.get(word)
+            if current is None or LEVEL_ORDER[level] < LEVEL_ORDER[current]:
+                levels[sys.intern(word)] = level
+
+        for level, words in (seed_vocabulary or {}).items():
+            for word in words:
+                add(word, level)
+
+        if data_dir:
+            for entry in _curriculum_entries(data_dir):
+                for word in _entry_words(entry):
+                    add(word, CURRICULUM_LEVEL)
+
+        return cls(levels)
+
+
+def _entry_words(entry: str) -> Iterator[str]:
+    """Single words of a vocabulary entry; longer example sentences are skipped"""
+    words = entry.split()
+    if len(words) <= MAX_PHRASE_WORDS:
+        yield from words
+
+
+def _curriculum_entries(data_dir: str) -> Iterator[str]:
+    """Turkish vocabulary entries from the inventory and curriculum lesson files"""
+
+    inventory_path = os.path.join(data_dir, 'vocabulary_grammar_inventory.json')
+    lesson_paths = sorted(glob.glob(os.path.join(data_dir, 'curriculum_content', '*.json')))
+
+    for path in [inventory_path] + lesson_paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as data_file:
+                data = json.load(data_file)
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping lexicon source %s: %s", path, e)
+            continue
+
+        if path == inventory_path:
+            data = data.get('vocabulary_inventory', {})
+        yield from _find_turkish_entries(data)
+
+
+def _find_turkish_entries(node) -> Iterator[str]:
+    """Walk a JSON tree yielding ``turkish`` fields and ``vocabularyFocus`` lists"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == 'turkish' and isinstance(value, str):
+                yield value
+            elif key == 'vocabularyFocus' and isinstance(value, list):
+                yield from (item for item in value if isinstance(item, str))
+            else:
+                yield from _find_turkish_entries(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _find_turkish_entries(item)
+
+
+IndexKey = Tuple[str, FrozenSet[Tuple[CEFRLevel, FrozenSet[str]]]]
+
+_shared_indexes: Dict[IndexKey, LexiconIndex] = {}
+
+
+def get_lexicon_index(seed_vocabulary: Mapping[CEFRLevel, Iterable[str]] = None,
+                      data_dir: Optional[str] = None) -> LexiconIndex:
+    """Process-wide lexicon index for ``data_dir`` and ``seed_vocabulary``, built on first use"""
+    seed = {level: frozenset(words) for level, words in (seed_vocabulary or {}).items()}
+    key = (data_dir or '', frozenset(seed.items()))
+    if key not in _shared_indexes:
+        _shared_indexes[key] = LexiconIndex.build(seed, data_dir)
+    return _shared_indexes[key]
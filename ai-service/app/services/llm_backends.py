@@ -0,0 +1,443 @@
+"""
+Pluggable LLM Backends
+HTTP transports behind the shared OpenAI client: the real API, a deterministic local
+stand-in with configurable latency, or a cassette that records and replays API exchanges
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.services.llm_json import repair_json
+
+LLM_BACKENDS = ('openai', 'stub', 'record', 'replay')
+
+# Backends that never reach the OpenAI API, so they work without an API key
+LOCAL_BACKENDS = ('stub', 'replay')
+
+CASSETTE_VERSION = 1
+
+# "..." placeholders the prompts use to say "more items like these"
+ELLIPSIS_PATTERN = re.compile(r',?\s*\.\.\.(?=\s*[\]}])')
+
+# Rough characters per token, for the usage figures and stream chunk size
+CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """Time to the first token, drawn from a fixed, uniform or lognormal distribution
+
+    Specs are ``fixed:MS``, ``uniform:MIN_MS:MAX_MS`` or ``lognormal:MEDIAN_MS:SIGMA``.
+    """
+    kind: str = 'lognormal'
+    params: Tuple[float, ...] = (800.0, 0.5)
+
+    @classmethod
+    def parse(cls, spec: str) -> 'LatencyModel':
+        kind, *values = spec.strip().split(':')
+        expected = {'fixed': 1, 'uniform': 2, 'lognormal': 2}
+        if kind not in expected or len(values) != expected[kind]:
+            raise ValueError(f"Invalid latency spec '{spec}', expected fixed:MS, uniform:MIN:MAX or lognormal:MEDIAN:SIGMA")
+        return cls(kind=kind, params=tuple(float(value) for value in values))
+
+    def sample(self, rng: random.Random) -> float:
+        """One latency in seconds"""
+        if self.kind == 'fixed':
+            milliseconds = self.params[0]
+        elif self.kind == 'uniform':
+            milliseconds = rng.uniform(*self.params)
+        else:
+            median, sigma = self.params
+            milliseconds = rng.lognormvariate(math.log(max(median, 1e-3)), sigma)
+        return max(0.0, milliseconds) / 1000
+
+
+@dataclass
+class StubReply:
+    content: str
+    first_token_delay: float    # seconds
+    token_delay: float          # seconds between streamed chunks
+    prompt_tokens: int
+    completion_tokens: int
+
+    @property
+    def total_delay(self) -> float:
+        return self.first_token_delay + self.token_delay * self.completion_tokens
+
+
+def response_template(prompt: str) -> Any:
+    """The JSON example a prompt asks the model to follow, or None
+
+    Prompts describe the expected answer with an example document that uses "..." for
+    further items; that example is cut out, the placeholders removed and the rest parsed.
+    """
+
+    marker = prompt.find('JSON')
+    if marker < 0:
+        return None
+    starts = [index for index in (prompt.find('{', marker), prompt.find('[', marker)) if index >= 0]
+    if not starts:
+        return None
+    repaired = repair_json(ELLIPSIS_PATTERN.sub('', prompt[min(starts):]))
+    try:
+        return json.loads(repaired) if repaired is not None else None
+    except ValueError:
+        return None
+
+
+def fill_template(template: Any, items_per_array: int) -> Any:
+    """A document shaped like ``template``, with arrays of objects grown to ``items_per_array``
+
+    Every value keeps the type and text of the example, so enumerations such as CEFR
+    levels stay valid; only the first string field of the n-th generated object gets an
+    " n" suffix, so the items differ.
+    """
+
+    if isinstance(template, dict):
+        return {key: fill_template(value, items_per_array) for key, value in template.items()}
+    if not isinstance(template, list) or not template:
+        return template
+    if not any(isinstance(item, dict) for item in template):
+        return list(template)
+
+    items = []
+    for index in range(items_per_array):
+        item = fill_template(template[index % len(template)], items_per_array)
+        if index and isinstance(item, dict):
+            name = next((key for key, value in item.items() if isinstance(value, str)), None)
+            if name is not None:
+                item[name] = f"{item[name]} {index + 1}"
+        items.append(item)
+    return items
+
+
+class LocalLLM:
+    """Deterministic stand-in for the chat completions API
+
+    Answers with JSON shaped like the example in the prompt (plain text when the prompt
+    asks for none), after a latency drawn from ``latency`` plus ``token_ms`` per
+    completion token. Content and latency depend only on ``seed`` and the request body,
+    so a load test replays identically.
+    """
+
+    def __init__(self, latency: Optional[LatencyModel] = None, token_ms: float = 0.0,
+                 seed: int = 0, items_per_array: int = 5):
+        self.latency = latency or LatencyModel()
+        self.token_delay = max(0.0, token_ms) / 1000
+        self.seed = seed
+        self.items_per_array = items_per_array
+        self.requests = 0
+        self.delay_seconds = 0.0
+
+    def reply(self, body: Dict[str, Any]) -> StubReply:
+        canonical = json.dumps(body, sort_keys=True, ensure_ascii=False)
+        rng = random.Random(f"{self.seed}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}")
+
+        messages = body.get('messages') or []
+        prompt = '\n'.join(str(message.get('content') or '') for message in messages)
+        template = response_template(messages[-1].get('content') or '') if messages else None
+        if template is not None:
+            content = json.dumps(fill_template(template, self.items_per_array), ensure_ascii=False, indent=2)
+        else:
+            content = f"Stand-in response to: {' '.join(prompt.split())[:120]}"
+
+        reply = StubReply(
+            content=content,
+            first_token_delay=self.latency.sample(rng),
+            token_delay=self.token_delay,
+            prompt_tokens=len(prompt) // CHARS_PER_TOKEN + 1,
+            completion_tokens=len(content) // CHARS_PER_TOKEN + 1
+        )
+        self.requests += 1
+        self.delay_seconds += reply.total_delay
+        return reply
+
+    def completion(self, body: Dict[str, Any], reply: StubReply) -> Dict[str, Any]:
+        """Chat completion JSON for a non-streaming request"""
+        return {
+            'id': f"chatcmpl-local-{self.requests}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'local'),
+            'choices': [{
+                'index': 0,
+                'finish_reason': 'stop',
+                'message': {'role': 'assistant', 'content': reply.content}
+            }],
+            'usage': {
+                'prompt_tokens': reply.prompt_tokens,
+                'completion_tokens': reply.completion_tokens,
+                'total_tokens': reply.prompt_tokens + reply.completion_tokens
+            }
+        }
+
+    async def stream(self, body: Dict[str, Any], reply: StubReply) -> AsyncIterator[bytes]:
+        """Server-sent event chunks for a streaming request, paced like the real API"""
+
+        chunk_id = f"chatcmpl-local-{self.requests}"
+        created = int(time.time())
+
+        def event(delta: Optional[Dict[str, Any]], finish_reason: Optional[str] = None,
+                  usage: Optional[Dict[str, int]] = None) -> bytes:
+            chunk = {
+                'id': chunk_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': body.get('model', 'local'),
+                'choices': [] if delta is None else [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+            }
+            if usage is not None:
+                chunk['usage'] = usage
+            return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8')
+
+        await asyncio.sleep(reply.first_token_delay)
+        yield event({'role': 'assistant', 'content': ''})
+        for start in range(0, len(reply.content), CHARS_PER_TOKEN):
+            if reply.token_delay:
+                await asyncio.sleep(reply.token_delay)
+            yield event({'content': reply.content[start:start + CHARS_PER_TOKEN]})
+        yield event({}, 'stop')
+        # Like the API, a final chunk without choices carries the usage when asked for
+        if (body.get('stream_options') or {}).get('include_usage'):
+            yield event(None, usage=self.completion(body, reply)['usage'])
+        yield b"data: [DONE]\n\n"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'mean_delay_ms': round(self.delay_seconds / self.requests * 1000, 2) if self.requests else 0.0
+        }
+
+
+class _ByteStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._chunks:
+            yield chunk
+
+
+def _error_response(status_code: int, message: str) -> httpx.Response:
+    return httpx.Response(status_code, json={'error': {'message': message, 'type': 'local_backend_error'}})
+
+
+class LocalLLMTransport(httpx.AsyncBaseTransport):
+    """Serves chat completion requests from a LocalLLM without any network"""
+
+    def __init__(self, llm: LocalLLM):
+        self.llm = llm
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith('/chat/completions'):
+            return _error_response(404, f"The local LLM stand-in does not serve {request.url.path}")
+
+        body = json.loads(await request.aread())
+        reply = self.llm.reply(body)
+        if body.get('stream'):
+            return httpx.Response(200, headers={'content-type': 'text/event-stream'},
+                                  stream=_ByteStream(self.llm.stream(body, reply)))
+
+        await asyncio.sleep(reply.total_delay)
+        return httpx.Response(200, json=self.llm.completion(body, reply))
+
+
+MULTIPART_NAME_PATTERN = re.compile(r'\bname="([^"]*)"')
+MULTIPART_FILENAME_PATTERN = re.compile(r'\bfilename="([^"]*)"')
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _multipart_fields(content_type: str, body: bytes) -> Dict[str, Any]:
+    """Form fields of a multipart upload, with each file reduced to its name, size and digest"""
+    boundary = content_type.split('boundary=', 1)[-1].split(';')[0].strip().strip('"')
+    fields: Dict[str, Any] = {}
+    for part in body.split(b'--' + boundary.encode('latin-1')):
+        head, separator, data = part.partition(b'\r\n\r\n')
+        if not separator:
+            continue
+        headers = head.decode('utf-8', errors='replace')
+        name = MULTIPART_NAME_PATTERN.search(headers)
+        if name is None:
+            continue
+        if data.endswith(b'\r\n'):
+            data = data[:-2]
+        filename = MULTIPART_FILENAME_PATTERN.search(headers)
+        if filename is not None:
+            fields[name.group(1)] = {'filename': filename.group(1), 'size': len(data), 'sha256': _digest(data)}
+        else:
+            fields[name.group(1)] = data.decode('utf-8', errors='replace')
+    return fields
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """Records API exchanges to a JSON cassette and replays them without the network
+
+    In 'record' mode requests go to ``inner`` and each response is saved under a hash of
+    the method, path and request body (never the headers, so no API key is written). In
+    'replay' mode responses come from the cassette, optionally after the latency that
+    was recorded; a request that was never recorded gets a 404 error.
+
+    Multipart uploads (transcriptions) are keyed by their form fields and file digests,
+    as their boundary changes with every request, and the audio itself is not stored.
+    Responses that are not UTF-8 text (speech audio) are stored base64-encoded.
+    """
+
+    def __init__(self, path: str, mode: str = 'replay', inner: Optional[httpx.AsyncBaseTransport] = None,
+                 replay_latency: bool = True):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode '{mode}', expected 'record' or 'replay'")
+        if mode == 'record' and inner is None:
+            raise ValueError("Recording needs a transport to the real API")
+        self.path = path
+        self.mode = mode
+        self.inner = inner
+        self.replay_latency = replay_latency
+        self.interactions: Dict[str, Dict[str, Any]] = self._load()
+        # Concurrent recordings save one at a time; a save already covering a newer
+        # recording makes the older one's save unnecessary
+        self._save_lock = asyncio.Lock()
+        self._saved = 0
+        self.recorded = 0
+        self.replayed = 0
+        self.missing = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as cassette_file:
+                cassette = json.load(cassette_file)
+        except FileNotFoundError:
+            return {}
+        if cassette.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"Cassette {self.path} has version {cassette.get('version')}, expected {CASSETTE_VERSION}")
+        return cassette.get('interactions', {})
+
+    async def _save_after(self, recorded: int):
+        """Write the cassette unless a save since recording number ``recorded`` already did"""
+        async with self._save_lock:
+            if self._saved >= recorded:
+                return
+            snapshot = dict(self.interactions)
+            await asyncio.to_thread(self._save, snapshot)
+            self._saved = recorded
+
+    def _save(self, interactions: Dict[str, Dict[str, Any]]):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.tmp',
+                                         delete=False) as cassette_file:
+            json.dump({'version': CASSETTE_VERSION, 'interactions': interactions},
+                      cassette_file, ensure_ascii=False, indent=1)
+        try:
+            os.replace(cassette_file.name, self.path)
+        except OSError:
+            os.remove(cassette_file.name)
+            raise
+
+    @staticmethod
+    def request_fields(content_type: str, body: bytes) -> Any:
+        """Stable, JSON-serializable form of a request body"""
+        if not body:
+            return None
+        if content_type.startswith('multipart/form-data'):
+            return _multipart_fields(content_type, body)
+        try:
+            return json.loads(body)
+        except ValueError:
+            return {'size': len(body), 'sha256': _digest(body)}
+
+    @staticmethod
+    def request_key(method: str, path: str, fields: Any) -> str:
+        canonical = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+        return _digest(f"{method} {path}\n{canonical}".encode('utf-8'))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        fields = self.request_fields(request.headers.get('content-type', ''), await request.aread())
+        key = self.request_key(request.method, request.url.path, fields)
+
+        if self.mode == 'replay':
+            interaction = self.interactions.get(key)
+            if interaction is None:
+                self.missing += 1
+                return _error_response(404, f"No recorded response for this request in cassette {self.path}")
+            self.replayed += 1
+            if self.replay_latency:
+                await asyncio.sleep(interaction['elapsed_ms'] / 1000)
+            if 'body_base64' in interaction:
+                content = base64.b64decode(interaction['body_base64'])
+            else:
+                content = interaction['body'].encode('utf-8')
+            return httpx.Response(interaction['status'], headers={'content-type': interaction['content_type']},
+                                  content=content)
+
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        content = await response.aread()
+        await response.aclose()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        content_type = response.headers.get('content-type', 'application/json')
+        if response.status_code < 500:
+            interaction = {'request': fields, 'status': response.status_code, 'content_type': content_type}
+            try:
+                interaction['body'] = content.decode('utf-8')
+            except UnicodeDecodeError:
+                interaction['body_base64'] = base64.b64encode(content).decode('ascii')
+            interaction['elapsed_ms'] = round(elapsed_ms, 1)
+            self.interactions[key] = interaction
+            self.recorded += 1
+            await self._save_after(self.recorded)
+        return httpx.Response(response.status_code, headers={'content-type': content_type}, content=content)
+
+    async def aclose(self):
+        if self.inner is not None:
+            await self.inner.aclose()
+
+
+_local_llm: Optional[LocalLLM] = None
+
+
+def get_local_llm() -> LocalLLM:
+    """Process-wide stand-in configured from settings"""
+    global _local_llm
+    if _local_llm is None:
+        _local_llm = LocalLLM(
+            latency=LatencyModel.parse(settings.LLM_STUB_LATENCY),
+            token_ms=settings.LLM_STUB_TOKEN_MS,
+            seed=settings.LLM_STUB_SEED,
+            items_per_array=settings.LLM_STUB_ARRAY_ITEMS
+        )
+    return _local_llm
+
+
+def create_llm_transport(network: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+    """Transport for the configured LLM_BACKEND; ``network`` reaches the real API"""
+
+    backend = settings.LLM_BACKEND
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{backend}', expected one of {LLM_BACKENDS}")
+    if backend == 'stub':
+        return LocalLLMTransport(get_local_llm())
+    if backend in ('record', 'replay'):
+        return CassetteTransport(
+            settings.LLM_CASSETTE_PATH,
+            mode=backend,
+            inner=network if backend == 'record' else None,
+            replay_latency=settings.LLM_CASSETTE_REPLAY_LATENCY
+        )
+    return network
@@ -0,0 +1,326 @@
+"""
+LLM Response Cache
+Reuses chat completions for repeated generation requests, keyed by model, normalized prompt
+and temperature bucket, in an in-process LRU with an optional disk or Redis tier, and
+coalesces identical requests that are in flight at the same time
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.analysis_cache import normalize_text
+from app.services.single_flight import SingleFlight
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+try:
+    from openai.types.chat import ChatCompletion
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+CACHE_KEY_VERSION = "1"
+
+# The disk tier is pruned after this many writes by one process
+DISK_PRUNE_INTERVAL = 100
+
+# Request parameters that do not change what the model is asked to produce
+UNCACHED_PARAMETERS = {'stream', 'timeout', 'user', 'extra_headers'}
+
+
+def temperature_bucket(temperature: Optional[float]) -> float:
+    """Round a temperature to LLM_CACHE_TEMPERATURE_STEP so nearby settings share entries"""
+    step = settings.LLM_CACHE_TEMPERATURE_STEP
+    value = 1.0 if temperature is None else float(temperature)   # the API default
+    return round(round(value / step) * step, 3) if step > 0 else value
+
+
+def completion_key(params: Dict[str, Any]) -> str:
+    """Cache key from the model, whitespace-normalized messages, temperature bucket and other options"""
+
+    messages = [
+        {'role': message.get('role'), 'content': normalize_text(message.get('content') or '')}
+        for message in params.get('messages', [])
+    ]
+    options = {
+        name: value for name, value in params.items()
+        if name not in UNCACHED_PARAMETERS and name not in ('model', 'messages', 'temperature')
+    }
+    material = json.dumps({
+        'model': params.get('model'),
+        'messages': messages,
+        'temperature': temperature_bucket(params.get('temperature')),
+        'options': options
+    }, ensure_ascii=False, sort_keys=True, default=str)
+    digest = hashlib.sha256(material.encode('utf-8')).hexdigest()
+    return f"llm:{CACHE_KEY_VERSION}:{digest}"
+
+
+class LLMResponseCache:
+    """Expiring LRU of completion payloads with an optional shared tier
+
+    Entries are stored as the completion's JSON so they can be served from any tier and
+    rebuilt into the same response object. ``tier`` is 'memory', 'disk' (one file per
+    entry under ``directory``, shared by workers on one host, at most ``disk_max_entries``
+    files) or 'redis' (shared by all workers). Errors in the shared tier are counted and
+    otherwise ignored.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: int = 7 * 24 * 3600, tier: str = 'memory',
+                 directory: Optional[str] = None, redis_url: Optional[str] = None,
+                 endpoints: Tuple[str, ...] = (), disk_max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_max_entries = disk_max_entries
+        self.endpoints = set(endpoints)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()   # key -> (expiry, payload)
+
+        self.tier = 'memory'
+        self.directory = directory
+        self._redis = None
+        if tier == 'disk' and directory:
+            os.makedirs(directory, exist_ok=True)
+            self.tier = 'disk'
+        elif tier == 'redis' and redis_url and REDIS_AVAILABLE:
+            self._redis = aioredis.from_url(redis_url)
+            self.tier = 'redis'
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.evictions = 0
+        self.disk_writes = 0
+        self.disk_pruned = 0
+        self.shared_errors = 0
+        self.bytes_saved = 0
+        self.tokens_saved = 0
+
+    def enabled_for(self, endpoint: str) -> bool:
+        return '*' in self.endpoints or endpoint in self.endpoints
+
+    async def get(self, key: str) -> Optional[str]:
+        """Cached completion JSON for ``key``, or None (counted as a miss)"""
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._served(entry[1])
+            del self._entries[key]
+
+        payload = await self._shared_get(key)
+        if payload is not None:
+            self.shared_hits += 1
+            self._store(key, payload)
+            return self._served(payload)
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, payload: str):
+        """Store completion JSON in every tier"""
+        self.stores += 1
+        self._store(key, payload)
+        await self._shared_set(key, payload)
+
+    def _served(self, payload: str) -> str:
+        self.bytes_saved += len(payload.encode('utf-8'))
+        try:
+            usage = json.loads(payload).get('usage') or {}
+            self.tokens_saved += usage.get('total_tokens') or 0
+        except (ValueError, AttributeError):
+            pass
+        return payload
+
+    def _store(self, key: str, payload: str):
+        self._entries[key] = (time.time() + self.ttl_seconds, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key.rsplit(':', 1)[-1] + '.json')
+
+    async def _shared_get(self, key: str) -> Optional[str]:
+        try:
+            if self.tier == 'redis':
+                raw = await self._redis.get(key)
+                return raw.decode('utf-8') if isinstance(raw, bytes) else raw
+            if self.tier == 'disk':
+                return await asyncio.to_thread(self._disk_read, self._path(key))
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"LLM cache {self.tier} read failed: {e}")
+        return None
+
+    async def _shared_set(self, key: str, payload: str):
+        try:
+            if self.tier == 'redis':
+                await self._redis.set(key, payload, ex=self.ttl_seconds)
+            elif self.tier == 'disk':
+                await asyncio.to_thread(self._disk_write, self._path(key), payload)
+                self.disk_writes += 1
+                if self.disk_writes % DISK_PRUNE_INTERVAL == 0:
+                    self.disk_pruned += await asyncio.to_thread(self._disk_prune)
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"LLM cache {self.tier} write failed: {e}")
+
+    def _disk_read(self, path: str) -> Optional[str]:
+        try:
+            with open(path, 'r', encoding='utf-8') as entry_file:
+                entry = json.load(entry_file)
+        except FileNotFoundError:
+            return None
+        if entry['expires'] <= time.time():
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            return None
+        return entry['payload']
+
+    def _disk_write(self, path: str, payload: str):
+        # A temp file of its own per writer, so concurrent writes of one key cannot collide
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.directory, suffix='.tmp',
+                                         delete=False) as entry_file:
+            json.dump({'expires': time.time() + self.ttl_seconds, 'payload': payload}, entry_file, ensure_ascii=False)
+        try:
+            os.replace(entry_file.name, path)
+        except OSError:
+            os.remove(entry_file.name)
+            raise
+
+    def _disk_prune(self) -> int:
+        """Delete expired entries, then the oldest beyond disk_max_entries; returns the count
+
+        Entry age is read from the file's modification time, so nothing is parsed. Temp
+        files left by an interrupted write are removed once they are an hour old.
+        """
+        now = time.time()
+        entries = []
+        removed = 0
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                try:
+                    modified = item.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if item.name.endswith('.tmp'):
+                    stale = modified + 3600 <= now
+                elif item.name.endswith('.json'):
+                    stale = modified + self.ttl_seconds <= now
+                    if not stale:
+                        entries.append((modified, item.path))
+                else:
+                    continue
+                if stale:
+                    removed += self._disk_remove(item.path)
+
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.disk_max_entries)]:
+            removed += self._disk_remove(path)
+        return removed
+
+    @staticmethod
+    def _disk_remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+
+    def clear(self):
+        """Drop all in-process entries"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and savings counters"""
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            'tier': self.tier,
+            'endpoints': sorted(self.endpoints),
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'disk_pruned': self.disk_pruned,
+            'shared_errors': self.shared_errors,
+            'bytes_saved': self.bytes_saved,
+            'tokens_saved': self.tokens_saved,
+            'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0
+        }
+
+
+def create_llm_cache() -> LLMResponseCache:
+    """Build the LLM response cache from settings"""
+    return LLMResponseCache(
+        max_entries=settings.LLM_CACHE_SIZE,
+        ttl_seconds=settings.LLM_CACHE_TTL,
+        tier=settings.LLM_CACHE_TIER,
+        directory=settings.LLM_CACHE_DIR,
+        disk_max_entries=settings.LLM_CACHE_DISK_MAX_ENTRIES,
+        redis_url=settings.REDIS_URL,
+        endpoints=tuple(name.strip() for name in settings.LLM_CACHE_ENDPOINTS.split(',') if name.strip())
+    )
+
+
+llm_cache = create_llm_cache()
+llm_flights = SingleFlight()
+COALESCE_ENDPOINTS = {name.strip() for name in settings.LLM_COALESCE_ENDPOINTS.split(',') if name.strip()}
+
+
+def coalesces(endpoint: str) -> bool:
+    return '*' in COALESCE_ENDPOINTS or endpoint in COALESCE_ENDPOINTS or llm_cache.enabled_for(endpoint)
+
+
+async def cached_chat_completion(client: Any, endpoint: str, force_fresh: bool = False, **params) -> Any:
+    """``client.chat.completions.create(**params)`` through the response cache
+
+    Only endpoints listed in LLM_CACHE_ENDPOINTS are cached. ``force_fresh`` skips the
+    lookup but still stores the new completion, so it also refreshes a stale entry.
+    Identical requests to cached or LLM_COALESCE_ENDPOINTS endpoints that arrive while
+    one is already in flight wait for its completion instead of sending their own.
+    """
+
+    if not OPENAI_AVAILABLE or not coalesces(endpoint):
+        return await client.chat.completions.create(**params)
+
+    key = completion_key(params)
+    flight_key = f"{key}:fresh" if force_fresh else key
+    return await llm_flights.run(flight_key, lambda: _fetch_completion(client, endpoint, key, force_fresh, params))
+
+
+async def _fetch_completion(client: Any, endpoint: str, key: str, force_fresh: bool, params: Dict[str, Any]) -> Any:
+    if not llm_cache.enabled_for(endpoint):
+        return await client.chat.completions.create(**params)
+
+    if force_fresh:
+        llm_cache.bypassed += 1
+    else:
+        payload = await llm_cache.get(key)
+        if payload is not None:
+            return ChatCompletion.model_validate_json(payload)
+
+    response = await client.chat.completions.create(**params)
+    await llm_cache.put(key, response.model_dump_json())
+    return response
@@ -0,0 +1,65 @@
+"""
+Shared OpenAI Client
+One application-wide AsyncOpenAI client with a pooled, keep-alive HTTP connection pool,
+handed to routers through a FastAPI dependency; LLM_BACKEND picks what answers it
+"""
+
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.llm_backends import LOCAL_BACKENDS, create_llm_transport
+
+try:
+    from openai import AsyncOpenAI
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+_client: Optional['AsyncOpenAI'] = None
+
+
+def create_openai_client() -> 'AsyncOpenAI':
+    """AsyncOpenAI client on a connection pool sized for concurrent requests"""
+    network = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY
+        )
+    )
+    http_client = httpx.AsyncClient(
+        transport=create_llm_transport(network),
+        timeout=httpx.Timeout(settings.OPENAI_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT)
+    )
+    return AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY or 'local-backend',
+        base_url=settings.OPENAI_BASE_URL or None,
+        max_retries=settings.OPENAI_MAX_RETRIES,
+        http_client=http_client
+    )
+
+
+def openai_configured() -> bool:
+    """Whether LLM calls can be made: an API key, or a backend that does not need one"""
+    return OPENAI_AVAILABLE and (bool(settings.OPENAI_API_KEY) or settings.LLM_BACKEND in LOCAL_BACKENDS)
+
+
+def get_openai_client() -> 'AsyncOpenAI':
+    """Process-wide AsyncOpenAI client, created on first use; usable as a FastAPI dependency"""
+    global _client
+    if not openai_configured():
+        raise HTTPException(status_code=500, detail="OpenAI API key not configured")
+    if _client is None:
+        _client = create_openai_client()
+    return _client
+
+
+async def close_openai_client():
+    """Close the pooled connections; the next request creates a fresh client"""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.close()
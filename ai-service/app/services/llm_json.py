@@ -0,0 +1,277 @@
+"""
+Tolerant JSON Parsing for LLM Output
+Recovers structured data from completions that arrive fenced, with trailing commas or cut
+off mid-document, and validates list items against the content models
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+# Opening brackets tried as the document root before giving up, for completions whose
+# prose contains brackets ("I [think]: {...}")
+MAX_ROOT_CANDIDATES = 8
+
+
+@dataclass
+class ItemSchema:
+    """How the items of one array in a completion are checked
+
+    ``defaults`` fill fields the model requires but the prompt does not ask for, and
+    ``aliases`` map model fields to the key the prompt uses instead (e.g. a grammar
+    rule's ``title`` is returned as ``rule``). Items that still fail validation are
+    dropped; valid items are kept as returned, with the defaults added.
+    """
+    model: Type[BaseModel]
+    defaults: Dict[str, Any] = field(default_factory=dict)
+    aliases: Dict[str, str] = field(default_factory=dict)
+
+    def check(self, item: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(item, dict):
+            return None
+        completed = dict(item)
+        for name, value in self.defaults.items():
+            completed.setdefault(name, value)
+        candidate = dict(completed)
+        for model_field, key in self.aliases.items():
+            if model_field not in candidate and key in candidate:
+                candidate[model_field] = candidate[key]
+        try:
+            self.model.model_validate(candidate)
+        except ValidationError:
+            return None
+        return completed
+
+
+@dataclass
+class ParsedOutput:
+    data: Any = None
+    repaired: bool = False
+    dropped: Dict[str, int] = field(default_factory=dict)   # invalid items removed per section
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class ParseStats:
+    parsed: int = 0
+    repaired: int = 0
+    failed: int = 0
+    items_dropped: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            'parsed': self.parsed,
+            'repaired': self.repaired,
+            'failed': self.failed,
+            'items_dropped': self.items_dropped
+        }
+
+
+parse_stats = ParseStats()
+
+
+def strip_fences(text: str) -> str:
+    """Text between a leading ```/```json fence and its closing fence"""
+    cleaned = text.strip()
+    if cleaned.startswith('```'):
+        cleaned = cleaned.split('\n', 1)[-1] if '\n' in cleaned else cleaned[3:]
+        if '```' in cleaned:
+            cleaned = cleaned.rsplit('```', 1)[0]
+    return cleaned.strip()
+
+
+def _root_starts(text: str) -> List[int]:
+    """Positions of the first MAX_ROOT_CANDIDATES opening brackets in ``text``"""
+    starts = []
+    for index, ch in enumerate(text):
+        if ch in '{[':
+            starts.append(index)
+            if len(starts) == MAX_ROOT_CANDIDATES:
+                break
+    return starts
+
+
+def repair_json(text: str, start: Optional[int] = None) -> Optional[str]:
+    """Best-effort valid JSON for the object or array at ``start`` (default: the first)
+
+    Drops trailing commas and any prose around the document. A document cut off part
+    way is rolled back to the last complete value and its open containers are closed,
+    so a truncated array keeps every element that was fully written. Returns None if
+    ``text`` contains no object or array.
+    """
+
+    if start is None:
+        starts = _root_starts(text)
+        start = starts[0] if starts else -1
+    if start < 0:
+        return None
+
+    out: List[str] = []
+    stack: List[str] = []          # closing characters of the open containers
+    expect_key: List[bool] = []    # per open container: is the next string an object key
+    in_item: List[bool] = []       # per open container: is it an object inside an array
+    checkpoint: Tuple[int, Tuple[str, ...]] = (0, ())
+    in_string = escape = False
+
+    def mark():
+        # Half-written array elements are dropped whole rather than kept partially filled
+        nonlocal checkpoint
+        if not any(in_item):
+            checkpoint = (len(out), tuple(stack))
+
+    for ch in text[start:]:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+                if expect_key[-1]:
+                    expect_key[-1] = False
+                else:
+                    mark()
+            continue
+
+        if ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch in '{[':
+            in_item.append(ch == '{' and bool(stack) and stack[-1] == ']')
+            out.append(ch)
+            stack.append('}' if ch == '{' else ']')
+            expect_key.append(ch == '{')
+            mark()
+        elif ch in '}]':
+            if not stack:
+                break
+            _drop_trailing_comma(out)
+            out.append(stack.pop())
+            expect_key.pop()
+            in_item.pop()
+            if not stack:
+                return ''.join(out)
+            mark()
+        elif ch == ',':
+            mark()
+            out.append(ch)
+            if stack[-1] == '}':
+                expect_key[-1] = True
+        else:
+            out.append(ch)
+
+    # Truncated: keep everything up to the last complete value and close what is open
+    length, open_containers = checkpoint
+    del out[length:]
+    for closer in reversed(open_containers):
+        _drop_trailing_comma(out)
+        out.append(closer)
+    return ''.join(out)
+
+
+def _drop_trailing_comma(out: List[str]):
+    end = len(out)
+    while end and out[end - 1].isspace():
+        end -= 1
+    if end and out[end - 1] == ',':
+        del out[end - 1:]
+
+
+def _section(data: Any, path: Tuple[str, ...]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Container and key of the array at ``path``, if present"""
+    parent = data
+    for key in path[:-1]:
+        parent = parent.get(key) if isinstance(parent, dict) else None
+    if isinstance(parent, dict) and isinstance(parent.get(path[-1]), list):
+        return parent, path[-1]
+    return None, None
+
+
+def _repaired_root(text: str, expect: type) -> Any:
+    """First repairable document in ``text``, preferring one of the ``expect`` type
+
+    Later opening brackets are tried when an earlier one does not start a document, so
+    brackets in prose before the JSON are skipped ("I [think]: {...}", "see [1]: {...}").
+    Brackets inside a document already decoded are not tried on their own, and a
+    document that needed repair is taken to run to the end of the text.
+    """
+    decoder = json.JSONDecoder()
+    fallback = None
+    decoded_until = -1
+    for start in _root_starts(text):
+        if start < decoded_until:
+            continue
+        try:
+            data, end = decoder.raw_decode(text, start)
+        except ValueError:
+            try:
+                data, end = json.loads(repair_json(text, start)), len(text)
+            except ValueError:
+                continue
+        if isinstance(data, expect):
+            return data
+        if fallback is None:
+            fallback = data
+        decoded_until = end
+    return fallback
+
+
+def parse_llm_json(content: Optional[str], expect: type = dict, required: Sequence[str] = (),
+                   sections: Optional[Dict[Tuple[str, ...], ItemSchema]] = None) -> ParsedOutput:
+    """Structured data from a completion, repairing it instead of asking for a new one
+
+    ``expect`` is the type of the root value and ``required`` lists keys a dict root
+    must have. ``sections`` maps key paths of arrays to the schema their items must
+    match (use ``()`` for a root array); invalid items are removed and counted.
+    """
+
+    result = ParsedOutput()
+    text = strip_fences(content or '')
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = _repaired_root(text, expect)
+        if data is None:
+            parse_stats.failed += 1
+            result.error = "No JSON document found in the completion"
+            return result
+        result.repaired = True
+
+    if not isinstance(data, expect):
+        parse_stats.failed += 1
+        result.error = f"Expected a JSON {expect.__name__}, got {type(data).__name__}"
+        return result
+    missing = [key for key in required if key not in data]
+    if missing:
+        parse_stats.failed += 1
+        result.error = f"Missing keys: {', '.join(missing)}"
+        return result
+
+    for path, schema in (sections or {}).items():
+        if path:
+            parent, key = _section(data, path)
+            items = parent[key] if parent is not None else None
+        else:
+            items = data if isinstance(data, list) else None
+        if items is None:
+            continue
+        kept = [checked for checked in map(schema.check, items) if checked is not None]
+        if len(kept) != len(items):
+            result.dropped['.'.join(path) or 'items'] = len(items) - len(kept)
+            parse_stats.items_dropped += len(items) - len(kept)
+        if path:
+            parent[key] = kept
+        else:
+            data[:] = kept
+
+    parse_stats.parsed += 1
+    parse_stats.repaired += result.repaired
+    result.data = data
+    return result
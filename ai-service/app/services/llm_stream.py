@@ -0,0 +1,331 @@
+"""
+Streaming LLM Generation
+Forwards chat completion tokens as server-sent events and picks complete items out of the
+partial JSON document as soon as each one has been streamed
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.services.llm_cache import completion_key, llm_cache
+from app.services.llm_json import MAX_ROOT_CANDIDATES, ItemSchema, parse_llm_json
+from app.services.prompt_budget import MESSAGE_OVERHEAD_TOKENS, count_tokens
+
+try:
+    from openai.types.chat import ChatCompletion
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+
+@dataclass
+class StreamItem:
+    section: str
+    index: int
+    value: Any
+
+
+@dataclass
+class _Frame:
+    kind: str                 # 'object' or 'array'
+    path: Tuple[str, ...]     # keys leading to this container; '*' for an array inside an array
+    start: int
+    key: Optional[str] = None
+    expect_key: bool = False
+
+
+# Characters that may follow the opening bracket of a JSON document, ignoring whitespace
+ROOT_FIRST_CHARS = {'object': set('"}'), 'array': set('{["-0123456789tfn]')}
+
+
+class IncrementalJSONParser:
+    """Emits elements of chosen arrays while a JSON document is still arriving
+
+    ``sections`` maps key paths to section names, e.g. ``{('vocabulary',): 'vocabulary'}``
+    for the items of a top-level "vocabulary" array. Text before the root (a markdown
+    fence or a sentence of preamble) and after it is ignored. The root is an object
+    unless a section path starts at the root array (``()`` or ``('*', ...)``); a bracket
+    that does not begin a valid document of that kind ("Here is [the] lesson: {...}")
+    is skipped, trying at most MAX_ROOT_CANDIDATES brackets as parse_llm_json does.
+    Each character is scanned once, apart from the few characters of a rejected root;
+    an element is decoded only when its closing character arrives.
+    """
+
+    def __init__(self, sections: Dict[Tuple[str, ...], str]):
+        self.sections = sections
+        self.counts: Dict[str, int] = {}
+        self._root_char = '[' if any(not path or path[0] == '*' for path in sections) else '{'
+        self._text = ''
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._scalar_start: Optional[int] = None
+        self._seen_root = False
+        self._roots_tried = 0
+        self._root_checked = False
+        self._counts_before_root: Dict[str, int] = {}
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def feed(self, chunk: str) -> List[StreamItem]:
+        """Add streamed text and return the items it completed"""
+
+        self._text += chunk
+        text = self._text
+        items: List[StreamItem] = []
+
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._string_closed(self._string_start, i + 1, items)
+                i += 1
+                continue
+
+            if not self._stack:
+                if not self._seen_root and ch == self._root_char and self._roots_tried < MAX_ROOT_CANDIDATES:
+                    self._seen_root = True
+                    self._roots_tried += 1
+                    self._root_checked = False
+                    self._counts_before_root = dict(self.counts)
+                    self._open(ch, i)
+                i += 1
+                continue
+
+            if not self._root_checked and not ch.isspace():
+                if ch not in ROOT_FIRST_CHARS[self._stack[0].kind]:
+                    i = self._reject_root()
+                    continue
+                self._root_checked = True
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in '{[':
+                self._open(ch, i)
+            elif ch in '}]':
+                self._end_scalar(i, items)
+                frame = self._stack.pop()
+                if not self._stack and not self._is_document(frame.start, i + 1):
+                    self._stack.append(frame)
+                    i = self._reject_root()
+                    continue
+                self._value_done(frame.start, i + 1, items)
+            elif ch == ':':
+                self._stack[-1].expect_key = False
+            elif ch == ',':
+                self._end_scalar(i, items)
+                if self._stack[-1].kind == 'object':
+                    self._stack[-1].expect_key = True
+            elif not ch.isspace() and self._scalar_start is None:
+                self._scalar_start = i
+            i += 1
+
+        self._pos = len(text)
+        return items
+
+    def _is_document(self, start: int, end: int) -> bool:
+        try:
+            json.loads(self._text[start:end])
+        except ValueError:
+            return False
+        return True
+
+    def _reject_root(self) -> int:
+        """Forget the current root and return the position to resume scanning from"""
+        start = self._stack[0].start
+        self._stack.clear()
+        self._in_string = self._escape = False
+        self._scalar_start = None
+        self._seen_root = False
+        self.counts = self._counts_before_root
+        return start + 1
+
+    def _open(self, ch: str, start: int):
+        parent = self._stack[-1] if self._stack else None
+        if parent is None:
+            path = ()
+        elif parent.kind == 'object':
+            path = parent.path + (parent.key,)
+        else:
+            path = parent.path + ('*',)
+        kind = 'object' if ch == '{' else 'array'
+        self._stack.append(_Frame(kind=kind, path=path, start=start, expect_key=kind == 'object'))
+
+    def _string_closed(self, start: int, end: int, items: List[StreamItem]):
+        frame = self._stack[-1]
+        if frame.kind == 'object' and frame.expect_key:
+            frame.key = json.loads(self._text[start:end])
+        else:
+            self._value_done(start, end, items)
+
+    def _end_scalar(self, end: int, items: List[StreamItem]):
+        if self._scalar_start is not None:
+            start, self._scalar_start = self._scalar_start, None
+            self._value_done(start, end, items)
+
+    def _value_done(self, start: int, end: int, items: List[StreamItem]):
+        if not self._stack or self._stack[-1].kind != 'array':
+            return
+        section = self.sections.get(self._stack[-1].path)
+        if section is None:
+            return
+        try:
+            value = json.loads(self._text[start:end])
+        except ValueError:
+            return
+        index = self.counts.get(section, 0)
+        self.counts[section] = index + 1
+        items.append(StreamItem(section=section, index=index, value=value))
+
+
+def sse_event(event: str, data: Any) -> str:
+    """One server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+async def stream_chat_completion(client: Any, endpoint: str, force_fresh: bool = False,
+                                 **params) -> AsyncIterator[str]:
+    """Content deltas of ``client.chat.completions.create(stream=True, **params)``
+
+    Endpoints in LLM_CACHE_ENDPOINTS share the response cache with their non-streaming
+    versions: a cached completion is replayed as a single delta, and a stream that
+    finishes normally is stored as a completion with the usage the API reports (or a
+    local estimate when it reports none).
+    """
+
+    cached = OPENAI_AVAILABLE and llm_cache.enabled_for(endpoint)
+    key = completion_key(params) if cached else None
+    if cached:
+        if force_fresh:
+            llm_cache.bypassed += 1
+        else:
+            payload = await llm_cache.get(key)
+            if payload is not None:
+                yield ChatCompletion.model_validate_json(payload).choices[0].message.content or ''
+                return
+
+    stream = await client.chat.completions.create(stream=True, stream_options={'include_usage': True}, **params)
+    parts: List[str] = []
+    first_chunk = None
+    finish_reason = None
+    usage = None
+    async for chunk in stream:
+        first_chunk = first_chunk or chunk
+        usage = getattr(chunk, 'usage', None) or usage
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        finish_reason = choice.finish_reason or finish_reason
+        if choice.delta.content:
+            parts.append(choice.delta.content)
+            yield choice.delta.content
+
+    # Truncated or abandoned generations are not worth replaying
+    if cached and first_chunk is not None and finish_reason == 'stop':
+        content = ''.join(parts)
+        if usage is not None:
+            usage = usage.model_dump() if hasattr(usage, 'model_dump') else dict(usage)
+        else:
+            # Servers that ignore stream_options send no usage; store a local estimate
+            prompt_tokens = sum(count_tokens(message.get('content') or '') + MESSAGE_OVERHEAD_TOKENS
+                                for message in params.get('messages', []))
+            completion_tokens = count_tokens(content)
+            usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                     'total_tokens': prompt_tokens + completion_tokens}
+        completion = ChatCompletion.model_validate({
+            'id': first_chunk.id,
+            'object': 'chat.completion',
+            'created': first_chunk.created,
+            'model': first_chunk.model,
+            'choices': [{
+                'index': 0,
+                'finish_reason': finish_reason,
+                'message': {'role': 'assistant', 'content': content}
+            }],
+            'usage': usage
+        })
+        await llm_cache.put(key, completion.model_dump_json())
+
+
+@dataclass
+class StreamTimings:
+    started: float = field(default_factory=time.perf_counter)
+    first_token_ms: Optional[float] = None
+    first_item_ms: Optional[float] = None
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+
+async def sse_json_generation(deltas: AsyncIterator[str], sections: Dict[Tuple[str, ...], str],
+                              metadata: Dict[str, Any],
+                              schemas: Optional[Dict[Tuple[str, ...], ItemSchema]] = None,
+                              required: Tuple[str, ...] = ()) -> AsyncIterator[str]:
+    """SSE stream of a JSON-producing generation
+
+    Emits ``token`` events with the raw text, an ``item`` event for every element of
+    ``sections`` as soon as it is complete, then ``done`` with the parsed (or repaired)
+    document, the counts per section, ``metadata`` and timings. Items are checked
+    against ``schemas`` and the document against ``required`` as the non-streaming
+    endpoints check them: invalid items are not sent and are left out of the document.
+    Failures after the stream has started are reported as an ``error`` event.
+    """
+
+    schemas = schemas or {}
+    section_schemas = {sections[path]: schema for path, schema in schemas.items() if path in sections}
+    parser = IncrementalJSONParser(sections)
+    counts: Dict[str, int] = {}
+    timings = StreamTimings()
+    try:
+        async for delta in deltas:
+            if timings.first_token_ms is None:
+                timings.first_token_ms = timings.elapsed_ms()
+            yield sse_event('token', {'text': delta})
+            for item in parser.feed(delta):
+                value = item.value
+                schema = section_schemas.get(item.section)
+                if schema is not None:
+                    value = schema.check(value)
+                    if value is None:
+                        continue
+                index = counts.get(item.section, 0)
+                counts[item.section] = index + 1
+                if timings.first_item_ms is None:
+                    timings.first_item_ms = timings.elapsed_ms()
+                yield sse_event('item', {'section': item.section, 'index': index, 'value': value})
+    except Exception as e:
+        print(f"Error in streamed generation: {str(e)}")
+        yield sse_event('error', {'detail': str(e)})
+        return
+
+    done: Dict[str, Any] = {'items': counts, 'metadata': metadata}
+    # A cut-off or malformed document is repaired rather than regenerated
+    parsed = parse_llm_json(parser.text, required=required, sections=schemas)
+    done['document'] = parsed.data
+    done['json_repaired'] = parsed.repaired
+    done['invalid_items_dropped'] = parsed.dropped
+    if not parsed.ok:
+        done['content'] = parser.text
+        done['parse_error'] = parsed.error
+    done['timings'] = {
+        'first_token_ms': timings.first_token_ms,
+        'first_item_ms': timings.first_item_ms,
+        'total_ms': timings.elapsed_ms()
+    }
+    yield sse_event('done', done)
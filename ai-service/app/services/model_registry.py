@@ -0,0 +1,165 @@
+"""
+Shared NLP Model Registry
+Loads spaCy, NLTK and analyzer resources once per process, lazily or on an explicit warm-up
+"""
+
+import os
+import resource
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from app.services.bilingual_dictionary import load_dictionary
+
+try:
+    import spacy
+    SPACY_AVAILABLE = True
+except ImportError:
+    SPACY_AVAILABLE = False
+
+try:
+    import nltk
+    from nltk.tokenize import sent_tokenize
+    NLTK_AVAILABLE = True
+except ImportError:
+    NLTK_AVAILABLE = False
+
+BASIC_TURKISH_STOPWORDS = {'ve', 'bir', 'bu', 'da', 'de', 'ile', 'için', 'var', 'olan', 'gibi'}
+
+# A loader returns the model plus a short description of what was actually loaded
+Loader = Callable[[], Tuple[Any, str]]
+
+
+@dataclass
+class ModelInfo:
+    """Load diagnostics for one registered model"""
+    name: str
+    description: str
+    loaded: bool = False
+    source: Optional[str] = None
+    load_seconds: Optional[float] = None
+    resident_bytes: Optional[int] = None   # RSS growth while loading, including first-time dependencies
+    error: Optional[str] = None
+
+
+def _current_rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # No procfs (e.g. macOS): fall back to peak RSS, which only ever grows
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class ModelRegistry:
+    """Process-wide, thread-safe registry of lazily loaded models
+
+    Each model is loaded at most once, on the first ``get`` or by ``warm_up``. A loader
+    that raises is recorded in the diagnostics and the model resolves to None, so callers
+    fall back the same way they do when the library is not installed.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Loader] = {}
+        self._models: Dict[str, Any] = {}
+        self._info: Dict[str, ModelInfo] = {}
+        self._lock = threading.RLock()   # re-entrant: loaders may get() their dependencies
+
+    def register(self, name: str, loader: Loader, description: str = ""):
+        with self._lock:
+            self._loaders[name] = loader
+            self._info[name] = ModelInfo(name=name, description=description)
+
+    def get(self, name: str) -> Any:
+        """Return a model, loading it on first use"""
+        if name in self._models:
+            return self._models[name]
+
+        with self._lock:
+            if name not in self._models:
+                self._load(name)
+            return self._models[name]
+
+    def _load(self, name: str):
+        info = self._info[name]
+        rss_before = _current_rss()
+        started = time.perf_counter()
+
+        try:
+            model, info.source = self._loaders[name]()
+        except Exception as e:
+            print(f"Error loading model '{name}': {e}")
+            model, info.error = None, str(e)
+
+        info.load_seconds = time.perf_counter() - started
+        info.resident_bytes = max(0, _current_rss() - rss_before)
+        info.loaded = model is not None
+        self._models[name] = model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, ModelInfo]:
+        """Eagerly load the given models (all registered models by default)"""
+        for name in list(names if names is not None else self._loaders):
+            if name not in self._loaders:
+                print(f"Unknown model '{name}' requested for warm-up")
+                continue
+            self.get(name)
+        return dict(self._info)
+
+    def diagnostics(self) -> Dict[str, Any]:
+        """Per-model load state, load time and resident size"""
+        models = [asdict(info) for info in self._info.values()]
+        return {
+            'models': models,
+            'loaded': sum(1 for info in self._info.values() if info.loaded),
+            'registered': len(models),
+            'process_rss_bytes': _current_rss()
+        }
+
+
+def _load_spacy() -> Tuple[Any, str]:
+    """Turkish pipeline, falling back to English and then to a blank Turkish pipeline"""
+    if not SPACY_AVAILABLE:
+        return None, 'spacy not installed'
+    for model_name in ('tr_core_news_sm', 'en_core_web_sm'):
+        try:
+            return spacy.load(model_name), model_name
+        except OSError:
+            continue
+    return spacy.blank('tr'), 'blank:tr'
+
+
+def _load_sentence_tokenizer() -> Tuple[Any, str]:
+    """NLTK sentence splitter, downloading the punkt data on first use if necessary"""
+    if not NLTK_AVAILABLE:
+        return None, 'nltk not installed'
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        print("Downloading NLTK punkt tokenizer...")
+        nltk.download('punkt', quiet=True)
+    return sent_tokenize, 'nltk:punkt'
+
+
+def _load_turkish_stopwords() -> Tuple[Any, str]:
+    if NLTK_AVAILABLE:
+        try:
+            from nltk.corpus import stopwords
+            nltk.data.find('corpora/stopwords')
+            return set(stopwords.words('turkish')), 'nltk:stopwords'
+        except LookupError:
+            print("Turkish stopwords not available, using basic set")
+    return set(BASIC_TURKISH_STOPWORDS), 'basic'
+
+
+model_registry = ModelRegistry()
+model_registry.register('spacy', _load_spacy, "spaCy pipeline (tr_core_news_sm, else en_core_web_sm, else blank)")
+model_registry.register('sentence_tokenizer', _load_sentence_tokenizer, "NLTK punkt sentence tokenizer")
+model_registry.register('turkish_stopwords', _load_turkish_stopwords, "Turkish stopword list")
+model_registry.register('bilingual_dictionary', load_dictionary, "Memory-mapped Turkish-English dictionary")
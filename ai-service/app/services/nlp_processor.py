@@ -1,79 +1,98 @@
 # import openai
 # import spacy
 # import nltk
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import asyncio
+import itertools
+import json
 import re
 import random
 from collections import Counter
 from app.models.content import CEFRLevel, VocabularyItem, GrammarRule, Exercise
 from app.core.config import settings
-from app.services.cefr_analyzer import CEFRAnalyzer
-
-# NLP libraries
-try:
-    import spacy
-    import nltk
-    from nltk.tokenize import word_tokenize, sent_tokenize
-    from nltk.corpus import stopwords
-    SPACY_AVAILABLE = True
-    NLTK_AVAILABLE = True
-except ImportError:
-    SPACY_AVAILABLE = False
-    NLTK_AVAILABLE = False
+from app.services.bilingual_dictionary import DictionaryEntry, curriculum_entries
+from app.services.cefr_analyzer import ANALYZER_VERSION, CEFRAnalyzer
+from app.services.analysis_cache import content_key, create_analysis_cache
+from app.services.cpu_executor import cpu_executor, run_cpu_bound
+from app.services.distractor_index import DistractorIndex, part_of_speech
+from app.services.lexicon_index import CURRICULUM_LEVEL, MAX_PHRASE_WORDS
+from app.services.llm_client import get_openai_client, openai_configured
+from app.services.llm_json import parse_llm_json
+from app.services.model_registry import model_registry
+from app.services.prompt_budget import compact_text
+from app.services.text_document import TokenizedDocument, turkish_lower
+
+# spaCy components each bulk task can do without (vocabulary needs lemmas, not entities)
+PIPE_DISABLED_COMPONENTS = {
+    'vocabulary': ('ner', 'parser', 'textcat'),
+    'analysis': ('ner', 'tagger', 'morphologizer', 'lemmatizer', 'attribute_ruler', 'textcat'),
+}
+
+# Characters of text around each evenly spaced point fill-in-the-blank sentences are
+# picked from; longer texts are sampled instead of tokenized whole
+FILL_BLANK_WINDOW_CHARS = 2000
+SENTENCE_BREAK_PATTERN = re.compile(r"[.!?…]\s")
+
+
+def _encode_models(models) -> List[Dict]:
+    return [model.model_dump(mode="json") for model in models]
+
+
+def _decode_vocabulary(payload) -> List[VocabularyItem]:
+    return [VocabularyItem(**item) for item in payload]
+
 
 class NLPProcessor:
     """Simplified NLP processing for Turkish language content"""
 
     def __init__(self):
-        # TODO: Initialize OpenAI client when API key is available
-        self.openai_client = None
-        self.nlp = None
-        self.turkish_stopwords = set()
-        self.cefr_analyzer = None
-
-        # Initialize spaCy if available
-        if SPACY_AVAILABLE:
-            try:
-                # Try to load Turkish model, fallback to English if not available
-                try:
-                    self.nlp = spacy.load("tr_core_news_sm")
-                except OSError:
-                    try:
-                        self.nlp = spacy.load("en_core_web_sm")
-                    except OSError:
-                        # Create blank model if no models available
-                        self.nlp = spacy.blank("tr")
-            except Exception as e:
-                print(f"Error initializing spaCy: {e}")
+        # Initialize CEFR analyzer
+        self.cefr_analyzer = CEFRAnalyzer()
 
-        # Initialize NLTK if available
-        if NLTK_AVAILABLE:
-            try:
-                # Download required NLTK data if not present
-                try:
-                    nltk.data.find('tokenizers/punkt')
-                except LookupError:
-                    print("Downloading NLTK punkt tokenizer...")
-                    nltk.download('punkt', quiet=True)
-
-                try:
-                    nltk.data.find('corpora/stopwords')
-                    self.turkish_stopwords = set(stopwords.words('turkish'))
-                except LookupError:
-                    print("Turkish stopwords not available, using basic set")
-                    self.turkish_stopwords = {'ve', 'bir', 'bu', 'da', 'de', 'ile', 'için', 'var', 'olan', 'gibi'}
-            except Exception as e:
-                print(f"Error initializing NLTK: {e}")
+        # Results keyed by content hash, so repeated content skips re-analysis
+        self.analysis_cache = create_analysis_cache()
 
-        # Initialize CEFR analyzer
-        self.cefr_analyzer = CEFRAnalyzer(self.nlp)
+    # spaCy and NLTK resources come from the shared registry and load on first use
+    @property
+    def nlp(self):
+        return model_registry.get('spacy')
+
+    @property
+    def turkish_stopwords(self):
+        return model_registry.get('turkish_stopwords')
+
+    @property
+    def distractor_index(self) -> Optional[DistractorIndex]:
+        return model_registry.get('distractor_index')
+
+    async def _offload(self, method: str, *args):
+        """Run a synchronous method on the CPU executor, keeping the event loop free
+
+        A process pool cannot receive this instance, so there the method runs on the
+        worker's own shared processor.
+        """
+        if cpu_executor.is_process_pool:
+            return await run_cpu_bound(_call_shared_processor, method, *args)
+        return await run_cpu_bound(getattr(self, method), *args)
     
     async def analyze_text_difficulty(self, text: str) -> Tuple[CEFRLevel, float]:
         """Analyze text and determine CEFR level with confidence score using enhanced analyzer"""
 
+        return await self.analysis_cache.get_or_compute(
+            content_key("difficulty", text, ANALYZER_VERSION),
+            lambda: self._analyze_text_difficulty(text),
+            encode=lambda result: [result[0].value, result[1]],
+            decode=lambda payload: (CEFRLevel(payload[0]), payload[1])
+        )
+
+    async def _analyze_text_difficulty(self, text: str) -> Tuple[CEFRLevel, float]:
+        """Uncached difficulty analysis"""
+        return await self._offload('_analyze_text_difficulty_sync', text)
+
+    def _analyze_text_difficulty_sync(self, text: str) -> Tuple[CEFRLevel, float]:
         if self.cefr_analyzer:
             try:
-                level, confidence, detailed_metrics = await self.cefr_analyzer.analyze_cefr_level(text)
+                level, confidence, detailed_metrics = self.cefr_analyzer.analyze_cefr_level_sync(text)
                 return level, confidence
             except Exception as e:
                 print(f"Error in enhanced CEFR analysis: {e}")
@@ -100,16 +119,114 @@ class NLPProcessor:
     async def extract_vocabulary(self, text: str, target_level: CEFRLevel, max_items: int = 20) -> List[VocabularyItem]:
         """Extract key vocabulary items from text - simplified version"""
 
-        # Simple word extraction
-        words = text.lower().split()
-        word_freq = Counter(words)
+        items = await self.analysis_cache.get_or_compute(
+            content_key("vocabulary", text, ANALYZER_VERSION, (target_level.value, max_items)),
+            lambda: self._extract_vocabulary(text, target_level, max_items),
+            encode=_encode_models,
+            decode=_decode_vocabulary
+        )
+        return list(items)
+
+    async def extract_vocabulary_many(self, texts: Sequence[str], target_levels: Sequence[CEFRLevel],
+                                      max_items: Sequence[int], batch_size: Optional[int] = None,
+                                      n_process: Optional[int] = None) -> List[List[VocabularyItem]]:
+        """Extract vocabulary from many texts, tokenizing all cache misses in one pipe
+
+        ``target_levels`` and ``max_items`` give the settings of each text. Results are in
+        input order and share the cache with ``extract_vocabulary``.
+        """
 
-        # Filter meaningful words (length > 2, alphabetic)
-        meaningful_words = [word for word in word_freq.keys() if len(word) > 2 and word.isalpha()]
+        keys = [
+            content_key("vocabulary", text, ANALYZER_VERSION, (level.value, limit))
+            for text, level, limit in zip(texts, target_levels, max_items)
+        ]
+        results = [await self.analysis_cache.get(key, decode=_decode_vocabulary) for key in keys]
+
+        missing = [index for index, items in enumerate(results) if items is None]
+        if missing:
+            computed = await self._offload(
+                '_vocabulary_many_sync',
+                [texts[index] for index in missing],
+                [target_levels[index] for index in missing],
+                [max_items[index] for index in missing],
+                batch_size, n_process
+            )
+            for index, items in zip(missing, computed):
+                await self.analysis_cache.put(keys[index], items, encode=_encode_models)
+                results[index] = items
+
+        return [list(items) for items in results]
+
+    def _vocabulary_many_sync(self, texts: Sequence[str], target_levels: Sequence[CEFRLevel],
+                              max_items: Sequence[int], batch_size: Optional[int],
+                              n_process: Optional[int]) -> List[List[VocabularyItem]]:
+        documents = self.tokenize_many(texts, 'vocabulary', batch_size, n_process)
+        return [
+            self._vocabulary_from_document(document, level, limit)
+            for document, level, limit in zip(documents, target_levels, max_items)
+        ]
+
+    def tokenize_many(self, texts: Sequence[str], task: str = 'vocabulary', batch_size: Optional[int] = None,
+                      n_process: Optional[int] = None) -> List[TokenizedDocument]:
+        """Tokenize many texts at once, through spaCy's ``nlp.pipe`` when a pipeline is loaded
+
+        Components listed for ``task`` in PIPE_DISABLED_COMPONENTS are switched off for the
+        run. Without spaCy every text goes through the built-in regex tokenizer.
+        """
+
+        nlp = self.nlp
+        if nlp is None:
+            return [self.cefr_analyzer.tokenize(text) for text in texts]
+
+        disabled = [name for name in PIPE_DISABLED_COMPONENTS.get(task, ()) if name in nlp.pipe_names]
+        stopwords = self.cefr_analyzer.turkish_stopwords
+        documents = nlp.pipe(
+            texts,
+            batch_size=batch_size or settings.SPACY_BATCH_SIZE,
+            n_process=n_process or settings.SPACY_N_PROCESS,
+            disable=disabled
+        )
+        return [TokenizedDocument.from_spacy(document, stopwords) for document in documents]
+
+    async def _extract_vocabulary(self, text: str, target_level: CEFRLevel, max_items: int) -> List[VocabularyItem]:
+        """Uncached vocabulary extraction"""
+        return await self._offload('_extract_vocabulary_sync', text, target_level, max_items)
+
+    def _extract_vocabulary_sync(self, text: str, target_level: CEFRLevel, max_items: int) -> List[VocabularyItem]:
+        document = self.tokenize_many([text], 'vocabulary')[0]
+        return self._vocabulary_from_document(document, target_level, max_items)
+
+    def _vocabulary_from_document(self, document: TokenizedDocument, target_level: CEFRLevel,
+                                  max_items: int) -> List[VocabularyItem]:
+        """Vocabulary items of one tokenized document"""
+
+        # Group inflected forms under their dictionary form (kitabı, kitaplar -> kitap)
+        lexicon = self.cefr_analyzer.lexicon
+        lemmas = document.lemmas or document.tokens
+        words = []
+        word_freq = Counter()
+        surface_forms: Dict[str, Counter] = {}
+        for word, lemma in zip(document.tokens, lemmas):
+            if not word.isalpha():
+                continue
+            # A lemmatizer's answer wins when it names a lexicon entry
+            key = lemma if lemma != word and lemma in lexicon else self._vocabulary_key(word)
+            words.append(word)
+            word_freq[key] += 1
+            surface_forms.setdefault(key, Counter())[word] += 1
+
+        # Lexicon entries are shown as listed; unknown stems by their most frequent form
+        headwords = {
+            key: key if key in lexicon else forms.most_common(1)[0][0]
+            for key, forms in surface_forms.items()
+        }
+
+        # Filter meaningful words (length > 2)
+        meaningful_words = [key for key in word_freq.keys() if len(headwords[key]) > 2]
 
         vocabulary_items = []
 
-        # Create sample vocabulary items (mock data for now)
+        # Fallbacks for words the bilingual dictionary does not cover
         sample_translations = {
             "merhaba": "hello",
             "teşekkür": "thank you",
@@ -121,21 +238,199 @@ class NLPProcessor:
             "küçük": "small"
         }
 
-        for word in meaningful_words[:max_items]:
-            translation = sample_translations.get(word, f"translation of {word}")
+        for key in meaningful_words[:max_items]:
+            word = headwords[key]
+            entry = self.lookup_translation(word)
+            if entry is not None:
+                translation = entry.english
+            else:
+                translation = sample_translations.get(word, f"translation of {word}")
             vocabulary_items.append(VocabularyItem(
                 turkish=word,
                 english=translation,
-                example_sentence=f"{word} örnek cümle.",
+                pronunciation=entry.pronunciation if entry else None,
+                example_sentence=entry.example if entry and entry.example else f"{word} örnek cümle.",
                 difficulty_level=target_level,
-                frequency_score=word_freq[word] / len(words)
+                frequency_score=word_freq[key] / len(words)
             ))
 
         return vocabulary_items[:max_items]
+
+    def lookup_translation(self, word: str) -> Optional[DictionaryEntry]:
+        """Dictionary entry for a word or phrase, trying its dictionary forms (kitabı -> kitap)"""
+
+        dictionary = model_registry.get('bilingual_dictionary')
+        if dictionary is None:
+            return None
+
+        word = turkish_lower(word.strip())
+        entry = dictionary.lookup(word)
+        if entry is None and word.isalpha():
+            for candidate in self.cefr_analyzer.stemmer.lemma_candidates(word):
+                entry = dictionary.lookup(candidate)
+                if entry is not None:
+                    break
+        return entry
+
+    async def describe_words(self, words: Sequence[str], target_level: CEFRLevel) -> List[VocabularyItem]:
+        """Translation, example and pronunciation for each word, in input order
+
+        Dictionary hits are answered locally. The remaining words go to the LLM in one
+        batched JSON request; words the batch leaves out or garbles are retried with
+        per-word calls, at most VOCABULARY_LLM_CONCURRENCY at a time. Words that still
+        have no translation are dropped.
+        """
+
+        items: List[Optional[VocabularyItem]] = [None] * len(words)
+        missing = []
+        for index, word in enumerate(words):
+            entry = self.lookup_translation(word)
+            if entry is not None:
+                items[index] = VocabularyItem(
+                    turkish=word,
+                    english=entry.english,
+                    pronunciation=entry.pronunciation,
+                    example_sentence=entry.example,
+                    difficulty_level=target_level
+                )
+            else:
+                missing.append(index)
+
+        if missing:
+            batched = await self._describe_words_batched([words[index] for index in missing], target_level)
+            retry = []
+            for index in missing:
+                item = batched.get(turkish_lower(words[index].strip()))
+                if item is not None:
+                    items[index] = item.model_copy(update={'turkish': words[index]})
+                else:
+                    retry.append(index)
+
+            limit = asyncio.Semaphore(max(1, settings.VOCABULARY_LLM_CONCURRENCY))
+
+            async def describe(index: int):
+                async with limit:
+                    items[index] = await self._describe_word(words[index], target_level)
+
+            await asyncio.gather(*(describe(index) for index in retry))
+
+        return [item for item in items if item is not None]
+
+    async def _describe_words_batched(self, words: Sequence[str],
+                                      target_level: CEFRLevel) -> Dict[str, VocabularyItem]:
+        """One LLM request for many words, keyed by lowercased Turkish word"""
+
+        prompt = f"""
+        For each of these Turkish words, give an English translation, a simple
+        {target_level.value} level Turkish example sentence and a pronunciation guide.
+        Words: {json.dumps(list(words), ensure_ascii=False)}
+
+        Answer with only a JSON array, one object per word, in the same order:
+        [{{"turkish": "word", "english": "translation", "example": "sentence", "pronunciation": "guide"}}]
+        """
+
+        try:
+            response = await self._call_openai(prompt, max_tokens=60 * len(words) + 20)
+        except Exception as e:
+            print(f"Batched vocabulary request failed, falling back to per-word calls: {e}")
+            return {}
+
+        # A truncated array still yields the records written before the cut-off
+        parsed = parse_llm_json(response, expect=list)
+        if not parsed.ok:
+            print(f"Batched vocabulary response unusable, falling back to per-word calls: {parsed.error}")
+            return {}
+
+        results = {}
+        for record in parsed.data:
+            if not isinstance(record, dict):
+                continue
+            turkish, english = record.get('turkish'), record.get('english')
+            if not isinstance(turkish, str) or not isinstance(english, str) or not english.strip():
+                continue
+            results[turkish_lower(turkish.strip())] = VocabularyItem(
+                turkish=turkish.strip(),
+                english=english.strip(),
+                pronunciation=record.get('pronunciation') or None,
+                example_sentence=record.get('example') or None,
+                difficulty_level=target_level
+            )
+        return results
+
+    async def _describe_word(self, word: str, target_level: CEFRLevel) -> Optional[VocabularyItem]:
+        """Single-word LLM request in the line-based format"""
+
+        prompt = f"""
+        For the Turkish word "{word}":
+        1. Provide English translation
+        2. Create a simple Turkish example sentence
+        3. Provide pronunciation guide (if possible)
+
+        Format:
+        Translation: [translation]
+        Example: [turkish sentence]
+        Pronunciation: [pronunciation]
+        """
+
+        try:
+            response = await self._call_openai(prompt, max_tokens=100)
+        except Exception:
+            return None
+
+        translation = ""
+        example = ""
+        pronunciation = ""
+
+        for line in response.strip().split('\n'):
+            line = line.strip()
+            if line.startswith("Translation:"):
+                translation = line.replace("Translation:", "").strip()
+            elif line.startswith("Example:"):
+                example = line.replace("Example:", "").strip()
+            elif line.startswith("Pronunciation:"):
+                pronunciation = line.replace("Pronunciation:", "").strip()
+
+        if not translation:
+            return None
+        return VocabularyItem(
+            turkish=word,
+            english=translation,
+            pronunciation=pronunciation if pronunciation else None,
+            example_sentence=example if example else None,
+            difficulty_level=target_level
+        )
+
+    def _vocabulary_key(self, word: str) -> str:
+        """Dictionary form used to group and match inflected forms of a lowercased word
+
+        A stripped stem is only used when the lexicon or the bilingual dictionary lists it;
+        the suffix stripper alone over-strips unknown words (masa -> ma, ekmek -> ek), so
+        those keep their surface form.
+        """
+        lemma = self.cefr_analyzer.lexicon_lemma(word)
+        if lemma is not None:
+            return lemma
+        dictionary = model_registry.get('bilingual_dictionary')
+        if dictionary is not None:
+            for candidate in self.cefr_analyzer.stemmer.lemma_candidates(word):
+                if candidate in dictionary:
+                    return candidate
+        return word
     
     async def extract_grammar_rules(self, text: str, target_level: CEFRLevel) -> List[GrammarRule]:
         """Extract grammar patterns and rules from text - simplified version"""
 
+        rules = await self.analysis_cache.get_or_compute(
+            content_key("grammar", text, ANALYZER_VERSION, (target_level.value,)),
+            lambda: self._extract_grammar_rules(text, target_level),
+            encode=_encode_models,
+            decode=lambda payload: [GrammarRule(**rule) for rule in payload]
+        )
+        return list(rules)
+
+    async def _extract_grammar_rules(self, text: str, target_level: CEFRLevel) -> List[GrammarRule]:
+        """Uncached grammar rule extraction"""
+
         # Return sample grammar rules for now
         sample_rules = [
             GrammarRule(
@@ -157,16 +452,24 @@ class NLPProcessor:
         return sample_rules[:2]
     
     async def generate_exercises(self, text: str, vocabulary: List[VocabularyItem],
-                               target_level: CEFRLevel, max_exercises: int = 10) -> List[Exercise]:
-        """Generate diverse exercises based on content and vocabulary"""
+                               target_level: CEFRLevel, max_exercises: int = 10,
+                               seed: int = 0) -> List[Exercise]:
+        """Generate diverse exercises based on content and vocabulary
 
+        ``seed`` fixes the sampled multiple-choice distractors, so the same inputs give the
+        same exercises.
+        """
+        return await self._offload('_generate_exercises_sync', text, vocabulary, target_level, max_exercises, seed)
+
+    def _generate_exercises_sync(self, text: str, vocabulary: List[VocabularyItem],
+                                 target_level: CEFRLevel, max_exercises: int, seed: int) -> List[Exercise]:
         exercises = []
 
         if not vocabulary:
             return exercises
 
         # Generate multiple choice vocabulary exercises
-        exercises.extend(self._generate_vocabulary_exercises(vocabulary, target_level, max_exercises // 3))
+        exercises.extend(self._generate_vocabulary_exercises(vocabulary, target_level, max_exercises // 3, seed))
 
         # Generate fill-in-the-blank exercises from text
         exercises.extend(self._generate_fill_blank_exercises(text, vocabulary, target_level, max_exercises // 3))
@@ -181,20 +484,33 @@ class NLPProcessor:
         return exercises[:max_exercises]
 
     def _generate_vocabulary_exercises(self, vocabulary: List[VocabularyItem],
-                                     target_level: CEFRLevel, max_count: int) -> List[Exercise]:
+                                     target_level: CEFRLevel, max_count: int,
+                                     seed: int = 0) -> List[Exercise]:
         """Generate multiple choice vocabulary exercises"""
         exercises = []
-
-        for i, vocab_item in enumerate(vocabulary[:max_count]):
-            # Create distractors (wrong answers)
-            distractors = []
-            for j, other_vocab in enumerate(vocabulary):
-                if j != i and len(distractors) < 3:
+        index = self.distractor_index
+
+        for vocab_item in vocabulary[:max_count]:
+            # Wrong answers of the same level, word class and length as the right one,
+            # sampled per word so an item always gets the same options for a given seed
+            level = self.cefr_analyzer.lexicon.lookup(self._vocabulary_key(turkish_lower(vocab_item.turkish)))
+            rng = random.Random(f"{seed}:{vocab_item.turkish}")
+            distractors = index.sample(
+                vocab_item.english,
+                level or vocab_item.difficulty_level,
+                part_of_speech(vocab_item.turkish, vocab_item.english),
+                3, rng
+            ) if index is not None else []
+
+            # Top up from the lesson's own vocabulary if the index is unavailable or tiny
+            for other_vocab in vocabulary:
+                if len(distractors) >= 3:
+                    break
+                if other_vocab.english != vocab_item.english and other_vocab.english not in distractors:
                     distractors.append(other_vocab.english)
 
-            # Fill remaining distractors with generic ones
-            while len(distractors) < 3:
-                distractors.append(f"wrong answer {len(distractors) + 1}")
+            if len(distractors) < 3:
+                continue
 
             exercises.append(Exercise(
                 type="MULTIPLE_CHOICE",
@@ -209,44 +525,121 @@ class NLPProcessor:
 
     def _generate_fill_blank_exercises(self, text: str, vocabulary: List[VocabularyItem],
                                      target_level: CEFRLevel, max_count: int) -> List[Exercise]:
-        """Generate fill-in-the-blank exercises from text"""
+        """Generate fill-in-the-blank exercises spread across the whole text"""
         exercises = []
 
-        if NLTK_AVAILABLE:
-            try:
-                sentences = sent_tokenize(text)
-            except:
-                sentences = text.split('.')
-        else:
-            sentences = text.split('.')
-
-        vocab_words = {item.turkish.lower() for item in vocabulary}
-
-        for sentence in sentences[:max_count]:
-            sentence = sentence.strip()
-            if not sentence or len(sentence.split()) < 4:
-                continue
+        if max_count <= 0:
+            return exercises
 
-            words = sentence.split()
-            # Find vocabulary words in the sentence
-            for i, word in enumerate(words):
-                clean_word = re.sub(r'[^\w]', '', word.lower())
-                if clean_word in vocab_words:
-                    # Create fill-in-the-blank
-                    blank_sentence = ' '.join(words[:i] + ['_____'] + words[i+1:])
-
-                    exercises.append(Exercise(
-                        type="FILL_BLANK",
-                        question=f"Complete the sentence: {blank_sentence}",
-                        options=[],
-                        correct_answer=clean_word,
-                        explanation=f"The correct answer is '{clean_word}'.",
-                        difficulty_level=target_level
-                    ))
+        # Match inflected forms too, e.g. "kitabı" for the vocabulary item "kitap"
+        vocab_words = {self._vocabulary_key(turkish_lower(item.turkish)): item.turkish
+                       for item in vocabulary}
+
+        def vocabulary_key(token: str) -> Optional[str]:
+            # Proper nouns carry their suffixes after an apostrophe (Türkiye'de)
+            word = re.split(r"['’]", token, 1)[0]
+            if not word.isalpha():
+                return None
+            key = self._vocabulary_key(word)
+            return key if key in vocab_words else None
+
+        # Sentences of every window in document order, and the slice each blank comes
+        # from: one per sampled window, or max_count equal parts of a short text
+        documents = self.tokenize_many(self._fill_blank_windows(text, max_count), 'analysis')
+        sentences = [(document, sentence_id) for document in documents
+                     for sentence_id in range(document.sentence_count)]
+        if len(documents) > 1:
+            bounds = list(itertools.accumulate((document.sentence_count for document in documents), initial=0))
+            slices = [range(start, end) for start, end in zip(bounds, bounds[1:])]
+        else:
+            count = min(max_count, len(sentences))
+            slices = [range(index * len(sentences) // count, (index + 1) * len(sentences) // count)
+                      for index in range(count)]
+
+        # Vocabulary hits of one sentence long enough to give context, computed on first
+        # visit so only the sentences actually considered are normalized
+        hits_cache: Dict[int, List[Tuple[int, str]]] = {}
+
+        def sentence_hits(index: int) -> List[Tuple[int, str]]:
+            if index not in hits_cache:
+                document, sentence_id = sentences[index]
+                start, end = document.sentence_spans[sentence_id]
+                hits_cache[index] = [] if end - start < 4 else [
+                    (position, key) for position in range(start, end)
+                    if (key := vocabulary_key(document.tokens[position])) is not None
+                ]
+            return hits_cache[index]
+
+        # One blank from each slice, preferring vocabulary items that have not been blanked
+        # yet; a slice is scanned only until it yields a blank
+        used_keys = set()
+        choices = {}
+        for sentence_range in slices:
+            choice = fallback = None
+            for index in sentence_range:
+                hits = sentence_hits(index)
+                choice = next(((index, hit) for hit in hits if hit[1] not in used_keys), None)
+                if choice is not None:
                     break
+                if hits and fallback is None:
+                    fallback = (index, hits[0])
+            choice = choice or fallback
+            if choice is not None:
+                choices[choice[0]] = choice[1]
+                used_keys.add(choice[1][1])
+
+        # Slices without vocabulary are made up from the other sentences, in order
+        for index in range(len(sentences)):
+            if len(choices) >= len(slices):
+                break
+            if index not in choices and sentence_hits(index):
+                choices[index] = sentence_hits(index)[0]
+
+        for index, (position, key) in sorted(choices.items()):
+            document, sentence_id = sentences[index]
+            sentence_start, sentence_end = document.sentence_offsets[sentence_id]
+            token_start, token_end = document.offsets[position]
+            blank_sentence = ' '.join(
+                (document.text[sentence_start:token_start] + '_____' + document.text[token_end:sentence_end]).split()
+            )
+            answer = document.tokens[position]
+
+            exercises.append(Exercise(
+                type="FILL_BLANK",
+                question=f"Complete the sentence: {blank_sentence}",
+                options=[],
+                correct_answer=answer,
+                explanation=self._fill_blank_explanation(answer, vocab_words[key]),
+                difficulty_level=target_level
+            ))
 
         return exercises
 
+    @staticmethod
+    def _fill_blank_windows(text: str, count: int) -> List[str]:
+        """Whole sentences from ``count`` evenly spaced windows of a long text, or the text itself"""
+
+        if len(text) <= count * FILL_BLANK_WINDOW_CHARS:
+            return [text]
+
+        windows = []
+        for window_index in range(count):
+            start = window_index * len(text) // count
+            end = start + FILL_BLANK_WINDOW_CHARS
+            # Begin after the sentence the window starts in and stop at the last full one
+            if start > 0:
+                match = SENTENCE_BREAK_PATTERN.search(text, start, end)
+                start = match.end() if match else start
+            breaks = list(SENTENCE_BREAK_PATTERN.finditer(text, start, end))
+            windows.append(text[start:breaks[-1].end() if breaks else end])
+        return windows
+
+    @staticmethod
+    def _fill_blank_explanation(answer: str, headword: str) -> str:
+        if answer == turkish_lower(headword):
+            return f"The correct answer is '{answer}'."
+        return f"The correct answer is '{answer}', a form of '{headword}'."
+
     def _generate_matching_exercises(self, vocabulary: List[VocabularyItem],
                                    target_level: CEFRLevel, max_count: int) -> List[Exercise]:
         """Generate matching exercises"""
@@ -352,9 +745,20 @@ class NLPProcessor:
             return CEFRLevel.C2, 0.85
     
     async def _call_openai(self, prompt: str, max_tokens: int = 150) -> str:
-        """Call OpenAI API with error handling - placeholder"""
-        # TODO: Implement when OpenAI client is available
-        return "Mock OpenAI response"
+        """Call OpenAI through the shared async client
+
+        Returns the mock response unless NLP_LLM_ENABLED is set and an API key is configured.
+        """
+        if not settings.NLP_LLM_ENABLED or not openai_configured():
+            return "Mock OpenAI response"
+
+        response = await get_openai_client().chat.completions.create(
+            model=settings.OPENAI_MODEL,
+            messages=[{"role": "user", "content": compact_text(prompt)}],
+            max_tokens=max_tokens,
+            temperature=0.7
+        )
+        return response.choices[0].message.content or ""
     
     def _parse_grammar_rules(self, response: str, target_level: CEFRLevel) -> List[GrammarRule]:
         """Parse grammar rules from OpenAI response"""
@@ -449,3 +853,38 @@ class NLPProcessor:
             explanation="Sample explanation",
             difficulty_level=target_level
         )
+
+
+def _call_shared_processor(method: str, *args):
+    """Process-pool entry point: run a method on this worker's shared processor"""
+    return getattr(get_nlp_processor(), method)(*args)
+
+
+def _load_nlp_processor():
+    return NLPProcessor(), 'NLPProcessor'
+
+
+def _load_distractor_index():
+    """Distractor pool of the curriculum translations, levelled by the shared lexicon"""
+    lexicon = get_nlp_processor().cefr_analyzer.lexicon
+    entries = [
+        (entry.english,
+         lexicon.lookup(turkish_lower(entry.turkish.strip())) or CURRICULUM_LEVEL,
+         part_of_speech(entry.turkish, entry.english))
+        for entry in curriculum_entries(settings.CURRICULUM_DATA_DIR)
+        # Example sentences would give the answer away next to single-word options
+        if len(entry.turkish.split()) <= MAX_PHRASE_WORDS and len(entry.english.split()) <= MAX_PHRASE_WORDS
+    ]
+    index = DistractorIndex(entries)
+    return index, f"{len(index)} glosses"
+
+
+model_registry.register('nlp_processor', _load_nlp_processor,
+                        "Shared NLPProcessor (CEFR analyzer, lexicon index, analysis cache)")
+model_registry.register('distractor_index', _load_distractor_index,
+                        "Multiple-choice distractors bucketed by level, part of speech and length")
+
+
+def get_nlp_processor() -> NLPProcessor:
+    """Process-wide NLPProcessor shared by all routers; usable as a FastAPI dependency"""
+    return model_registry.get('nlp_processor')
@@ -0,0 +1,133 @@
+"""
+Compiled Pattern Matchers for Turkish Text Analysis
+Combine many small patterns into one automaton scanned once per text
+"""
+
+import re
+from collections import Counter, deque
+from typing import Dict, Hashable, Iterable, Iterator, List, Tuple
+
+from app.services.text_document import turkish_lower
+
+ANY_WORD = r'\w+'
+
+
+class GrammarPatternMatcher:
+    """Counts word-pair grammar patterns for every level in one linear scan
+
+    Each pattern is a ``(first_word, second_word)`` pair of word regexes and matches
+    two adjacent words separated by whitespace, e.g. ``(r'\\w+', r'\\w+yor')`` for the
+    present continuous. All patterns are compiled into one regex that walks the text
+    word by word; constrained first words and second words are recorded in named
+    groups so a single match tells which patterns the current word pair satisfies.
+    Second-word constraints are tried in order and at most one is counted per pair.
+    """
+
+    def __init__(self, patterns: Dict[Hashable, List[Tuple[str, str]]]):
+        self.levels = list(patterns.keys())
+
+        first_groups = []   # (group name, regex)
+        second_groups = []
+        pattern_keys = []   # (level, first group or None, second group or None)
+
+        for level, level_patterns in patterns.items():
+            for first, second in level_patterns:
+                first_name = self._group_for(first, first_groups, 'f')
+                second_name = self._group_for(second, second_groups, 's')
+                pattern_keys.append((level, first_name, second_name))
+
+        first_part = ''.join(f'(?P<{name}>{regex})|' for name, regex in first_groups)
+        second_part = '|'.join(f'(?=(?P<{name}>{regex})\\b)' for name, regex in second_groups)
+
+        combined = rf'\b(?:{first_part}\w+)\s+(?=\w)'
+        if second_part:
+            combined += f'(?:{second_part})?'
+
+        self.regex = re.compile(combined, re.IGNORECASE)
+        self.pattern_keys = pattern_keys
+        self._first_names = [name for name, _ in first_groups]
+        self._group_names = {index: name for name, index in self.regex.groupindex.items()}
+
+    @staticmethod
+    def _group_for(regex: str, groups: List[Tuple[str, str]], prefix: str):
+        """Return the named group for a word regex, or None for an unconstrained word"""
+        if regex == ANY_WORD:
+            return None
+        for name, existing in groups:
+            if existing == regex:
+                return name
+        name = f'{prefix}{len(groups)}'
+        groups.append((name, regex))
+        return name
+
+    def _match_key(self, match: re.Match) -> Tuple:
+        """(first group, second group) matched by one word pair"""
+        last = self._group_names.get(match.lastindex)
+        if last is None or last.startswith('f'):
+            return last, None
+        first = next((name for name in self._first_names if match.start(name) >= 0), None)
+        return first, last
+
+    def count(self, text: str) -> Dict[Hashable, int]:
+        """Count pattern matches per level"""
+
+        pair_counts = Counter(self._match_key(match) for match in self.regex.finditer(text))
+
+        level_counts = {level: 0 for level in self.levels}
+        for (first, second), count in pair_counts.items():
+            for level, pattern_first, pattern_second in self.pattern_keys:
+                if pattern_first in (None, first) and pattern_second in (None, second):
+                    level_counts[level] += count
+
+        return level_counts
+
+
+class ConnectorMatcher:
+    """Word-boundary multi-pattern matcher for connector words and phrases
+
+    An Aho-Corasick automaton whose alphabet is whole tokens rather than characters, so
+    'ki' matches the word "ki" but never the inside of "kitap" or "iki", and multi-word
+    connectors such as "bu yüzden" are found in the same single pass over a sentence.
+    """
+
+    def __init__(self, connectors: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[str]] = [[]]
+
+        for connector in connectors:
+            node = 0
+            for word in turkish_lower(connector).split():
+                if word not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                    self._goto[node][word] = len(self._goto) - 1
+                node = self._goto[node][word]
+            self._outputs[node].append(connector)
+
+        # Breadth-first failure links; each node also reports its suffix nodes' connectors
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    def find(self, tokens: Iterable[str]) -> Iterator[str]:
+        """Yield every connector occurring in a lowercased token sequence"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        node = 0
+        for token in tokens:
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            yield from outputs[node]
+
+    def count(self, tokens: Iterable[str]) -> Counter:
+        """Occurrences of each connector in a token sequence"""
+        return Counter(self.find(tokens))
@@ -0,0 +1,287 @@
+"""
+Prompt Compaction and Token Budgets
+Builds chat requests with compact prompts and context, counts their tokens locally and
+sizes max_tokens from the number of items each endpoint is asked to generate
+"""
+
+import json
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+    TIKTOKEN_AVAILABLE = True
+except Exception:   # not installed, or its encoding file cannot be downloaded
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    context_tokens: int                         # prompt plus completion must fit in it
+    max_output_tokens: Optional[int] = None     # separate completion cap, if the model has one
+
+
+# Limits by model name; dated snapshots (gpt-4-0613, gpt-4o-2024-08-06) use the entry
+# whose name is their longest prefix
+MODEL_LIMITS: Dict[str, ModelLimits] = {
+    'gpt-4': ModelLimits(8192),
+    'gpt-4-32k': ModelLimits(32768),
+    'gpt-4-turbo': ModelLimits(128000, 4096),
+    'gpt-4-1106-preview': ModelLimits(128000, 4096),
+    'gpt-4-0125-preview': ModelLimits(128000, 4096),
+    'gpt-4o': ModelLimits(128000, 16384),
+    'gpt-4o-mini': ModelLimits(128000, 16384),
+    'gpt-3.5-turbo': ModelLimits(16385, 4096),
+}
+
+# Used for models missing from MODEL_LIMITS: the smallest window any of them has
+DEFAULT_MODEL_LIMITS = ModelLimits(8192, 4096)
+
+# Tokens each chat message adds on top of its content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\s*\n\s*|\s{2,}")
+SENTENCE_END_PATTERN = re.compile(r"((?<=[.!?…])\s+|\n)")
+
+
+def count_tokens(text: str) -> int:
+    """Token count of ``text``: exact with tiktoken, otherwise a close estimate
+
+    The estimate counts punctuation marks, line breaks and indentation as one token each
+    and words as one token per four characters, which tracks BPE counts for
+    agglutinative Turkish words better than a flat characters-per-token ratio.
+    """
+    if TIKTOKEN_AVAILABLE:
+        return len(_ENCODING.encode(text))
+    return sum(1 if piece.isspace() else math.ceil(len(piece) / 4) for piece in TOKEN_PATTERN.findall(text))
+
+
+def compact_text(text: str) -> str:
+    """Prompt text without indentation, trailing spaces or blank lines"""
+    return '\n'.join(line.strip() for line in text.strip().splitlines() if line.strip())
+
+
+def compact_json(value: Any) -> str:
+    """JSON without the whitespace ``indent=2`` spends tokens on"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+@dataclass
+class PromptStats:
+    requests: int = 0
+    prompt_tokens: int = 0
+    tokens_saved: int = 0            # by compacting prompts and context
+    max_tokens_requested: int = 0
+    context_items_summarized: int = 0
+    context_items_dropped: int = 0
+    context_truncated: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'prompt_tokens': self.prompt_tokens,
+            'tokens_saved': self.tokens_saved,
+            'mean_max_tokens': round(self.max_tokens_requested / self.requests) if self.requests else 0,
+            'context_items_summarized': self.context_items_summarized,
+            'context_items_dropped': self.context_items_dropped,
+            'context_truncated': self.context_truncated,
+            'exact_counts': TIKTOKEN_AVAILABLE
+        }
+
+
+prompt_stats = PromptStats()
+
+
+def fit_items(items: Sequence[Any], budget_tokens: int, summary_fields: Sequence[str] = (),
+              noun: str = 'items') -> str:
+    """Compact JSON for ``items`` within ``budget_tokens``
+
+    Over budget, dict items are first reduced to ``summary_fields``; if that is still too
+    long, items are dropped from the end and a note says how many are not shown.
+    """
+
+    rendered = compact_json(list(items))
+    prompt_stats.tokens_saved += max(0, count_tokens(json.dumps(list(items), indent=2, default=str)) - count_tokens(rendered))
+    if count_tokens(rendered) <= budget_tokens:
+        return rendered
+
+    if summary_fields:
+        items = [
+            {name: item[name] for name in summary_fields if name in item} if isinstance(item, dict) else item
+            for item in items
+        ]
+        prompt_stats.context_items_summarized += len(items)
+        rendered = compact_json(items)
+        if count_tokens(rendered) <= budget_tokens:
+            return rendered
+
+    kept: List[Any] = []
+    used = 2
+    for item in items:
+        cost = count_tokens(compact_json(item)) + 1
+        if used + cost > budget_tokens:
+            break
+        kept.append(item)
+        used += cost
+    omitted = len(items) - len(kept)
+    prompt_stats.context_items_dropped += omitted
+    return f"{compact_json(kept)}\n(+{omitted} more {noun} not shown)"
+
+
+def fit_text(text: str, budget_tokens: int) -> str:
+    """Compacted ``text`` cut at a sentence or line boundary so it fits in ``budget_tokens``"""
+
+    text = compact_text(text)
+    if count_tokens(text) <= budget_tokens:
+        return text
+    budget_tokens -= count_tokens(' …')
+
+    # Odd positions hold the whitespace each sentence ended with
+    pieces = SENTENCE_END_PATTERN.split(text)
+    kept = ''
+    used = 0
+    for sentence, separator in zip(pieces[::2], pieces[1::2] + ['']):
+        cost = count_tokens(sentence)
+        if used + cost > budget_tokens:
+            break
+        kept += sentence + separator
+        used += cost
+    prompt_stats.context_truncated += 1
+    # A first sentence longer than the whole budget is cut by words instead
+    if not kept:
+        words = text.split()
+        while len(words) > 1 and count_tokens(' '.join(words)) > budget_tokens:
+            words = words[:len(words) * 3 // 4]
+        kept = ' '.join(words)
+        while len(kept) > 1 and count_tokens(kept) > budget_tokens:
+            kept = kept[:len(kept) * 3 // 4]
+    return kept.rstrip() + ' …'
+
+
+# Real answers replace the prompts' short placeholders ("clear instructions") with full,
+# often Turkish, sentences that take more tokens than the placeholder text
+CONTENT_HEADROOM = 1.5
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    """Token allowances of one endpoint
+
+    ``item_tokens[kind]`` is the size of one item as the prompt's example document shows
+    it, pretty-printed. The completion gets ``base_tokens`` plus ``CONTENT_HEADROOM``
+    times that for every requested item, capped at ``max_tokens``; ``context_tokens``
+    bounds the user-supplied context embedded in the prompt.
+    """
+    max_tokens: int
+    base_tokens: int = 200
+    item_tokens: Dict[str, int] = field(default_factory=dict)
+    context_tokens: int = 1500
+
+    def completion_tokens(self, items: Optional[Dict[str, int]] = None) -> int:
+        if not items:
+            return self.max_tokens
+        estimate = self.base_tokens + CONTENT_HEADROOM * sum(self.item_tokens.get(kind, 0) * max(0, count)
+                                                             for kind, count in items.items())
+        return max(1, min(self.max_tokens, math.ceil(estimate)))
+
+
+# Item sizes are measured from each prompt's JSON example; the ceilings only stop
+# unusually large requests, and chat_params lowers them further to fit the context window
+PROMPT_BUDGETS: Dict[str, PromptBudget] = {
+    'lessons.generate-with-gpt4': PromptBudget(
+        max_tokens=4000, base_tokens=250,
+        item_tokens={'vocabulary': 37, 'grammar_rules': 47, 'example_sentences': 25, 'exercises': 88, 'cultural_notes': 25}
+    ),
+    'teacher.create-lesson': PromptBudget(
+        max_tokens=6000, base_tokens=900,
+        item_tokens={'vocabulary': 52, 'grammar_rules': 64, 'exercises': 142}
+    ),
+    'teacher.generate-lesson-plan': PromptBudget(max_tokens=3000),
+    'teacher.suggest-teaching-strategies': PromptBudget(max_tokens=2000),
+    'practice.generate-practice-exercises': PromptBudget(
+        max_tokens=6000, base_tokens=200, item_tokens={'exercises': 333}, context_tokens=600
+    ),
+    'practice.generate-vocabulary-drills': PromptBudget(
+        max_tokens=6000, base_tokens=150, item_tokens={'drills': 172}, context_tokens=1200
+    ),
+    'practice.generate-grammar-exercises': PromptBudget(
+        max_tokens=6000, base_tokens=150, item_tokens={'exercises': 193}, context_tokens=1200
+    ),
+    'curriculum.generate-curriculum': PromptBudget(
+        max_tokens=4000, base_tokens=400, item_tokens={'units': 119}
+    ),
+    'curriculum.curriculum-data': PromptBudget(max_tokens=3000, context_tokens=2500),
+    'curriculum.generate-unit-lessons': PromptBudget(
+        max_tokens=6000, base_tokens=150, item_tokens={'lessons': 251}
+    ),
+    'curriculum.optimize-learning-path': PromptBudget(
+        max_tokens=2000, base_tokens=350, item_tokens={'units': 30}, context_tokens=2500
+    ),
+    'adaptive.generate-adaptive-lesson': PromptBudget(max_tokens=2500),
+    'adaptive.analyze-student-progress': PromptBudget(max_tokens=1500),
+    'adaptive.recommend-next-lesson': PromptBudget(max_tokens=1000),
+}
+
+DEFAULT_BUDGET = PromptBudget(max_tokens=2000)
+
+
+def budget_for(endpoint: str) -> PromptBudget:
+    return PROMPT_BUDGETS.get(endpoint, DEFAULT_BUDGET)
+
+
+@lru_cache(maxsize=64)
+def model_limits(model: str) -> ModelLimits:
+    """Context window and completion cap of ``model``"""
+    matches = [name for name in MODEL_LIMITS if model == name or model.startswith(name + '-')]
+    if not matches:
+        logger.warning("No token limits known for model %s; budgeting for %s", model, DEFAULT_MODEL_LIMITS)
+        return DEFAULT_MODEL_LIMITS
+    return MODEL_LIMITS[max(matches, key=len)]
+
+
+def chat_params(endpoint: str, system: str, prompt: str, temperature: float = 0.7,
+                items: Optional[Dict[str, int]] = None, model: Optional[str] = None) -> Dict[str, Any]:
+    """Chat completion parameters with a compacted prompt and a budgeted ``max_tokens``
+
+    ``items`` counts what the prompt asks for (e.g. ``{'exercises': 8}``); without it the
+    endpoint's ceiling is used. ``model`` defaults to OPENAI_GENERATION_MODEL, and
+    ``max_tokens`` is also lowered to its completion cap and so that prompt plus
+    completion fit its context window.
+    """
+
+    model = model or settings.OPENAI_GENERATION_MODEL
+    limits = model_limits(model)
+    messages = [
+        {"role": "system", "content": compact_text(system)},
+        {"role": "user", "content": compact_text(prompt)}
+    ]
+    prompt_tokens = sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+    max_tokens = budget_for(endpoint).completion_tokens(items)
+    available = limits.context_tokens - prompt_tokens
+    if limits.max_output_tokens is not None:
+        available = min(available, limits.max_output_tokens)
+    if max_tokens > available:
+        logger.debug("Prompt for %s uses %d tokens; max_tokens lowered from %d to %d",
+                     endpoint, prompt_tokens, max_tokens, max(1, available))
+        max_tokens = max(1, available)
+
+    prompt_stats.requests += 1
+    prompt_stats.prompt_tokens += prompt_tokens
+    prompt_stats.tokens_saved += max(0, count_tokens(system) + count_tokens(prompt) + 2 * MESSAGE_OVERHEAD_TOKENS
+                                     - prompt_tokens)
+    prompt_stats.max_tokens_requested += max_tokens
+    return {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }
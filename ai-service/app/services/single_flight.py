@@ -0,0 +1,76 @@
+"""
+Single-Flight Request Coalescing
+Concurrent callers asking for the same key share one in-flight call instead of each
+starting their own
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Flight:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent async calls by key
+
+    The shared call runs as its own task, so a caller that is cancelled (e.g. a client
+    disconnecting) stops waiting without cancelling the call for everyone else. The call
+    itself is cancelled only when every waiter has gone. Results and exceptions are
+    delivered to all waiters; the key is released as soon as the call finishes, so later
+    callers start a new one.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of ``call()``, shared with every concurrent caller using the same ``key``"""
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _task: self._release(key, flight))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                # Last interested caller gave up: nobody needs the result any more
+                flight.task.cancel()
+                self.abandoned += 1
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _release(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Retrieve the exception of an abandoned call so it is not reported as never retrieved
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'abandoned': self.abandoned,
+            'in_flight': self.in_flight
+        }
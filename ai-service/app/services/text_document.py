@@ -0,0 +1,156 @@
+"""
+Tokenized Document Model for Turkish Text Analysis
+Tokenizes text once so every analysis stage can share sentences, tokens and offsets
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Tuple
+
+# Words keep internal apostrophes ("Türkiye'de"), everything else is a single punctuation token
+TOKEN_PATTERN = re.compile(r"(\w+(?:['’]\w+)*)|([^\w\s])")
+SENTENCE_TERMINATORS = {'.', '!', '?', '…'}
+
+
+def turkish_lower(text: str) -> str:
+    """Lowercase text using Turkish casing rules (I -> ı, İ -> i)"""
+    return text.replace('I', 'ı').replace('İ', 'i').lower()
+
+
+@dataclass(frozen=True)
+class TokenizedDocument:
+    """Result of a single tokenization pass over a text"""
+    text: str
+    tokens: List[str]                      # lowercased word tokens
+    offsets: List[Tuple[int, int]]         # character span of each token in ``text``
+    content_mask: List[bool]               # True for alphabetic, non-stopword tokens
+    sentence_spans: List[Tuple[int, int]]  # [start, end) token range of each sentence
+    sentence_offsets: List[Tuple[int, int]]  # character span of each sentence in ``text``
+    lemmas: Optional[List[str]] = None     # lowercased lemma of each token, when a lemmatizer ran
+
+    @classmethod
+    def from_text(cls, text: str, stopwords: Iterable[str] = ()) -> 'TokenizedDocument':
+        """Tokenize ``text`` into words and sentences in one regex pass"""
+
+        stopwords = stopwords if isinstance(stopwords, (set, frozenset)) else set(stopwords)
+
+        tokens = []
+        offsets = []
+        content_mask = []
+        sentence_spans = []
+        sentence_offsets = []
+
+        sentence_start = 0
+        sentence_char_start = None
+
+        for match in TOKEN_PATTERN.finditer(text):
+            word, punct = match.group(1), match.group(2)
+
+            if word is not None:
+                token = turkish_lower(word)
+                tokens.append(token)
+                offsets.append(match.span())
+                content_mask.append(token.isalpha() and token not in stopwords)
+                if sentence_char_start is None:
+                    sentence_char_start = match.start()
+            elif punct in SENTENCE_TERMINATORS and len(tokens) > sentence_start:
+                sentence_spans.append((sentence_start, len(tokens)))
+                sentence_offsets.append((sentence_char_start, match.end()))
+                sentence_start = len(tokens)
+                sentence_char_start = None
+
+        # Trailing sentence without a terminator
+        if len(tokens) > sentence_start:
+            sentence_spans.append((sentence_start, len(tokens)))
+            sentence_offsets.append((sentence_char_start, offsets[-1][1]))
+
+        return cls(
+            text=text,
+            tokens=tokens,
+            offsets=offsets,
+            content_mask=content_mask,
+            sentence_spans=sentence_spans,
+            sentence_offsets=sentence_offsets
+        )
+
+    @classmethod
+    def from_spacy(cls, doc: Any, stopwords: Iterable[str] = ()) -> 'TokenizedDocument':
+        """Convert a spaCy ``Doc``, keeping its sentence boundaries and lemmas when annotated
+
+        Without a parser or sentencizer in the pipeline, sentences end at terminator
+        punctuation exactly as in ``from_text``.
+        """
+
+        stopwords = stopwords if isinstance(stopwords, (set, frozenset)) else set(stopwords)
+        has_sentences = doc.has_annotation("SENT_START")
+        has_lemmas = doc.has_annotation("LEMMA")
+
+        tokens = []
+        offsets = []
+        content_mask = []
+        lemmas = []
+        sentence_spans = []
+        sentence_offsets = []
+
+        sentence_start = 0
+        sentence_char_start = None
+        last_end = 0   # end of the last non-space token, punctuation included
+
+        def close_sentence():
+            nonlocal sentence_start, sentence_char_start
+            if len(tokens) > sentence_start:
+                sentence_spans.append((sentence_start, len(tokens)))
+                sentence_offsets.append((sentence_char_start, last_end))
+            sentence_start = len(tokens)
+            sentence_char_start = None
+
+        for token in doc:
+            if has_sentences and token.is_sent_start:
+                close_sentence()
+            if token.is_space:
+                continue
+            last_end = token.idx + len(token.text)
+            if token.is_punct:
+                if not has_sentences and token.text[-1] in SENTENCE_TERMINATORS:
+                    close_sentence()
+                continue
+
+            word = turkish_lower(token.text)
+            tokens.append(word)
+            offsets.append((token.idx, token.idx + len(token.text)))
+            content_mask.append(word.isalpha() and word not in stopwords)
+            lemmas.append(turkish_lower(token.lemma_) if has_lemmas and token.lemma_ else word)
+            if sentence_char_start is None:
+                sentence_char_start = token.idx
+
+        close_sentence()
+
+        return cls(
+            text=doc.text,
+            tokens=tokens,
+            offsets=offsets,
+            content_mask=content_mask,
+            sentence_spans=sentence_spans,
+            sentence_offsets=sentence_offsets,
+            lemmas=lemmas if has_lemmas else None
+        )
+
+    @property
+    def sentence_count(self) -> int:
+        return len(self.sentence_spans)
+
+    @property
+    def content_words(self) -> List[str]:
+        """Lowercased content words in document order"""
+        return [token for token, is_content in zip(self.tokens, self.content_mask) if is_content]
+
+    @property
+    def sentences(self) -> List[str]:
+        """Original sentence strings"""
+        return [self.text[start:end] for start, end in self.sentence_offsets]
+
+    def sentence_tokens(self, index: int) -> List[str]:
+        """Lowercased tokens of the sentence at ``index``"""
+        start, end = self.sentence_spans[index]
+        return self.tokens[start:end]
+
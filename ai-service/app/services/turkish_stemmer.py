@@ -0,0 +1,232 @@
+"""
+Finite-State Turkish Suffix Stripper
+Splits agglutinated word forms into stem and suffix chain, respecting vowel harmony
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+VOWELS = set('aeıioöuü')
+BACK_VOWELS = set('aıou')
+VOICELESS = set('çfhkpsşt')
+I_HARMONY = {'a': 'ı', 'ı': 'ı', 'o': 'u', 'u': 'u', 'e': 'i', 'i': 'i', 'ö': 'ü', 'ü': 'ü'}
+HARDENING = {'b': 'p', 'c': 'ç', 'd': 't', 'ğ': 'k'}
+
+# Suffix templates use archiphonemes: A = a/e, I = ı/i/u/ü (vowel harmony), D = d/t and
+# C = c/ç (voicing), and a parenthesised buffer such as (y), (n), (s) or (I) that only
+# appears after a vowel-final stem ((I): only after a consonant-final one).
+SUFFIX_CLASSES = {
+    'plural': ['lAr'],
+    'possessive': ['(I)m', '(I)n', '(s)I', '(I)mIz', '(I)nIz', 'lArI'],
+    'case': ['(y)I', '(y)A', 'DA', 'DAn', '(n)In', '(y)lA', '(n)A', '(n)DA', '(n)DAn', '(n)I'],
+    'relative': ['ki'],
+    'derivation': ['lI', 'sIz', 'CI', 'lIk', 'lIğ'],
+    'person': ['(y)Im', 'sIn', '(y)Iz', 'sInIz', 'lAr', 'DIr', '(y)DI', '(y)mIş', '(y)sA', '(y)ken'],
+    'short_person': ['m', 'n', 'k', 'nIz'],
+    'past_conditional': ['DI', 'sA'],
+    'tense': ['Iyor', 'DI', 'mIş', '(y)AcAk', '(y)AcAğ', '(A)r', '(I)r', 'mAz', '(y)AmAz', 'mAlI', 'sA',
+              'mAk', 'mA', '(y)Ip', '(y)ArAk', '(y)An', 'DIk', 'DIğ'],
+    'modal': ['(y)Abil'],
+    'negation': ['mA', '(y)AmA'],   # plain and potential (gel-eme-di-m) negation
+}
+
+# Reverse automaton: suffix classes that may be stripped in each state, right to left
+TRANSITIONS = {
+    'start': ['person', 'short_person', 'case', 'relative', 'possessive', 'plural', 'tense',
+              'derivation'],
+    'person': ['tense', 'case', 'possessive', 'plural', 'derivation'],
+    'short_person': ['past_conditional'],
+    'past_conditional': ['modal', 'negation'],
+    'tense': ['modal', 'negation'],
+    'modal': ['negation'],
+    'negation': [],
+    'relative': ['case'],
+    'case': ['possessive', 'plural', 'derivation'],
+    'possessive': ['plural', 'derivation'],
+    'plural': ['derivation'],
+    'derivation': ['derivation'],
+}
+
+VERBAL_CLASSES = {'tense', 'past_conditional', 'modal', 'negation'}
+MIN_STEM_LENGTH = 2
+MAX_PARSES = 64
+
+
+def _parse_template(template: str) -> List[str]:
+    """Split a suffix template into symbols, keeping '(x)' buffers together"""
+    symbols = []
+    index = 0
+    while index < len(template):
+        if template[index] == '(':
+            end = template.index(')', index)
+            symbols.append(template[index:end + 1])
+            index = end + 1
+        else:
+            symbols.append(template[index])
+            index += 1
+    return symbols
+
+
+def _last_vowel(text: str) -> Optional[str]:
+    for char in reversed(text):
+        if char in VOWELS:
+            return char
+    return None
+
+
+def realize(symbols: List[str], stem: str) -> Optional[str]:
+    """Surface form of a suffix template attached to ``stem``"""
+    last_vowel = _last_vowel(stem)
+    if last_vowel is None:
+        return None
+    last_char = stem[-1]
+    output = []
+
+    for symbol in symbols:
+        if symbol == '(I)':
+            if last_char in VOWELS:
+                continue
+            symbol = 'I'
+        elif symbol.startswith('('):
+            if last_char in VOWELS:
+                output.append(symbol[1])
+                last_char = symbol[1]
+            continue
+
+        if symbol == 'A':
+            char = 'a' if last_vowel in BACK_VOWELS else 'e'
+        elif symbol == 'I':
+            char = I_HARMONY[last_vowel]
+        elif symbol == 'D':
+            char = 't' if last_char in VOICELESS else 'd'
+        elif symbol == 'C':
+            char = 'ç' if last_char in VOICELESS else 'c'
+        else:
+            char = symbol
+
+        # Turkish does not stack vowels across a morpheme boundary without a buffer
+        if char in VOWELS and last_char in VOWELS and not output:
+            return None
+
+        output.append(char)
+        last_char = char
+        if char in VOWELS:
+            last_vowel = char
+
+    return ''.join(output)
+
+
+class TurkishStemmer:
+    """Suffix-stripping finite-state analyzer with a bounded memo cache
+
+    Every suffix class is indexed by all spellings it can take, so a state only looks up
+    the last few characters of the word; a candidate is accepted when re-attaching the
+    template to the remaining stem reproduces exactly that spelling, which enforces vowel
+    harmony, voicing and buffer consonants.
+    """
+
+    def __init__(self, cache_size: int = 100_000):
+        self._index: Dict[str, Dict[str, List[List[str]]]] = {}
+        self._max_length = 0
+
+        for class_name, templates in SUFFIX_CLASSES.items():
+            spellings: Dict[str, List[List[str]]] = {}
+            for template in templates:
+                symbols = _parse_template(template)
+                for spelling in self._spellings(symbols):
+                    spellings.setdefault(spelling, []).append(symbols)
+                    self._max_length = max(self._max_length, len(spelling))
+            self._index[class_name] = spellings
+
+        self.parses = lru_cache(maxsize=cache_size)(self._parses)
+        self.lemma_candidates = lru_cache(maxsize=cache_size)(self._lemma_candidates)
+
+    @staticmethod
+    def _spellings(symbols: List[str]) -> List[str]:
+        """Every spelling a template can take, ignoring harmony constraints"""
+        options = {
+            'A': ['a', 'e'], 'I': ['ı', 'i', 'u', 'ü'], 'D': ['d', 't'], 'C': ['c', 'ç'],
+            '(I)': ['', 'ı', 'i', 'u', 'ü']
+        }
+        spellings = ['']
+        for symbol in symbols:
+            if symbol in options:
+                choices = options[symbol]
+            elif symbol.startswith('('):
+                choices = ['', symbol[1]]
+            else:
+                choices = [symbol]
+            spellings = [spelling + choice for spelling in spellings for choice in choices]
+        return [spelling for spelling in spellings if spelling]
+
+    def analyze(self, word: str) -> Tuple[str, Tuple[str, ...]]:
+        """(stem, suffixes) of the deepest parse, preferring the shorter stem on ties"""
+        stem, suffixes, _ = self.parses(word)[-1]
+        return stem, suffixes
+
+    def stem(self, word: str) -> str:
+        return self.analyze(word)[0]
+
+    def _parses(self, word: str) -> Tuple[Tuple[str, Tuple[str, ...], Optional[str]], ...]:
+        """All (stem, suffixes, innermost suffix class) parses of a lowercased word
+
+        Ordered from the unanalyzed word to the most deeply stripped parse.
+        """
+        results = [(word, (), None)]
+        frontier = [(word, (), 'start')]
+
+        while frontier and len(results) < MAX_PARSES:
+            stem, suffixes, state = frontier.pop()
+            for class_name in TRANSITIONS[state]:
+                spellings = self._index[class_name]
+                for length in range(1, min(self._max_length, len(stem) - MIN_STEM_LENGTH) + 1):
+                    surface = stem[-length:]
+                    if surface not in spellings:
+                        continue
+                    remainder = stem[:-length]
+                    if _last_vowel(remainder) is None:
+                        continue
+                    if any(realize(symbols, remainder) == surface for symbols in spellings[surface]):
+                        results.append((remainder, (surface,) + suffixes, class_name))
+                        frontier.append((remainder, (surface,) + suffixes, class_name))
+
+        results.sort(key=lambda result: (len(result[1]), -len(result[0])))
+        return tuple(results)
+
+    def _lemma_candidates(self, word: str) -> Tuple[str, ...]:
+        """Possible dictionary forms of a word, least stripped parse first
+
+        Besides each stem this adds the citation form of verb stems (-mAk infinitive),
+        undoes final consonant softening before a vowel (kitab-ı -> kitap) and restores
+        the stem vowel that -Iyor absorbs (bekl-iyor -> bekle, ok-uyor -> oku).
+        """
+        candidates: Dict[str, None] = {}
+
+        for stem, suffixes, first_class in self.parses(word):
+            bases = [stem]
+            if suffixes:
+                if stem[-1] in HARDENING and suffixes[0][0] in VOWELS:
+                    bases.append(stem[:-1] + HARDENING[stem[-1]])
+                if len(suffixes[0]) == 4 and suffixes[0].endswith('yor'):
+                    bases.append(stem + suffixes[0][0])
+                    bases.append(stem + ('a' if _last_vowel(stem) in BACK_VOWELS else 'e'))
+
+            for base in bases:
+                candidates[base] = None
+                if first_class in VERBAL_CLASSES:
+                    candidates[base + ('mak' if _last_vowel(base) in BACK_VOWELS else 'mek')] = None
+
+        return tuple(candidates)
+
+
+_shared_stemmer: Optional[TurkishStemmer] = None
+
+
+def get_stemmer() -> TurkishStemmer:
+    """Process-wide stemmer so every service shares one memo cache"""
+    global _shared_stemmer
+    if _shared_stemmer is None:
+        _shared_stemmer = TurkishStemmer(cache_size=settings.STEMMER_CACHE_SIZE)
+    return _shared_stemmer
@@ -0,0 +1,75 @@
+"""
+Grammar Pattern Scan Micro-benchmark
+Compares per-pattern re.findall scans with the combined GrammarPatternMatcher
+
+Usage: python -m benchmarks.grammar_scan [--corpus PATH] [--repeat N]
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.cefr_analyzer import CEFRAnalyzer
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[2] / "curriculum_analysis" / "textbook_content.json"
+
+
+def load_corpus(path: Path) -> str:
+    """Join every paragraph of an extracted textbook into one text"""
+    with open(path, encoding="utf-8") as corpus_file:
+        data = json.load(corpus_file)
+    return "\n".join(paragraph["text"] for paragraph in data.get("paragraphs", []))
+
+
+def scan_per_pattern(patterns, text: str) -> dict:
+    """Previous implementation: one uncompiled findall per pattern"""
+    counts = {}
+    for level, level_patterns in patterns.items():
+        counts[level] = sum(
+            len(re.findall(rf'\b(?:{first})\s+(?:{second})\b', text, re.IGNORECASE))
+            for first, second in level_patterns
+        )
+    return counts
+
+
+def time_per_mb(func, text: str, repeat: int) -> float:
+    """Best-of-``repeat`` seconds per MB of UTF-8 input"""
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - started)
+    return best / size_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = load_corpus(args.corpus)
+    analyzer = CEFRAnalyzer()
+
+    before = time_per_mb(lambda t: scan_per_pattern(analyzer.grammar_patterns, t), text, args.repeat)
+    after = time_per_mb(analyzer.grammar_matcher.count, text, args.repeat)
+
+    print(f"corpus: {args.corpus.name} ({len(text.encode('utf-8')) / 1024:.0f} KB)")
+    print(f"per-pattern findall: {before * 1000:.1f} ms/MB")
+    print(f"combined matcher:    {after * 1000:.1f} ms/MB")
+    print(f"speedup:             {before / after:.1f}x")
+
+    before_counts = scan_per_pattern(analyzer.grammar_patterns, text)
+    after_counts = analyzer.grammar_matcher.count(text)
+    for level in analyzer.grammar_patterns:
+        print(f"  {level.value}: {before_counts[level]} -> {after_counts[level]}")
+
+
+if __name__ == "__main__":
+    main()
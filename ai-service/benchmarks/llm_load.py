@@ -0,0 +1,158 @@
+"""
+LLM Endpoint Load Benchmark
+Drives the GPT-backed routers concurrently against the local LLM stand-in (or a replay
+cassette) and reports the latency the service adds on top of the model
+
+Usage: python -m benchmarks.llm_load [--endpoints lessons,teacher,practice,adaptive,curriculum]
+                                     [--requests N] [--concurrency N] [--distinct N]
+                                     [--latency lognormal:800:0.5] [--backend stub|replay] [--cache]
+
+Requests go through the ASGI app in-process, so no network or API key is needed, after
+one untimed warm-up call per endpoint. With
+--distinct smaller than --requests, identical requests overlap and exercise request
+coalescing (and the response cache with --cache).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+TOPICS = ("aile", "yemek", "seyahat", "alışveriş", "hava durumu", "iş hayatı", "sağlık", "okul")
+
+# Variant of the untimed warm-up call, outside the range the measured requests use
+WARM_UP_VARIANT = 1_000_000
+
+
+def build_request(endpoint: str, variant: int) -> Tuple[str, Dict[str, Any]]:
+    """Path and httpx request arguments for one call; ``variant`` picks the topic"""
+    topic = TOPICS[variant % len(TOPICS)] + ("" if variant < len(TOPICS) else f" {variant}")
+    if endpoint == "lessons":
+        return "/api/v1/lessons/generate-with-gpt4", {"params": {"topic": topic}}
+    if endpoint == "teacher":
+        return "/api/v1/teacher/create-lesson", {"json": {
+            "title": topic.title(), "topic": topic, "target_level": "A2", "lesson_type": "vocabulary",
+            "duration_minutes": 30, "learning_objectives": [f"Talk about {topic}"]
+        }}
+    if endpoint == "practice":
+        return "/api/v1/practice/generate-practice-exercises", {"json": {
+            "lesson_content": f"Bu ders {topic} hakkında.", "exercise_types": ["multiple_choice"],
+            "difficulty_level": "A1", "student_weak_areas": [topic]
+        }}
+    if endpoint == "adaptive":
+        return "/api/v1/adaptive/recommend-next-lesson", {
+            "params": {"student_id": f"student-{variant}", "current_level": "A1"},
+            "json": {"completed_lessons": ["lesson-1"], "weak_areas": [topic]}
+        }
+    if endpoint == "curriculum":
+        return "/api/v1/curriculum/generate-curriculum", {"json": {
+            "title": topic.title(), "target_level": "B1", "total_hours": 40,
+            "focus_areas": ["vocabulary", "grammar"], "student_goals": [f"Discuss {topic}"]
+        }}
+    raise ValueError(f"Unknown endpoint '{endpoint}'")
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+async def run_endpoint(client, endpoint: str, requests: int, concurrency: int, distinct: int) -> Dict[str, Any]:
+    """Fire ``requests`` calls with at most ``concurrency`` in flight"""
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def call(index: int):
+        nonlocal errors
+        path, arguments = build_request(endpoint, index % distinct)
+        async with slots:
+            started = time.perf_counter()
+            response = await client.post(path, **arguments)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "requests_per_second": requests / elapsed
+    }
+
+
+async def run(args) -> None:
+    import httpx
+    import main as service
+    from app.services.llm_backends import get_local_llm
+    from app.services.llm_cache import llm_cache, llm_flights
+
+    transport = httpx.ASGITransport(app=service.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+        print(f"backend: {args.backend}  latency: {args.latency}  concurrency: {args.concurrency}  "
+              f"distinct requests: {args.distinct}  cache: {'on' if args.cache else 'off'}")
+        print(f"{'endpoint':<12}{'req':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+              f"{'req/s':>9}{'overhead ms':>13}")
+
+        endpoints = args.endpoints.split(",")
+        with contextlib.redirect_stdout(io.StringIO()):
+            for endpoint in endpoints:
+                path, arguments = build_request(endpoint, WARM_UP_VARIANT)
+                await client.post(path, **arguments)
+
+        for endpoint in endpoints:
+            llm = get_local_llm()
+            served_before, delay_before = llm.requests, llm.delay_seconds
+            # The routers log every call; keep the table readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = await run_endpoint(client, endpoint, args.requests, args.concurrency, args.distinct)
+
+            # Mean service latency beyond the model's own, per request that reached the model
+            served = llm.requests - served_before
+            model_ms = (llm.delay_seconds - delay_before) / served * 1000 if served else 0.0
+            overhead = f"{result['mean_ms'] - model_ms:.1f}" if args.backend == "stub" and served else "-"
+            print(f"{endpoint:<12}{result['requests']:>6}{result['errors']:>5}{result['p50_ms']:>10.1f}"
+                  f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['requests_per_second']:>9.1f}"
+                  f"{overhead:>13}")
+
+        print(f"model calls: {get_local_llm().requests if args.backend == 'stub' else '-'}  "
+              f"coalescing: {llm_flights.stats()}  cache hits: {llm_cache.stats()['hits']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--endpoints", default="lessons,teacher,practice,adaptive,curriculum")
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--distinct", type=int, default=None, help="distinct request bodies (default: all distinct)")
+    parser.add_argument("--latency", default="lognormal:800:0.5")
+    parser.add_argument("--backend", choices=("stub", "replay"), default="stub")
+    parser.add_argument("--cache", action="store_true", help="cache every endpoint in memory")
+    args = parser.parse_args()
+    args.distinct = max(1, min(args.distinct or args.requests, args.requests))
+
+    # Settings are read at import time, so configure the backend before loading the app
+    os.environ["LLM_BACKEND"] = args.backend
+    os.environ["LLM_STUB_LATENCY"] = args.latency
+    os.environ["LLM_CACHE_ENDPOINTS"] = "*" if args.cache else ""
+    os.environ["LLM_CACHE_TIER"] = "memory"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
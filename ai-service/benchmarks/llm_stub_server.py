@@ -0,0 +1,57 @@
+"""
+Local LLM Stand-in Server
+Serves the deterministic chat completions stand-in over HTTP, so a service started with
+OPENAI_BASE_URL=http://HOST:PORT/v1 can be load-tested over a real network hop
+
+Usage: python -m benchmarks.llm_stub_server [--host 127.0.0.1] [--port 8100]
+                                            [--latency lognormal:800:0.5] [--token-ms 0] [--seed 0]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.llm_backends import LatencyModel, LocalLLM
+
+
+def create_app(llm: LocalLLM) -> FastAPI:
+    app = FastAPI(title="Local LLM stand-in")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        reply = llm.reply(body)
+        if body.get("stream"):
+            return StreamingResponse(llm.stream(body, reply), media_type="text/event-stream")
+        await asyncio.sleep(reply.total_delay)
+        return JSONResponse(llm.completion(body, reply))
+
+    @app.get("/stats")
+    async def stats():
+        return llm.stats()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="lognormal:800:0.5")
+    parser.add_argument("--token-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    llm = LocalLLM(latency=LatencyModel.parse(args.latency), token_ms=args.token_ms, seed=args.seed)
+    uvicorn.run(create_app(llm), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Text Analysis Benchmark Suite
+Times CEFR analysis, vocabulary extraction and exercise generation on the curriculum corpora
+scaled to fixed input sizes, and compares each run with a stored JSON baseline
+
+Usage: python -m benchmarks.text_analysis [--sizes 1KB,100KB,10MB] [--operations cefr,vocabulary]
+                                          [--repeat N] [--baseline PATH] [--save] [--tolerance 0.25]
+
+Every (operation, size) case runs in a fresh process so its peak RSS is its own. Latencies
+exclude one untimed warm-up call, i.e. they measure steady state with warm memo caches.
+The exit status is 1 when any case regresses past the tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+SIZES = {'1KB': 1024, '100KB': 100 * 1024, '10MB': 10 * 1024 * 1024}
+DEFAULT_REPEATS = {'1KB': 50, '100KB': 10, '10MB': 3}
+OPERATIONS = ('cefr', 'vocabulary', 'exercises')
+
+# Metrics compared against the baseline (larger is worse); tail percentiles of a few
+# samples are too noisy to gate on, so they are recorded but not compared
+COMPARED_METRICS = ('p50_ms', 'peak_rss_mb')
+
+
+def load_paragraphs() -> List[str]:
+    """Paragraphs of the checked-in corpora, in a fixed order"""
+    paragraphs = []
+    for path in sorted((REPO_ROOT / "curriculum_analysis").glob("*_content.json")):
+        with open(path, encoding="utf-8") as corpus_file:
+            data = json.load(corpus_file)
+        paragraphs.extend(paragraph["text"] for paragraph in data.get("paragraphs", []))
+
+    with open(REPO_ROOT / "test-content.txt", encoding="utf-8") as text_file:
+        paragraphs.extend(part.strip() for part in text_file.read().split("\n\n"))
+
+    return [paragraph for paragraph in paragraphs if paragraph.strip()]
+
+
+def scale_corpus(paragraphs: List[str], size_bytes: int) -> str:
+    """Cycle through the paragraphs until the text reaches ``size_bytes`` of UTF-8"""
+    parts = []
+    total = 0
+    index = 0
+    while total < size_bytes:
+        paragraph = paragraphs[index % len(paragraphs)]
+        parts.append(paragraph)
+        total += len(paragraph.encode("utf-8")) + 1
+        index += 1
+
+    text = "\n".join(parts).encode("utf-8")[:size_bytes]
+    return text.decode("utf-8", errors="ignore")
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def run_case(operation: str, size: str, repeat: int) -> Dict:
+    """Benchmark one operation on one input size; runs inside a fresh worker process"""
+    from app.models.content import CEFRLevel
+    from app.services.nlp_processor import NLPProcessor
+
+    text = scale_corpus(load_paragraphs(), SIZES[size])
+    processor = NLPProcessor()
+    analyzer = processor.cefr_analyzer
+    loop = asyncio.new_event_loop()
+
+    # Uncached entry points, so every call does the full work
+    if operation == 'cefr':
+        def call():
+            return analyzer.analyze_cefr_level_sync(text)
+    elif operation == 'vocabulary':
+        def call():
+            return loop.run_until_complete(processor._extract_vocabulary(text, CEFRLevel.A1, 20))
+    else:
+        vocabulary = loop.run_until_complete(processor._extract_vocabulary(text, CEFRLevel.A1, 20))
+
+        def call():
+            random.seed(0)
+            return loop.run_until_complete(processor.generate_exercises(text, vocabulary, CEFRLevel.A1))
+
+    token_count = len(analyzer.tokenize(text).tokens)
+    call()
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    loop.close()
+
+    median = statistics.median(samples)
+    return {
+        'operation': operation,
+        'size': size,
+        'input_bytes': len(text.encode("utf-8")),
+        'tokens': token_count,
+        'repeat': repeat,
+        'mean_ms': statistics.fmean(samples) * 1000,
+        'p50_ms': median * 1000,
+        'p90_ms': percentile(samples, 0.90) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'tokens_per_second': token_count / median if median > 0 else 0.0,
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    }
+
+
+def run_suite(operations: List[str], sizes: List[str], repeat: Optional[int] = None) -> Dict[str, Dict]:
+    """Run every case in its own spawned process and collect results by ``operation/size``"""
+    results = {}
+    for size in sizes:
+        for operation in operations:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                result = executor.submit(run_case, operation, size, repeat or DEFAULT_REPEATS[size]).result()
+            results[f"{operation}/{size}"] = result
+            print(f"{operation:<10} {size:>6}  p50 {result['p50_ms']:10.2f} ms  "
+                  f"p90 {result['p90_ms']:10.2f} ms  {result['tokens_per_second']:12,.0f} tok/s  "
+                  f"rss {result['peak_rss_mb']:7.1f} MB")
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Describe every metric that is more than ``tolerance`` worse than the baseline"""
+    regressions = []
+    for case, result in results.items():
+        reference = baseline.get(case)
+        if reference is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = reference.get(metric), result[metric]
+            if before and after > before * (1 + tolerance):
+                regressions.append(f"{case} {metric}: {before:.2f} -> {after:.2f} "
+                                   f"(+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def environment() -> Dict[str, str]:
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(SIZES),
+                        help="comma-separated input sizes: " + ", ".join(SIZES))
+    parser.add_argument("--operations", default=",".join(OPERATIONS),
+                        help="comma-separated operations: " + ", ".join(OPERATIONS))
+    parser.add_argument("--repeat", type=int, default=None,
+                        help="timed runs per case (default depends on size)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown / RSS growth before a case counts as a regression")
+    args = parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    operations = [operation.strip() for operation in args.operations.split(",") if operation.strip()]
+    unknown = ([name for name in sizes if name not in SIZES]
+               + [name for name in operations if name not in OPERATIONS])
+    if unknown:
+        parser.error(f"unknown size or operation: {', '.join(unknown)}")
+
+    results = run_suite(operations, sizes, args.repeat)
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump({'environment': environment(), 'results': results}, baseline_file, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --save to record one")
+        return
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+
+    regressions = compare(results, baseline.get('results', {}), args.tolerance)
+    if regressions:
+        print(f"regressions against baseline from {baseline['environment']['created']}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"no regressions against baseline from {baseline['environment']['created']} "
+          f"(tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,13 @@ from dotenv import load_dotenv
 from app.routers import lesson_generation, speech_processing, conversation, adaptive_learning, curriculum_builder, practice_generator, teacher_tools
 # from app.routers import content_extraction  # Temporarily disabled due to PyPDF2 dependency
 from app.core.config import settings
+from app.services.cefr_analyzer import shutdown_analysis_pool
+from app.services.cpu_executor import cpu_executor, loop_lag_monitor
+from app.services.llm_cache import llm_cache, llm_flights
+from app.services.llm_client import close_openai_client
+from app.services.llm_json import parse_stats
+from app.services.prompt_budget import prompt_stats
+from app.services.model_registry import model_registry
 # from app.core.database import init_db
 
 # Load environment variables
@@ -47,8 +54,29 @@ app.include_router(teacher_tools.router, prefix="/api/v1/teacher", tags=["Teache
 async def startup_event():
     """Initialize services on startup"""
     # TODO: Initialize database when available
+    
+    # Optionally load NLP models now rather than on the first request
+    warmup = settings.MODEL_WARMUP.strip()
+    if warmup:
+        names = None if warmup == "all" else [name.strip() for name in warmup.split(",") if name.strip()]
+        for info in model_registry.warm_up(names).values():
+            if info.loaded:
+                print(f"Loaded model '{info.name}' ({info.source}) in {info.load_seconds:.2f}s")
+    
+    # Track how long CPU work keeps the event loop from serving other requests
+    if settings.LOOP_LAG_INTERVAL_MS > 0:
+        loop_lag_monitor.start()
+    
     print("AI Service started successfully")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release background workers on shutdown"""
+    await loop_lag_monitor.stop()
+    cpu_executor.shutdown()
+    await close_openai_client()
+    shutdown_analysis_pool()
+
 @app.get("/")
 async def root():
     return {"message": "Turkish Learning AI Service", "version": "1.0.0"}
@@ -57,6 +85,25 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "ai-service"}
 
+@app.get("/health/models")
+async def model_diagnostics():
+    """Load state, load time and resident size of each shared NLP model"""
+    return model_registry.diagnostics()
+
+@app.get("/health/executor")
+async def executor_diagnostics():
+    """CPU executor queue state and event loop blocking time"""
+    return {
+        "executor": cpu_executor.diagnostics(),
+        "event_loop": loop_lag_monitor.diagnostics()
+    }
+
+@app.get("/health/llm-cache")
+async def llm_cache_stats():
+    """Hit rate, bytes and tokens saved by the LLM response cache, coalesced requests, prompt budgets and repaired outputs"""
+    return {**llm_cache.stats(), 'coalescing': llm_flights.stats(), 'prompts': prompt_stats.as_dict(),
+            'parsing': parse_stats.as_dict()}
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
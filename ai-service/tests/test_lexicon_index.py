@@ -0,0 +1,24 @@
+"""
+Tests for the CEFR Lexicon Index
+Covers level lookup and the process-wide index cache
+
+Usage: python -m pytest tests/test_lexicon_index.py
+"""
+
+from app.models.content import CEFRLevel
+from app.services.lexicon_index import LexiconIndex, get_lexicon_index
+
+
+def test_word_keeps_its_lowest_level():
+    index = LexiconIndex.build({CEFRLevel.B1: ['Karar', 'ev'], CEFRLevel.A1: ['ev']})
+    assert index.lookup('ev') == CEFRLevel.A1
+    assert index.lookup('karar') == CEFRLevel.B1
+    assert index.lookup('masa') is None
+
+
+def test_shared_index_is_keyed_by_seed_vocabulary():
+    first = get_lexicon_index({CEFRLevel.A1: ['ev']})
+    second = get_lexicon_index({CEFRLevel.A1: ['su']})
+    assert first is not second
+    assert 'ev' in first and 'ev' not in second
+    assert get_lexicon_index({CEFRLevel.A1: ['ev']}) is first
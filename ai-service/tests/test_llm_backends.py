@@ -0,0 +1,54 @@
+"""
+Tests for the Record/Replay LLM Backend
+Records exchanges through a mock API, then replays them from the cassette alone
+
+Usage: python -m pytest tests/test_llm_backends.py
+"""
+
+import asyncio
+import json
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.services.llm_backends import CassetteTransport
+
+AUDIO = bytes(range(256)) * 8
+SPEECH = b'ID3\x04\x00\xff\xfb\x90' + bytes(range(256))
+
+
+def fake_api(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith('/audio/transcriptions'):
+        return httpx.Response(200, json={'text': 'Merhaba, nasılsınız?'})
+    if request.url.path.endswith('/audio/speech'):
+        return httpx.Response(200, headers={'content-type': 'audio/mpeg'}, content=SPEECH)
+    return httpx.Response(404, json={'error': {'message': 'not found'}})
+
+
+async def transcribe_and_speak(transport: CassetteTransport):
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        client = AsyncOpenAI(api_key='sk-test', http_client=http_client, max_retries=0)
+        transcription = await client.audio.transcriptions.create(
+            model='whisper-1', file=('question.mp3', AUDIO, 'audio/mpeg'), language='tr'
+        )
+        speech = await client.audio.speech.create(model='tts-1', voice='alloy', input='Merhaba')
+        return transcription.text, speech.content
+
+
+def test_transcription_and_speech_are_recorded_and_replayed(tmp_path):
+    path = str(tmp_path / 'cassette.json')
+
+    recorder = CassetteTransport(path, mode='record', inner=httpx.MockTransport(fake_api))
+    assert asyncio.run(transcribe_and_speak(recorder)) == ('Merhaba, nasılsınız?', SPEECH)
+    assert recorder.recorded == 2
+
+    with open(path, encoding='utf-8') as cassette_file:
+        cassette = json.load(cassette_file)
+    assert 'sk-test' not in json.dumps(cassette)
+    upload = next(interaction['request'] for interaction in cassette['interactions'].values()
+                  if isinstance(interaction['request'].get('file'), dict))
+    assert upload['file']['filename'] == 'question.mp3' and upload['file']['size'] == len(AUDIO)
+
+    player = CassetteTransport(path, mode='replay', replay_latency=False)
+    assert asyncio.run(transcribe_and_speak(player)) == ('Merhaba, nasılsınız?', SPEECH)
+    assert player.replayed == 2 and player.missing == 0
@@ -0,0 +1,118 @@
+"""
+Tests for the LLM Response Cache
+Covers cache keys, the memory and disk tiers, and coalescing of identical requests
+
+Usage: python -m pytest tests/test_llm_cache.py
+"""
+
+import asyncio
+import os
+
+from openai.types.chat import ChatCompletion
+
+from app.services import llm_cache as cache_module
+from app.services.llm_cache import LLMResponseCache, cached_chat_completion, completion_key
+from app.services.single_flight import SingleFlight
+
+PARAMS = {
+    'model': 'gpt-4',
+    'messages': [{'role': 'user', 'content': 'Create a lesson about  aile.'}],
+    'temperature': 0.7,
+    'max_tokens': 500
+}
+
+
+def test_key_ignores_whitespace_transport_options_and_nearby_temperatures():
+    key = completion_key(PARAMS)
+    assert completion_key({**PARAMS, 'messages': [{'role': 'user', 'content': ' Create a lesson\nabout aile. '}]}) == key
+    assert completion_key({**PARAMS, 'stream': True, 'timeout': 30}) == key
+    assert completion_key({**PARAMS, 'temperature': 0.74}) == key
+
+    assert completion_key({**PARAMS, 'model': 'gpt-4o'}) != key
+    assert completion_key({**PARAMS, 'temperature': 0.2}) != key
+    assert completion_key({**PARAMS, 'max_tokens': 800}) != key
+
+
+def test_memory_tier_expires_and_evicts():
+    cache = LLMResponseCache(max_entries=2, ttl_seconds=60)
+    for name in ('a', 'b', 'c'):
+        asyncio.run(cache.put(name, f'"{name}"'))
+    assert asyncio.run(cache.get('a')) is None
+    assert asyncio.run(cache.get('c')) == '"c"'
+    assert cache.evictions == 1
+
+    expired = LLMResponseCache(ttl_seconds=-1)
+    asyncio.run(expired.put('a', '"a"'))
+    assert asyncio.run(expired.get('a')) is None
+
+
+def test_disk_tier_is_shared_and_bounded(tmp_path):
+    writer = LLMResponseCache(tier='disk', directory=str(tmp_path), disk_max_entries=3)
+    for index in range(cache_module.DISK_PRUNE_INTERVAL):
+        asyncio.run(writer.put(f'llm:1:{index:04d}', f'{{"n": {index}}}'))
+
+    reader = LLMResponseCache(tier='disk', directory=str(tmp_path))
+    assert asyncio.run(reader.get(f'llm:1:{cache_module.DISK_PRUNE_INTERVAL - 1:04d}')) is not None
+    assert reader.shared_hits == 1
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.json')]) == 3
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_single_flight_shares_one_call_and_survives_a_cancelled_waiter():
+    flights = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'done'
+
+    async def main():
+        waiters = [asyncio.ensure_future(flights.run('key', call)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        waiters[0].cancel()
+        results = await asyncio.gather(*waiters[1:])
+        return results, flights.in_flight
+
+    results, in_flight = asyncio.run(main())
+    assert results == ['done'] * 4
+    assert len(calls) == 1 and in_flight == 0
+    assert flights.coalesced == 4 and flights.abandoned == 0
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        return ChatCompletion.model_validate({
+            'id': f'call-{self.calls}', 'object': 'chat.completion', 'created': 0, 'model': params['model'],
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': '{"title": "Aile"}'}}],
+            'usage': {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15}
+        })
+
+
+class FakeClient:
+    def __init__(self):
+        self.chat = type('Chat', (), {'completions': FakeCompletions()})()
+
+
+def test_cached_completion_coalesces_then_hits_the_cache(monkeypatch):
+    monkeypatch.setattr(cache_module, 'llm_cache', LLMResponseCache(endpoints=('test.endpoint',)))
+    monkeypatch.setattr(cache_module, 'llm_flights', SingleFlight())
+    client = FakeClient()
+
+    async def main():
+        first = await asyncio.gather(*(cached_chat_completion(client, 'test.endpoint', **PARAMS) for _ in range(5)))
+        again = await cached_chat_completion(client, 'test.endpoint', **PARAMS)
+        fresh = await cached_chat_completion(client, 'test.endpoint', force_fresh=True, **PARAMS)
+        return first, again, fresh
+
+    first, again, fresh = asyncio.run(main())
+    assert {response.id for response in first} == {'call-1'}
+    assert again.id == 'call-1' and fresh.id == 'call-2'
+    assert client.chat.completions.calls == 2
+    assert cache_module.llm_cache.hits == 1 and cache_module.llm_cache.tokens_saved == 15
@@ -0,0 +1,87 @@
+"""
+Tests for Tolerant JSON Parsing
+Covers the repairs parse_llm_json makes to fenced, malformed and truncated completions
+
+Usage: python -m pytest tests/test_llm_json.py
+"""
+
+import json
+
+from app.models.content import VocabularyItem
+from app.services.llm_json import ItemSchema, parse_llm_json, repair_json, strip_fences
+
+
+def test_fenced_document_is_unwrapped():
+    content = '```json\n{"title": "Aile", "vocabulary": []}\n```'
+    assert strip_fences(content) == '{"title": "Aile", "vocabulary": []}'
+
+    parsed = parse_llm_json(content, required=('title',))
+    assert parsed.ok
+    assert parsed.data == {'title': 'Aile', 'vocabulary': []}
+    assert not parsed.repaired
+
+
+def test_trailing_commas_are_dropped():
+    parsed = parse_llm_json('{"objectives": ["a", "b",], "notes": {"x": 1,},}')
+    assert parsed.ok and parsed.repaired
+    assert parsed.data == {'objectives': ['a', 'b'], 'notes': {'x': 1}}
+
+
+def test_truncation_inside_an_array_item_drops_the_partial_item():
+    content = ('{"title": "Aile", "vocabulary": [{"turkish": "anne", "english": "mother"}, '
+               '{"turkish": "baba", "english": "fat')
+    assert json.loads(repair_json(content)) == {
+        'title': 'Aile', 'vocabulary': [{'turkish': 'anne', 'english': 'mother'}]
+    }
+
+    parsed = parse_llm_json(content, sections={('vocabulary',): ItemSchema(
+        VocabularyItem, defaults={'difficulty_level': 'A1'}
+    )})
+    assert parsed.ok and parsed.repaired
+    assert [item['turkish'] for item in parsed.data['vocabulary']] == ['anne']
+    assert parsed.dropped == {}
+
+
+def test_escaped_quotes_do_not_end_strings():
+    content = '{"example": "O \\"Merhaba\\" dedi, ", "rule": "a\\\\", "open": ["x", "y\\"}'
+    parsed = parse_llm_json(content)
+    assert parsed.ok and parsed.repaired
+    assert parsed.data['example'] == 'O "Merhaba" dedi, '
+    assert parsed.data['rule'] == 'a\\'
+    assert parsed.data['open'] == ['x']
+
+
+def test_brackets_in_prose_before_the_document_are_skipped():
+    parsed = parse_llm_json('I [think]: {"title":"x"}')
+    assert parsed.ok
+    assert parsed.data == {'title': 'x'}
+
+    parsed = parse_llm_json('Words [beginner]:\n[{"turkish": "ev"}, {"turkish": "su"}]', expect=list)
+    assert parsed.ok
+    assert parsed.data == [{'turkish': 'ev'}, {'turkish': 'su'}]
+
+    parsed = parse_llm_json('As in step [1], here is the lesson: {"title": "x", "tags": [2]}')
+    assert parsed.ok
+    assert parsed.data == {'title': 'x', 'tags': [2]}
+
+
+def test_nested_arrays_are_not_taken_for_the_root():
+    parsed = parse_llm_json('{"words": [{"turkish": "ev"}], "note": "cut', expect=list)
+    assert not parsed.ok
+
+
+def test_invalid_items_are_removed_and_counted():
+    content = '{"vocabulary": [{"turkish": "ev", "english": "house"}, {"turkish": "su"}]}'
+    parsed = parse_llm_json(content, sections={('vocabulary',): ItemSchema(
+        VocabularyItem, defaults={'difficulty_level': 'A1'}
+    )})
+    assert parsed.ok
+    assert [item['turkish'] for item in parsed.data['vocabulary']] == ['ev']
+    assert parsed.dropped == {'vocabulary': 1}
+
+
+def test_completion_without_json_is_reported():
+    parsed = parse_llm_json('Sorry, I cannot help with that.')
+    assert not parsed.ok
+    assert parsed.data is None
+    assert parsed.error
@@ -0,0 +1,63 @@
+"""
+Tests for Streaming LLM Generation
+Covers the incremental item parser and the validated SSE events built from it
+
+Usage: python -m pytest tests/test_llm_stream.py
+"""
+
+import asyncio
+import json
+
+from app.models.content import VocabularyItem
+from app.services.llm_json import ItemSchema
+from app.services.llm_stream import IncrementalJSONParser, sse_json_generation
+
+SECTIONS = {('vocabulary',): 'vocabulary'}
+DOCUMENT = '{"title": "Aile", "vocabulary": [{"turkish": "anne", "english": "mother"}, {"turkish": "baba", "english": "father"}]}'
+
+
+def feed_in_pieces(parser, text, size=7):
+    items = []
+    for start in range(0, len(text), size):
+        items += parser.feed(text[start:start + size])
+    return items
+
+
+def test_items_are_emitted_as_they_complete():
+    parser = IncrementalJSONParser(SECTIONS)
+    first = parser.feed(DOCUMENT[:DOCUMENT.index('}') + 1])
+    assert [item.value['turkish'] for item in first] == ['anne']
+
+    rest = parser.feed(DOCUMENT[DOCUMENT.index('}') + 1:])
+    assert [(item.index, item.value['turkish']) for item in rest] == [(1, 'baba')]
+
+
+def test_brackets_in_preamble_are_not_taken_for_the_root():
+    for preamble in ('Here is [the] lesson: ', 'Using {topic} and [1]: ', '```json\n'):
+        parser = IncrementalJSONParser(SECTIONS)
+        items = feed_in_pieces(parser, preamble + DOCUMENT)
+        assert [item.value['turkish'] for item in items] == ['anne', 'baba'], preamble
+
+
+def test_invalid_items_are_not_sent():
+    async def deltas():
+        for start in range(0, len(content), 10):
+            yield content[start:start + 10]
+
+    async def collect():
+        return [event async for event in sse_json_generation(
+            deltas(), SECTIONS, {}, required=('title',),
+            schemas={('vocabulary',): ItemSchema(VocabularyItem, defaults={'difficulty_level': 'A1'})}
+        )]
+
+    content = '{"title": "Aile", "vocabulary": [{"turkish": "su"}, {"turkish": "ev", "english": "house"}]}'
+    events = [event.split('\n') for event in asyncio.run(collect())]
+    payloads = {}
+    for name, data, _, _ in events:
+        payloads.setdefault(name[len('event: '):], []).append(json.loads(data[len('data: '):]))
+
+    assert [(item['index'], item['value']['turkish']) for item in payloads['item']] == [(0, 'ev')]
+    done = payloads['done'][0]
+    assert done['items'] == {'vocabulary': 1}
+    assert [item['turkish'] for item in done['document']['vocabulary']] == ['ev']
+    assert done['invalid_items_dropped'] == {'vocabulary': 1}
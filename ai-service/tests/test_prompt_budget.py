@@ -0,0 +1,99 @@
+"""
+Tests for Prompt Compaction and Token Budgets
+Checks that budgeted max_tokens leave room for the documents the prompts ask for, and that
+context is fitted to its budget
+
+Usage: python -m pytest tests/test_prompt_budget.py
+"""
+
+import json
+from typing import Dict, Tuple
+
+import pytest
+
+from app.models.content import CEFRLevel, ExerciseGenerationRequest, LessonType, TeacherLessonRequest
+from app.routers.lesson_generation import _gpt4_lesson_params
+from app.routers.practice_generator import _practice_exercise_params
+from app.routers.teacher_tools import _teacher_lesson_params
+from app.services.llm_backends import fill_template, response_template
+from app.services.prompt_budget import DEFAULT_MODEL_LIMITS, chat_params, count_tokens, fit_items, fit_text, model_limits
+
+
+def example_document_tokens(params, counts: Dict[Tuple[str, ...], int]) -> int:
+    """Tokens of the prompt's own example document with the array at each path grown to its count"""
+    template = response_template(params['messages'][-1]['content'])
+    assert template is not None
+    document = fill_template(template, 1)
+    for path, count in counts.items():
+        parent = document
+        for key in path[:-1]:
+            parent = parent[key]
+        parent[path[-1]] = (parent[path[-1]] * count)[:count]
+    return count_tokens(json.dumps(document, ensure_ascii=False, indent=4))
+
+
+@pytest.mark.parametrize('count', [1, 5, 10])
+def test_practice_budget_covers_the_example_document(count):
+    params = _practice_exercise_params(ExerciseGenerationRequest(
+        lesson_content="Bu ders aile hakkında.", exercise_types=["multiple_choice"],
+        difficulty_level=CEFRLevel.A1, student_weak_areas=["aile"], count=count
+    ))
+    assert params['max_tokens'] >= example_document_tokens(params, {('exercises',): count})
+
+
+@pytest.mark.parametrize('vocabulary_count,exercise_count', [(10, 5), (20, 10)])
+def test_teacher_budget_covers_the_example_document(vocabulary_count, exercise_count):
+    params = _teacher_lesson_params(TeacherLessonRequest(
+        title="Aile", topic="aile", target_level=CEFRLevel.A2, lesson_type=LessonType.VOCABULARY,
+        duration_minutes=30, learning_objectives=["Talk about family"],
+        vocabulary_count=vocabulary_count, exercise_count=exercise_count
+    ))
+    assert params['max_tokens'] >= example_document_tokens(params, {
+        ('lesson', 'vocabulary'): vocabulary_count,
+        ('lesson', 'grammar_rules'): 3,
+        ('lesson', 'exercises'): exercise_count
+    })
+
+
+def test_lesson_budget_covers_the_example_document():
+    params = _gpt4_lesson_params("aile", "A1", "vocabulary", 30)
+    assert params['max_tokens'] >= example_document_tokens(params, {
+        ('vocabulary',): 15, ('grammar_rules',): 3, ('example_sentences',): 10, ('exercises',): 5
+    })
+
+
+def test_fit_items_summarizes_then_drops():
+    units = [{"id": f"u{i}", "title": f"Unit {i}", "description": "uzun açıklama " * 30} for i in range(40)]
+
+    summarized = fit_items(units, 1000, summary_fields=("id", "title"), noun="units")
+    assert "açıklama" not in summarized
+    assert len(json.loads(summarized)) == 40
+
+    trimmed = fit_items(units, 100, summary_fields=("id", "title"), noun="units")
+    kept, note = trimmed.split("\n")
+    assert count_tokens(trimmed) <= 110
+    assert note == f"(+{40 - len(json.loads(kept))} more units not shown)"
+
+
+def test_fit_text_cuts_at_sentence_boundaries():
+    text = "Bu bir cümle. " * 200
+    fitted = fit_text(text, 50)
+    assert count_tokens(fitted) <= 50
+    assert fitted.endswith("cümle. …")
+    assert fit_text("Kısa bir metin.", 50) == "Kısa bir metin."
+
+
+def test_max_tokens_fit_the_model_limits():
+    assert model_limits('gpt-4-0613').context_tokens == 8192
+    assert model_limits('gpt-4o-2024-08-06') == model_limits('gpt-4o')
+    assert model_limits('gpt-4o-mini').max_output_tokens == 16384
+    assert model_limits('some-local-model') == DEFAULT_MODEL_LIMITS
+
+    prompt = "Bu bir cümle. " * 1200
+    for model in ('gpt-4', 'gpt-4-turbo', 'gpt-3.5-turbo'):
+        params = chat_params('practice.generate-practice-exercises', "Teacher", prompt,
+                             items={'exercises': 10}, model=model)
+        limits = model_limits(model)
+        assert params['model'] == model
+        assert params['max_tokens'] <= (limits.max_output_tokens or limits.context_tokens)
+        assert count_tokens(prompt) + params['max_tokens'] <= limits.context_tokens
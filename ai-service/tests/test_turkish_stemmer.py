@@ -0,0 +1,42 @@
+"""
+Tests for the Turkish Suffix Stripper
+Table-driven checks of stems and of the dictionary forms offered for lexicon lookup
+
+Usage: python -m pytest tests/test_turkish_stemmer.py
+"""
+
+import pytest
+
+from app.services.turkish_stemmer import TurkishStemmer
+
+stemmer = TurkishStemmer(cache_size=1000)
+
+
+@pytest.mark.parametrize('word,stem', [
+    ('kitaplarımızdan', 'kitap'),
+    ('evlerimizde', 'ev'),
+    ('arkadaşlarımızla', 'arkadaş'),
+    ('gelmedim', 'gel'),
+    ('gelebildim', 'gel'),
+    ('gelemedim', 'gel'),
+    ('gelemez', 'gel'),
+    ('okuyamadık', 'oku'),
+    ('ev', 'ev'),
+])
+def test_stem(word, stem):
+    assert stemmer.stem(word) == stem
+
+
+# Without a lexicon, -Iyor leaves the stem vowel ambiguous (ok-uyor / oku-yor, bekl-iyor /
+# bekle-yor), so those forms are checked through their lemma candidates
+@pytest.mark.parametrize('word,lemmas', [
+    ('okuyorlar', ('oku', 'okumak')),
+    ('bekliyor', ('bekle', 'beklemek')),
+    ('gelemedim', ('gelmek',)),
+    ('gidemedik', ('gitmek',)),
+    ('kitabı', ('kitap',)),
+])
+def test_lemma_candidates(word, lemmas):
+    candidates = stemmer.lemma_candidates(word)
+    for lemma in lemmas:
+        assert lemma in candidates